@@ -5,11 +5,12 @@ Provides dashboard with metrics, LLM usage, system health, and management pages
 
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
-from clinic.models import AuditLog, CustomUser, SymptomRecord, ChatSession
+from clinic.models import AuditLog, CustomUser, SymptomRecord, ChatSession, DailyAuditRollup, DailySymptomRollup
+from clinic.llm_health import get_provider_health
 import os
 
 
@@ -68,27 +69,36 @@ def backend_monitoring_dashboard(request):
     # LLM API Configuration Status
     llm_providers = {
         'Gemini': {
+            'key': 'gemini',
             'configured': bool(os.getenv('GEMINI_API_KEY')),
             'tier': 'Free (1,500 req/day)',
             'dashboard': 'https://aistudio.google.com/apikey'
         },
         'OpenRouter (Qwen)': {
+            'key': 'openrouter',
             'configured': bool(os.getenv('OPENROUTER_API_KEY')),
             'tier': 'Free (Limited)',
             'dashboard': 'https://openrouter.ai/activity'
         },
         'Groq (Grok 2)': {
+            'key': 'groq',
             'configured': bool(os.getenv('GROQ_API_KEY')),
             'tier': 'Free (30 req/min)',
             'dashboard': 'https://console.groq.com/'
         },
         'Cohere': {
+            'key': 'cohere',
             'configured': bool(os.getenv('COHERE_API_KEY')),
             'tier': 'Free (100 req/min)',
             'dashboard': 'https://dashboard.cohere.com/'
         }
     }
     
+    # Circuit breaker state and rolling error rate/latency per provider
+    provider_health = get_provider_health()
+    for provider in llm_providers.values():
+        provider['health'] = provider_health.stats(provider['key'])
+    
     # System Health Indicators
     health_checks = {
         'Database': {
@@ -188,37 +198,34 @@ def admin_health_records_page(request):
     Shows symptom submissions, predictions, and trends
     """
     now = timezone.now()
-    last_7d = now - timedelta(days=7)
-    last_30d = now - timedelta(days=30)
-    
-    # Symptom statistics
-    total_records = SymptomRecord.objects.count()
-    records_7d = SymptomRecord.objects.filter(created_at__gte=last_7d).count()
-    records_30d = SymptomRecord.objects.filter(created_at__gte=last_30d).count()
+    today = timezone.localdate()
+    last_7d = today - timedelta(days=7)
+    last_30d = today - timedelta(days=30)
+    
+    # Symptom statistics (daily rollups, see clinic/rollups.py)
+    rollup_stats = DailySymptomRollup.objects.aggregate(
+        total=Sum('record_count'),
+        last_7d=Sum('record_count', filter=Q(date__gte=last_7d)),
+        last_30d=Sum('record_count', filter=Q(date__gte=last_30d)),
+        # Prediction accuracy stats (Last 30 days)
+        high_confidence=Sum('high_confidence_count', filter=Q(date__gte=last_30d)),
+        medium_confidence=Sum('medium_confidence_count', filter=Q(date__gte=last_30d)),
+        low_confidence=Sum('low_confidence_count', filter=Q(date__gte=last_30d)),
+    )
+    total_records = rollup_stats['total'] or 0
+    records_7d = rollup_stats['last_7d'] or 0
+    records_30d = rollup_stats['last_30d'] or 0
     
     # Top predicted diseases (Last 30 days)
-    top_diseases = SymptomRecord.objects.filter(
-        created_at__gte=last_30d
+    top_diseases = DailySymptomRollup.objects.filter(
+        date__gte=last_30d
     ).values('predicted_disease').annotate(
-        count=Count('id')
+        count=Sum('record_count')
     ).order_by('-count')[:10]
     
-    # Prediction accuracy stats
-    high_confidence = SymptomRecord.objects.filter(
-        confidence__gte=0.8,
-        created_at__gte=last_30d
-    ).count()
-    
-    medium_confidence = SymptomRecord.objects.filter(
-        confidence__lt=0.8,
-        confidence__gte=0.6,
-        created_at__gte=last_30d
-    ).count()
-    
-    low_confidence = SymptomRecord.objects.filter(
-        confidence__lt=0.6,
-        created_at__gte=last_30d
-    ).count()
+    high_confidence = rollup_stats['high_confidence'] or 0
+    medium_confidence = rollup_stats['medium_confidence'] or 0
+    low_confidence = rollup_stats['low_confidence'] or 0
     
     # Recent symptom records
     recent_records = SymptomRecord.objects.all().order_by('-created_at')[:15]
@@ -248,18 +255,26 @@ def admin_api_analytics_page(request):
     last_7d = now - timedelta(days=7)
     last_30d = now - timedelta(days=30)
     
-    # API metrics by time period
+    # API metrics by time period (daily audit rollups, see clinic/rollups.py)
+    rollup_7d = Q(date__gte=timezone.localdate(last_7d))
+    rollup_30d = Q(date__gte=timezone.localdate(last_30d))
+    audit_stats = DailyAuditRollup.objects.filter(rollup_30d).aggregate(
+        total_7d=Sum('count', filter=rollup_7d),
+        successful_7d=Sum('count', filter=rollup_7d & Q(success=True)),
+        total_30d=Sum('count'),
+        successful_30d=Sum('count', filter=Q(success=True)),
+    )
     metrics_7d = {
-        'total_requests': AuditLog.objects.filter(timestamp__gte=last_7d).count(),
-        'successful': AuditLog.objects.filter(timestamp__gte=last_7d, success=True).count(),
-        'failed': AuditLog.objects.filter(timestamp__gte=last_7d, success=False).count(),
+        'total_requests': audit_stats['total_7d'] or 0,
+        'successful': audit_stats['successful_7d'] or 0,
     }
+    metrics_7d['failed'] = metrics_7d['total_requests'] - metrics_7d['successful']
     
     metrics_30d = {
-        'total_requests': AuditLog.objects.filter(timestamp__gte=last_30d).count(),
-        'successful': AuditLog.objects.filter(timestamp__gte=last_30d, success=True).count(),
-        'failed': AuditLog.objects.filter(timestamp__gte=last_30d, success=False).count(),
+        'total_requests': audit_stats['total_30d'] or 0,
+        'successful': audit_stats['successful_30d'] or 0,
     }
+    metrics_30d['failed'] = metrics_30d['total_requests'] - metrics_30d['successful']
     
     # Calculate success rates
     if metrics_7d['total_requests'] > 0:
@@ -273,13 +288,13 @@ def admin_api_analytics_page(request):
         metrics_30d['success_rate'] = 100
     
     # Top endpoints
-    top_endpoints = AuditLog.objects.filter(
-        timestamp__gte=last_30d
+    top_endpoints = DailyAuditRollup.objects.filter(
+        rollup_30d
     ).values('action').annotate(
-        count=Count('id')
+        count=Sum('count')
     ).order_by('-count')[:10]
     
-    # Error breakdown
+    # Error breakdown (only failed entries, so still read from audit_logs)
     error_breakdown = AuditLog.objects.filter(
         success=False,
         timestamp__gte=last_30d
@@ -0,0 +1,113 @@
+"""
+Analytics Aggregations
+Grouped queries behind the staff analytics endpoints
+
+symptom_frequencies unnests the symptoms JSON array in the database (PostgreSQL
+jsonb_array_elements_text, SQLite json_each) instead of loading every record;
+clinic/rollups.py uses it to build the daily symptom counts.
+
+The rollup_* readers answer the endpoints from the daily rollup tables
+(clinic/rollups.py), so their cost depends on the window, not on history size.
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from django.db import connection
+from django.db.models import QuerySet, Sum
+
+from .models import DailySymptomCount, DailySymptomRollup
+
+# Unnest each record's symptoms array; non-array values count as empty
+SYMPTOM_FREQUENCY_SQL = {
+    'postgresql': """
+        SELECT s.symptom, COUNT(*) AS n, SUM(COUNT(*)) OVER () AS total
+        FROM ({records}) AS r
+        CROSS JOIN LATERAL jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(r.symptoms::jsonb) = 'array' THEN r.symptoms::jsonb ELSE '[]'::jsonb END
+        ) AS s(symptom)
+        GROUP BY s.symptom
+        ORDER BY n DESC, s.symptom
+    """,
+    'sqlite': """
+        SELECT s.value, COUNT(*) AS n, SUM(COUNT(*)) OVER () AS total
+        FROM ({records}) AS r,
+             json_each(CASE WHEN json_type(r.symptoms) = 'array' THEN r.symptoms ELSE '[]' END) AS s
+        GROUP BY s.value
+        ORDER BY n DESC, s.value
+    """,
+}
+
+
+def _fill_days(counts: Dict[date, int], start_date: date, end_date: date) -> List[Dict]:
+    trends = []
+    current_date = start_date
+    while current_date <= end_date:
+        trends.append({'date': current_date.isoformat(), 'count': counts.get(current_date, 0)})
+        current_date += timedelta(days=1)
+    return trends
+
+
+def symptom_frequencies(queryset: QuerySet, limit: Optional[int] = 10) -> List[Dict]:
+    """
+    Most common symptoms of a SymptomRecord queryset: [{symptom, count, percentage}]
+    percentage is the share of all reported symptoms (not only the top `limit`);
+    limit=None returns every symptom
+    """
+    template = SYMPTOM_FREQUENCY_SQL.get(connection.vendor)
+    if template is None:
+        return _symptom_frequencies_python(queryset, limit)
+
+    records_sql, params = queryset.order_by().values('symptoms').query.sql_with_params()
+    sql = template.format(records=records_sql)
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params = (*params, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {'symptom': symptom, 'count': count, 'percentage': round(count / float(total) * 100, 1)}
+        for symptom, count, total in rows
+    ]
+
+
+def _symptom_frequencies_python(queryset: QuerySet, limit: Optional[int]) -> List[Dict]:
+    # Other backends (MySQL): stream only the symptoms column and count in Python
+    counter = Counter()
+    for symptoms in queryset.order_by().values_list('symptoms', flat=True).iterator(chunk_size=2000):
+        if isinstance(symptoms, list):
+            counter.update(symptoms)
+
+    total = sum(counter.values())
+    return [
+        {'symptom': symptom, 'count': count, 'percentage': round(count / total * 100, 1)}
+        for symptom, count in counter.most_common(limit)
+    ]
+
+
+def rollup_daily_counts(start_date: date, end_date: date) -> List[Dict]:
+    """
+    [{date, count}] of symptom records for every day from start_date to end_date (inclusive),
+    zeros included, summed from DailySymptomRollup
+    """
+    rows = (
+        DailySymptomRollup.objects.filter(date__gte=start_date, date__lte=end_date)
+        .values('date')
+        .annotate(count=Sum('record_count'))
+        .order_by('date')
+    )
+    return _fill_days({row['date']: row['count'] for row in rows}, start_date, end_date)
+
+
+def rollup_symptom_frequencies(start_date: date, end_date: date, limit: int = 10) -> List[Dict]:
+    """symptom_frequencies() of the records in a date range, summed from DailySymptomCount"""
+    counts = DailySymptomCount.objects.filter(date__gte=start_date, date__lte=end_date)
+    total = counts.aggregate(total=Sum('count'))['total'] or 0
+    top = counts.values('symptom').annotate(total=Sum('count')).order_by('-total', 'symptom')[:limit]
+    return [
+        {'symptom': row['symptom'], 'count': row['total'], 'percentage': round(row['total'] / total * 100, 1)}
+        for row in top
+    ]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ClinicConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clinic'
+
+    def ready(self):
+        # Keep the daily analytics rollups and department stats current on every insert
+        from . import rollups, department_stats  # noqa: F401
@@ -0,0 +1,378 @@
+"""
+Buffered Audit Log Writer
+Takes AuditLog inserts off the request path of AuditMiddleware
+
+Entries are queued in memory and written with one bulk_create per batch by a
+background thread, when AUDIT_BATCH_SIZE entries are waiting or every
+AUDIT_FLUSH_INTERVAL seconds. Requests only append to a list; a full buffer
+(AUDIT_MAX_BUFFER) is flushed inline as backpressure.
+
+Nothing is lost on a graceful shutdown: the buffer is flushed at interpreter
+exit and from gunicorn's worker_exit hook. A batch that can't be written
+because of the database (outage, shutdown with the database down) goes to a
+write-once JSONL file in AUDIT_SPOOL_DIR, which any worker replays on a later
+flush. Entries carry their UUID, so a replay inserts each one once. Only a
+hard kill (SIGKILL, OOM) can lose the entries of the last flush interval.
+
+A batch rejected for its data (an entry whose user was deleted before the
+flush, a value the column refuses) is retried row by row; the rows that
+still fail go to AUDIT_SPOOL_DIR/dead-letter with the error, so one bad
+entry neither blocks the rest nor is retried forever.
+
+Daily audit rollups are incremented for every inserted batch (bulk_create
+skips the post_save receiver in clinic/rollups.py).
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+from .rollups import add_audit_logs
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_DIR = 'dead-letter'  # Under the spool dir
+
+# Errors caused by an entry's own data; anything else is taken as the database being unavailable
+DATA_ERRORS = (IntegrityError, DataError, ValueError, TypeError)
+
+SPOOL_FIELDS = (
+    'id', 'user_id', 'action', 'model_name', 'object_id', 'changes', 'timestamp',
+    'ip_address', 'user_agent', 'success', 'error_message',
+)
+
+
+class AuditLogWriter:
+    """Buffers AuditLog entries and inserts them in batches"""
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 2.0,
+                 max_buffer: int = 10000, spool_dir: Optional[str] = None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spool_dir = spool_dir
+
+        self._entries: List[AuditLog] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time (thread, backpressure, exit)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._stopping = False
+
+        # Metrics
+        self.written = 0
+        self.replayed = 0
+        self.spooled = 0
+        self.dead_lettered = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+        self.last_flush_at: Optional[datetime] = None
+
+    # ------------------------------------------------------------------
+    # Producer side (request threads)
+    # ------------------------------------------------------------------
+
+    def add(self, **fields) -> AuditLog:
+        """Queue one entry (AuditLog field values); the timestamp is taken now"""
+        entry = AuditLog(**fields)
+        self._ensure_thread()
+        with self._lock:
+            self._entries.append(entry)
+            depth = len(self._entries)
+
+        if depth >= self.max_buffer:
+            # Backpressure: the flusher is not keeping up (or the database is down)
+            self.flush()
+        elif depth >= self.batch_size:
+            self._wakeup.set()
+        return entry
+
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Insert everything buffered (and any spooled batches); returns entries inserted"""
+        with self._flush_lock:
+            inserted = self._replay_spool()
+            while True:
+                with self._lock:
+                    batch, self._entries = self._entries[:self.batch_size], self._entries[self.batch_size:]
+                if not batch:
+                    return inserted
+                written, unwritten = self._write(batch)
+                inserted += len(written)
+                if unwritten:
+                    # Keep the rest too rather than retrying against a failing database
+                    with self._lock:
+                        rest, self._entries = self._entries, []
+                    self._spool(unwritten + rest)
+                    return inserted
+
+    def _write(self, batch: List[AuditLog]) -> Tuple[List[AuditLog], List[AuditLog]]:
+        """
+        Insert a batch; returns (entries inserted, entries left unwritten because the database failed)
+        Entries rejected for their own data are dead-lettered and in neither list
+        """
+        started = time.monotonic()
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create(batch)
+            inserted, unwritten = batch, []
+        except DATA_ERRORS as e:
+            logger.warning(f"Audit log batch of {len(batch)} entries rejected ({e}); inserting row by row")
+            inserted, unwritten = self._write_rows(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Audit log flush of {len(batch)} entries failed: {e}")
+            inserted, unwritten = [], batch
+        finally:
+            elapsed = time.monotonic() - started
+            self.flushes += 1
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.total_flush_seconds += elapsed
+            self.last_flush_at = timezone.now()
+
+        self.written += len(inserted)
+        if inserted:
+            self._count_in_rollups(inserted)
+        return inserted, unwritten
+
+    def _write_rows(self, batch: List[AuditLog]):
+        inserted, rejected = [], []
+        for index, entry in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create([entry])
+            except DATA_ERRORS as e:
+                rejected.append((entry, e))
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Audit log flush failed after {len(inserted)} of {len(batch)} entries: {e}")
+                self._dead_letter(rejected)
+                return inserted, batch[index:]
+            else:
+                inserted.append(entry)
+        self._dead_letter(rejected)
+        return inserted, []
+
+    @staticmethod
+    def _count_in_rollups(batch: List[AuditLog]):
+        try:
+            with transaction.atomic():
+                add_audit_logs(batch)
+        except Exception as e:
+            # refresh_rollups repairs the day
+            logger.error(f"Audit rollup update failed for {len(batch)} entries: {e}")
+
+    # ------------------------------------------------------------------
+    # Spool files (batches the database refused) and dead letters
+    # ------------------------------------------------------------------
+
+    def _spool(self, entries: List[AuditLog]):
+        if not self.spool_dir:
+            logger.error(f"No AUDIT_SPOOL_DIR; dropping {len(entries)} audit log entries")
+            return
+        name = self._write_once(self.spool_dir, [json.dumps(_to_spool(entry)) for entry in entries])
+        self.spooled += len(entries)
+        logger.warning(f"Spooled {len(entries)} audit log entries to {name}")
+
+    def _dead_letter(self, rejected):
+        if not rejected:
+            return
+        self.dead_lettered += len(rejected)
+        if not self.spool_dir:
+            logger.error(f"No AUDIT_SPOOL_DIR; dropping {len(rejected)} rejected audit log entries")
+            return
+        lines = [json.dumps({'entry': _to_spool(entry), 'error': str(error)}) for entry, error in rejected]
+        name = self._write_once(os.path.join(self.spool_dir, DEAD_LETTER_DIR), lines)
+        logger.error(f"Dead-lettered {len(rejected)} rejected audit log entries to {DEAD_LETTER_DIR}/{name}")
+
+    @staticmethod
+    def _write_once(directory: str, lines: List[str]) -> str:
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.time():.6f}-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        partial = os.path.join(directory, f".{name}.tmp")
+        with open(partial, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        # Files appear complete or not at all, and are never appended to afterwards
+        os.replace(partial, os.path.join(directory, name))
+        return name
+
+    def spool_files(self) -> List[str]:
+        """Spooled batches waiting to be replayed (dead letters live in a subdirectory)"""
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return []
+        return sorted(name for name in os.listdir(self.spool_dir) if name.endswith('.jsonl'))
+
+    def _replay_spool(self) -> int:
+        inserted = 0
+        for name in self.spool_files():
+            path = os.path.join(self.spool_dir, name)
+            claimed = f"{path}.{os.getpid()}.claimed"
+            try:
+                os.rename(path, claimed)  # Only one worker wins the rename
+            except FileNotFoundError:
+                continue
+
+            try:
+                with open(claimed, encoding='utf-8') as f:
+                    entries = [_from_spool(json.loads(line)) for line in f if line.strip()]
+            except (ValueError, TypeError, KeyError) as e:
+                # Unreadable: set it aside instead of failing on it every flush
+                logger.error(f"Audit spool {name} is unreadable ({e}); moving it to {DEAD_LETTER_DIR}")
+                os.makedirs(os.path.join(self.spool_dir, DEAD_LETTER_DIR), exist_ok=True)
+                os.replace(claimed, os.path.join(self.spool_dir, DEAD_LETTER_DIR, name))
+                continue
+
+            try:
+                # A replay interrupted after its insert must not insert twice
+                existing = set(AuditLog.objects.filter(id__in=[e.id for e in entries]).values_list('id', flat=True))
+            except Exception as e:
+                logger.error(f"Replaying audit spool {name} failed: {e}")
+                os.rename(claimed, path)
+                break
+            entries = [entry for entry in entries if entry.id not in existing]
+
+            written, unwritten = self._write(entries) if entries else ([], [])
+            if unwritten:
+                # The database failed part way: keep only what is still missing
+                self._spool(unwritten)
+            os.remove(claimed)
+            inserted += len(written)
+            self.replayed += len(written)
+            if unwritten:
+                break
+        return inserted
+
+    # ------------------------------------------------------------------
+    # Background thread and shutdown
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self):
+        # (Re)start after a fork: threads do not survive into child processes
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit log writer flush failed: {e}")
+
+    def close(self, timeout: float = 10.0):
+        """Stop the background thread and write out everything still buffered"""
+        self._stopping = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread() and self._pid == os.getpid():
+            thread.join(timeout)
+        self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            # Last resort: the database is gone, keep the entries on disk
+            logger.error(f"Final audit log flush failed: {e}")
+            with self._lock:
+                entries, self._entries = self._entries, []
+            if entries:
+                self._spool(entries)
+
+    def stats(self) -> Dict:
+        return {
+            'buffered': self.depth,
+            'batch_size': self.batch_size,
+            'flush_interval_seconds': self.flush_interval,
+            'written': self.written,
+            'replayed_from_spool': self.replayed,
+            'spooled': self.spooled,
+            'spool_files': len(self.spool_files()),
+            'dead_lettered': self.dead_lettered,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 2),
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 2),
+            'avg_flush_ms': round(self.total_flush_seconds / self.flushes * 1000, 2) if self.flushes else 0.0,
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+        }
+
+
+def _to_spool(entry: AuditLog) -> Dict:
+    data = {field: getattr(entry, field) for field in SPOOL_FIELDS}
+    data['id'] = str(entry.id)
+    data['timestamp'] = entry.timestamp.isoformat()
+    return data
+
+
+def _from_spool(data: Dict) -> AuditLog:
+    data = dict(data)
+    data['id'] = uuid.UUID(data['id'])
+    data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+    return AuditLog(**data)
+
+
+_audit_writer = None
+
+
+def get_audit_writer() -> AuditLogWriter:
+    """Get the audit log writer singleton (thresholds from AUDIT_* settings)"""
+    global _audit_writer
+    if _audit_writer is None:
+        _audit_writer = AuditLogWriter(
+            batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 100),
+            flush_interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0),
+            max_buffer=getattr(settings, 'AUDIT_MAX_BUFFER', 10000),
+            spool_dir=getattr(settings, 'AUDIT_SPOOL_DIR', None),
+        )
+    return _audit_writer
+
+
+def record_audit(**fields):
+    """Log an audit entry: buffered when AUDIT_BUFFERED, otherwise inserted right away"""
+    if getattr(settings, 'AUDIT_BUFFERED', False):
+        return get_audit_writer().add(**fields)
+    return AuditLog.objects.create(**fields)
+
+
+def shutdown_audit_writer():
+    """Flush the buffered entries (gunicorn worker_exit hook); safe when nothing was buffered"""
+    if _audit_writer is not None:
+        _audit_writer.close()
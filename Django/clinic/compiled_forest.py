@@ -0,0 +1,122 @@
+"""
+Compiled Random Forest Evaluator
+Pure-NumPy evaluation of a forest artifact exported by ML/scripts/export_forest.py
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .symptom_vectors import get_bits
+
+# Must match FORMAT_VERSION in ML/scripts/export_forest.py
+FORMAT_VERSION = 2
+
+ARRAY_NAMES = ('roots', 'feature', 'threshold', 'left', 'right', 'leaf_index', 'leaf_values')
+
+
+class CompiledForest:
+    """
+    Flat array-backed stand-in for RandomForestClassifier
+    Exposes classes_, predict_proba() and predict() so MLPredictor can use it unchanged
+
+    Only the JSON files are read up front. The node arrays are memory-mapped
+    read-only on first use, so every worker process shares the same page-cache pages.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+        with open(self.path / 'metadata.json') as f:
+            self.metadata: Dict = json.load(f)
+        version = self.metadata.get('format_version')
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled forest format {version} (expected {FORMAT_VERSION})")
+
+        with open(self.path / 'feature_names.json') as f:
+            self.feature_names: List[str] = json.load(f)
+        with open(self.path / 'classes.json') as f:
+            self.classes_ = np.array(json.load(f))
+
+        self.model_hash: str = self.metadata['model_hash']
+        self.n_estimators: int = self.metadata['n_estimators']
+        self.max_depth: int = self.metadata['max_depth']
+        self.n_features_in_ = len(self.feature_names)
+
+        self._arrays = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'CompiledForest':
+        return cls(path)
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Node arrays, memory-mapped on first access"""
+        if self._arrays is None:
+            with self._lock:
+                if self._arrays is None:
+                    arrays = {
+                        name: np.load(self.path / f'{name}.npy', mmap_mode='r', allow_pickle=False)
+                        for name in ARRAY_NAMES
+                    }
+                    self._check_shapes(arrays)
+                    self._arrays = arrays
+        return self._arrays
+
+    def _check_shapes(self, arrays: Dict[str, np.ndarray]):
+        expected = {
+            'roots': (self.n_estimators,),
+            'leaf_values': (self.metadata['n_leaves'], len(self.classes_)),
+        }
+        for name in ('feature', 'threshold', 'left', 'right', 'leaf_index'):
+            expected[name] = (self.metadata['n_nodes'],)
+
+        for name, shape in expected.items():
+            if arrays[name].shape != shape:
+                raise ValueError(f"Corrupt forest artifact: {name} has shape {arrays[name].shape}, expected {shape}")
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node id reached in every tree, shape (n_samples, n_estimators)"""
+        # Same comparison as scikit-learn: float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        return self._walk(X.shape[0], lambda rows, features: X[rows, features])
+
+    def apply_packed(self, packed) -> np.ndarray:
+        """Like apply(), reading features straight from bit-packed rows (symptom_vectors)"""
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        return self._walk(packed.shape[0], lambda rows, features: get_bits(packed, rows, features))
+
+    def _walk(self, n_samples: int, read_features) -> np.ndarray:
+        arrays = self.arrays
+        feature, threshold, left, right = (arrays[name] for name in ('feature', 'threshold', 'left', 'right'))
+        rows = np.arange(n_samples)[:, np.newaxis]
+        nodes = np.broadcast_to(arrays['roots'], (n_samples, self.n_estimators))
+
+        # Leaves point to themselves, so walking max_depth steps lands every tree on its leaf
+        for _ in range(self.max_depth):
+            go_left = read_features(rows, feature[nodes]) <= threshold[nodes]
+            nodes = np.where(go_left, left[nodes], right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._average_leaves(self.apply(X))
+
+    def predict_proba_packed(self, packed) -> np.ndarray:
+        return self._average_leaves(self.apply_packed(packed))
+
+    def _average_leaves(self, leaves: np.ndarray) -> np.ndarray:
+        leaf_probs = self.arrays['leaf_values'][self.arrays['leaf_index'][leaves]]
+
+        # Accumulate tree by tree like RandomForestClassifier, then average
+        proba = np.zeros((leaf_probs.shape[0], leaf_probs.shape[2]), dtype=np.float64)
+        for tree in range(self.n_estimators):
+            proba += leaf_probs[:, tree]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,153 @@
+"""
+Department Statistics Refresh
+Recomputes the DepartmentStats cache read by the clinic dashboard
+
+All departments are refreshed with a handful of grouped queries (students,
+30-day symptom counts, pending referrals, top diseases from the daily rollups)
+instead of per-department loops. A full refresh runs on a schedule
+(`python manage.py refresh_department_stats`); each symptom submission
+refreshes its own department right after commit.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CustomUser, DailySymptomRollup, DepartmentStats, SymptomRecord
+
+logger = logging.getLogger(__name__)
+
+WINDOW_DAYS = 30  # Same window as the dashboard "Department Breakdown (Last 30 Days)"
+TOP_DISEASES = 5
+
+
+def refresh_department_stats(departments: Optional[Iterable[str]] = None) -> int:
+    """
+    Recompute DepartmentStats for the given departments (all when None)
+    Departments without students are removed on a full refresh. Returns the rows written.
+    """
+    scope = None if departments is None else {department for department in departments if department}
+    if scope is not None and not scope:
+        return 0
+
+    since = timezone.localdate() - timedelta(days=WINDOW_DAYS)
+    students = CustomUser.objects.filter(role='student').exclude(department='')
+    records = SymptomRecord.objects.exclude(student__department='')
+    rollups = DailySymptomRollup.objects.filter(date__gte=since).exclude(department='')
+    if scope is not None:
+        students = students.filter(department__in=scope)
+        records = records.filter(student__department__in=scope)
+        rollups = rollups.filter(department__in=scope)
+
+    totals = dict(students.values_list('department').annotate(total=Count('id')).order_by())
+
+    symptom_counts = {
+        row['student__department']: row
+        for row in records.filter(created_at__date__gte=since)
+        .values('student__department')
+        .annotate(
+            students=Count('student', distinct=True),
+            communicable=Count('id', filter=Q(is_communicable=True)),
+            non_communicable=Count('id', filter=Q(is_communicable=False)),
+            acute=Count('id', filter=Q(is_acute=True)),
+            chronic=Count('id', filter=Q(is_acute=False)),
+        )
+        .order_by()
+    }
+
+    pending_referrals = dict(
+        records.filter(requires_referral=True, referral_triggered=False)
+        .values_list('student__department')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    top_diseases = defaultdict(list)
+    for row in (
+        rollups.exclude(predicted_disease='')
+        .values('department', 'predicted_disease')
+        .annotate(count=Sum('record_count'))
+        .order_by('department', '-count', 'predicted_disease')
+    ):
+        if len(top_diseases[row['department']]) < TOP_DISEASES:
+            top_diseases[row['department']].append({'disease': row['predicted_disease'], 'count': row['count']})
+
+    now = timezone.now()
+    stats = []
+    for department, total in totals.items():
+        counts = symptom_counts.get(department, {})
+        with_symptoms = counts.get('students', 0)
+        stats.append(DepartmentStats(
+            department=department,
+            total_students=total,
+            students_with_symptoms=with_symptoms,
+            percentage_with_symptoms=round(with_symptoms / total * 100, 1) if total else 0.0,
+            top_diseases=top_diseases.get(department, []),
+            communicable_count=counts.get('communicable', 0),
+            non_communicable_count=counts.get('non_communicable', 0),
+            acute_count=counts.get('acute', 0),
+            chronic_count=counts.get('chronic', 0),
+            referral_pending_count=pending_referrals.get(department, 0),
+            last_updated=now,
+        ))
+
+    with transaction.atomic():
+        stale = DepartmentStats.objects.exclude(department__in=totals)
+        if scope is not None:
+            stale = stale.filter(department__in=scope)
+        stale.delete()
+        # bulk_create skips auto_now, so last_updated is set explicitly above
+        DepartmentStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['department'],
+            update_fields=[
+                'total_students', 'students_with_symptoms', 'percentage_with_symptoms', 'top_diseases',
+                'communicable_count', 'non_communicable_count', 'acute_count', 'chronic_count',
+                'referral_pending_count', 'last_updated',
+            ],
+        )
+    return len(stats)
+
+
+def stats_freshness(stats) -> dict:
+    """Staleness metadata for a list of DepartmentStats rows (oldest row wins)"""
+    max_age = getattr(settings, 'DEPARTMENT_STATS_MAX_AGE', 3600)
+    if not stats:
+        return {'updated_at': None, 'age_seconds': None, 'max_age_seconds': max_age, 'stale': True}
+
+    oldest = min(stat.last_updated for stat in stats)
+    age = (timezone.now() - oldest).total_seconds()
+    return {
+        'updated_at': oldest.isoformat(),
+        'age_seconds': round(age),
+        'max_age_seconds': max_age,
+        'stale': age > max_age,
+    }
+
+
+@receiver(post_save, sender=SymptomRecord, dispatch_uid='department_stats_symptom_record')
+def _symptom_record_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    department = instance.student.department
+    if not department:
+        return
+
+    def refresh():
+        try:
+            refresh_department_stats([department])
+        except Exception as e:
+            # The scheduled full refresh repairs it; never fail the submission itself
+            logger.error(f"Department stats refresh failed for {department}: {e}")
+
+    # After commit, so the new record is visible and a rollback adds nothing
+    transaction.on_commit(refresh)
@@ -0,0 +1,243 @@
+"""
+Asynchronous Report Exports
+Export files written by the background job worker instead of the web request
+
+A request records an ExportJob and queues a 'report_export' BackgroundJob.
+The worker (`python manage.py run_job_worker`) writes the file in chunks to
+MEDIA_ROOT/exports under a temporary .part name, updating the row counters
+(and its job claim) as it goes, then renames it into place. Identical
+requests (same format and filters) within EXPORT_REUSE_WINDOW get the
+existing job and file back. Finished files are served with HTTP Range
+support so interrupted downloads can resume; files older than
+EXPORT_FILE_RETENTION are purged by the worker.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .exports import EXPORT_FORMATS, export_queryset, write_export
+from .job_queue import enqueue, heartbeat
+from .models import BackgroundJob, ExportJob
+
+logger = logging.getLogger(__name__)
+
+REPORT_EXPORT = 'report_export'
+
+EXPORTS_DIR = 'exports'  # Under MEDIA_ROOT
+FILTER_FIELDS = ('start_date', 'end_date', 'department', 'disease')
+PROGRESS_INTERVAL = 1.0  # Seconds between progress/heartbeat updates
+BLOCK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def normalize_filters(params) -> Dict[str, str]:
+    """The export filters present in params, as stripped strings"""
+    filters = {}
+    for field in FILTER_FIELDS:
+        value = params.get(field)
+        if value and str(value).strip():
+            filters[field] = str(value).strip()
+    return filters
+
+
+def export_cache_key(export_format: str, filters: Dict[str, str]) -> str:
+    """Identity of an export request; equal keys produce the same file"""
+    identity = json.dumps({'format': export_format, 'filters': filters}, sort_keys=True)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+def export_path(export: ExportJob) -> str:
+    """Absolute path of a finished export's file"""
+    return os.path.join(settings.MEDIA_ROOT, export.file_name)
+
+
+def find_reusable(export_format: str, filters: Dict[str, str]) -> Optional[ExportJob]:
+    """A recent identical export that is queued, running, or finished with its file still on disk"""
+    window = getattr(settings, 'EXPORT_REUSE_WINDOW', 600)
+    if not window:
+        return None
+
+    candidates = (
+        ExportJob.objects.select_related('job')
+        .filter(
+            cache_key=export_cache_key(export_format, filters),
+            created_at__gte=timezone.now() - timedelta(seconds=window),
+        )
+        .exclude(job__status='failed')
+        .order_by('-created_at')
+    )
+    for export in candidates[:5]:
+        if export.job.status != 'succeeded' or os.path.exists(export_path(export)):
+            return export
+    return None
+
+
+def request_export(user, export_format: str, filters: Dict[str, str]) -> Tuple[ExportJob, bool]:
+    """Reuse a matching recent export or queue a new one; returns (export, reused)"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    export = find_reusable(export_format, filters)
+    if export is not None:
+        return export, True
+
+    export_id = uuid.uuid4()
+    # Both rows commit together, so a worker never claims a job without its export
+    with transaction.atomic():
+        job = enqueue(REPORT_EXPORT, {'export_id': str(export_id)})
+        export = ExportJob.objects.create(
+            id=export_id,
+            job=job,
+            requested_by=user,
+            format=export_format,
+            filters=filters,
+            cache_key=export_cache_key(export_format, filters),
+        )
+    return export, False
+
+
+def run_export(export_id: str) -> Dict:
+    """Write an export's file (job handler body); returns the job result"""
+    export = ExportJob.objects.get(id=export_id)
+    queryset = export_queryset(**export.filters)
+    ExportJob.objects.filter(id=export.id).update(rows_total=queryset.count(), rows_written=0)
+
+    directory = os.path.join(settings.MEDIA_ROOT, EXPORTS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    file_name = f"{EXPORTS_DIR}/{export.id}.{EXPORT_FORMATS[export.format][1]}"
+
+    written = {'rows': 0, 'reported': time.monotonic()}
+
+    def progress(rows):
+        written['rows'] = rows
+        if time.monotonic() - written['reported'] >= PROGRESS_INTERVAL:
+            written['reported'] = time.monotonic()
+            ExportJob.objects.filter(id=export.id).update(rows_written=rows)
+            heartbeat(export.job_id)
+
+    # A unique partial file per attempt; only a complete file is renamed into place
+    fd, partial = tempfile.mkstemp(dir=directory, prefix=f"{export.id}.", suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            write_export(queryset, export.format, output, progress)
+        os.replace(partial, os.path.join(settings.MEDIA_ROOT, file_name))
+    except Exception:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+    file_size = os.path.getsize(os.path.join(settings.MEDIA_ROOT, file_name))
+    ExportJob.objects.filter(id=export.id).update(
+        rows_written=written['rows'], file_name=file_name, file_size=file_size
+    )
+
+    try:
+        purge_expired_exports()
+    except Exception as e:
+        logger.warning(f"Export cleanup failed: {e}")
+
+    return {'export_id': str(export.id), 'rows': written['rows'], 'file_size': file_size}
+
+
+def purge_expired_exports() -> int:
+    """Delete finished exports (files and rows) older than EXPORT_FILE_RETENTION; returns exports removed"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'EXPORT_FILE_RETENTION', 86400))
+    expired = ExportJob.objects.filter(created_at__lt=cutoff, job__status__in=['succeeded', 'failed'])
+
+    job_ids = []
+    for export in expired.only('id', 'job_id', 'file_name'):
+        if export.file_name:
+            try:
+                os.remove(export_path(export))
+            except FileNotFoundError:
+                pass
+        job_ids.append(export.job_id)
+
+    # Deleting the jobs cascades to their exports
+    BackgroundJob.objects.filter(id__in=job_ids).delete()
+    return len(job_ids)
+
+
+# ----------------------------------------------------------------------------
+# Range downloads
+# ----------------------------------------------------------------------------
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte positions of a single "bytes=" range, or None to send the whole file
+    (malformed and multi-range headers are ignored). Raises ValueError when unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+
+    if not first:  # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError('Range starts past the end of the file')
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _read_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def file_range_response(request, path: str, content_type: str, filename: str, etag: str):
+    """
+    Serve a file as an attachment, honouring Range (206 / 416) and If-Range
+    A stale If-Range validator gets the whole file, as RFC 9110 requires
+    """
+    size = os.path.getsize(path)
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+
+    byte_range = None
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
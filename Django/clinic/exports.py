@@ -0,0 +1,432 @@
+"""
+Symptom Record Exports
+Row formatting and file writers behind the staff export endpoint
+
+Records are read as `.values()` rows through `queryset.iterator()`, so no
+model instances are built and the database cursor is consumed in chunks.
+CSV is produced as a generator for StreamingHttpResponse; XLSX goes through
+openpyxl's write-only mode into a temporary file, with column widths worked
+out up front (one aggregate query) instead of re-walking every cell.
+Memory stays flat whatever the row count.
+
+The columnar formats (Parquet, Arrow IPC stream) carry typed columns built
+one record batch at a time, with department, disease, ICD-10 code and the
+symptoms list dictionary-encoded. write_snapshots() lays Parquet files out
+as month=YYYY-MM/department=<name>/ partitions (hive style) for analysis
+tools; pyarrow is optional and only imported by these writers.
+"""
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from django.db.models import Max, QuerySet
+from django.db.models.functions import Length
+
+from .models import SymptomRecord
+
+CHUNK_SIZE = 2000
+ARROW_BATCH_SIZE = 20000  # Rows per record batch / Parquet row group
+MAX_COLUMN_WIDTH = 50
+
+SEVERITY_LABELS = {1: 'Mild', 2: 'Moderate', 3: 'Severe'}
+
+HEADERS = [
+    'Date', 'Time', 'Student ID', 'Student Name', 'Department',
+    'Symptoms', 'Duration (days)', 'Severity', 'Predicted Disease',
+    'Confidence', 'ICD-10 Code', 'Communicable', 'Acute',
+    'Requires Referral'
+]
+
+VALUE_FIELDS = [
+    'created_at', 'student__school_id', 'student__name', 'student__department',
+    'symptoms', 'duration_days', 'severity', 'predicted_disease',
+    'confidence_score', 'icd10_code', 'is_communicable', 'is_acute',
+    'requires_referral',
+]
+
+# Widest value each fixed-format column can hold ('Moderate', '100.0%', ...)
+FIXED_WIDTHS = {
+    'Date': 10, 'Time': 8, 'Duration (days)': 4, 'Severity': 8,
+    'Confidence': 6, 'ICD-10 Code': 10, 'Communicable': 3, 'Acute': 3,
+    'Requires Referral': 3, 'Symptoms': MAX_COLUMN_WIDTH,
+}
+
+# Free-text columns are measured in the database
+MEASURED_FIELDS = {
+    'Student ID': 'student__school_id',
+    'Student Name': 'student__name',
+    'Department': 'student__department',
+    'Predicted Disease': 'predicted_disease',
+}
+
+
+def export_queryset(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                    department: Optional[str] = None, disease: Optional[str] = None) -> QuerySet:
+    """Symptom records matching the export filters, newest first"""
+    queryset = SymptomRecord.objects.all()
+    if start_date:
+        queryset = queryset.filter(created_at__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(created_at__lte=end_date)
+    if department:
+        queryset = queryset.filter(student__department=department)
+    if disease:
+        queryset = queryset.filter(predicted_disease__icontains=disease)
+    return queryset.order_by('-created_at')
+
+
+def format_row(row: Dict) -> List:
+    """One export line from a `.values(*VALUE_FIELDS)` row"""
+    symptoms = row['symptoms']
+    confidence = row['confidence_score']
+    return [
+        row['created_at'].strftime('%Y-%m-%d'),
+        row['created_at'].strftime('%H:%M:%S'),
+        row['student__school_id'],
+        row['student__name'],
+        row['student__department'],
+        ', '.join(str(symptom) for symptom in symptoms) if isinstance(symptoms, list) else '',
+        row['duration_days'],
+        SEVERITY_LABELS.get(row['severity'], 'Unknown'),
+        row['predicted_disease'],
+        f"{confidence:.1%}" if confidence else 'N/A',
+        row['icd10_code'] or 'N/A',
+        'Yes' if row['is_communicable'] else 'No',
+        'Yes' if row['is_acute'] else 'No',
+        'Yes' if row['requires_referral'] else 'No',
+    ]
+
+
+def export_rows(queryset: QuerySet, chunk_size: int = CHUNK_SIZE,
+                progress: Optional[Callable[[int], None]] = None) -> Iterator[List]:
+    """Formatted export lines, fetched chunk_size rows at a time; progress(rows) is called after each chunk"""
+    count = 0
+    for row in queryset.values(*VALUE_FIELDS).iterator(chunk_size=chunk_size):
+        yield format_row(row)
+        count += 1
+        if progress and count % chunk_size == 0:
+            progress(count)
+    if progress:
+        progress(count)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset: QuerySet, chunk_size: int = CHUNK_SIZE, progress=None) -> Iterator[str]:
+    """CSV text line by line, header first"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADERS)
+    for line in export_rows(queryset, chunk_size, progress):
+        yield writer.writerow(line)
+
+
+def column_widths(queryset: QuerySet) -> List[int]:
+    """Excel column widths for the export, from one aggregate over the free-text columns"""
+    longest = queryset.order_by().aggregate(**{
+        field: Max(Length(field)) for field in MEASURED_FIELDS.values()
+    })
+    widths = []
+    for header in HEADERS:
+        content = FIXED_WIDTHS.get(header) or longest.get(MEASURED_FIELDS.get(header)) or 0
+        widths.append(min(max(len(header), content) + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def write_xlsx(queryset: QuerySet, output, chunk_size: int = CHUNK_SIZE, progress=None):
+    """Write the export as .xlsx to a path or binary file; raises ImportError without openpyxl"""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Symptom Records")
+
+    # Widths must be set before the first row in write-only mode
+    for col_num, width in enumerate(column_widths(queryset), 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    header_fill = PatternFill(start_color='006B3F', end_color='006B3F', fill_type='solid')
+    header_font = Font(bold=True, color='FFFFFF')
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    header_row = []
+    for header in HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_row.append(cell)
+    ws.append(header_row)
+
+    for line in export_rows(queryset, chunk_size, progress):
+        ws.append(line)
+
+    wb.save(output)
+
+
+def xlsx_file(queryset: QuerySet):
+    """The Excel export in a rewound temporary file; the caller owns (and closes) it"""
+    import openpyxl  # noqa: F401  (fail before creating the file)
+
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        write_xlsx(queryset, output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+# ----------------------------------------------------------------------------
+# Columnar formats (Parquet / Arrow)
+# ----------------------------------------------------------------------------
+
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+ARROW_STREAM_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+
+# (column, values() field); students are identified by school ID only
+COLUMNAR_FIELDS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('student_id', 'student__school_id'),
+    ('department', 'student__department'),
+    ('symptoms', 'symptoms'),
+    ('duration_days', 'duration_days'),
+    ('severity', 'severity'),
+    ('predicted_disease', 'predicted_disease'),
+    ('confidence_score', 'confidence_score'),
+    ('icd10_code', 'icd10_code'),
+    ('is_communicable', 'is_communicable'),
+    ('is_acute', 'is_acute'),
+    ('requires_referral', 'requires_referral'),
+]
+
+SNAPSHOT_FILE = 'part-0.parquet'
+EMPTY_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def arrow_schema(exclude: tuple = ()):
+    """Arrow schema of the columnar export; raises ImportError without pyarrow"""
+    import pyarrow as pa
+
+    label = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        'id': pa.string(),
+        'created_at': pa.timestamp('us', tz='UTC'),
+        'student_id': pa.string(),
+        'department': label,
+        'symptoms': pa.list_(label),
+        'duration_days': pa.int32(),
+        'severity': pa.int8(),
+        'predicted_disease': label,
+        'confidence_score': pa.float64(),
+        'icd10_code': label,
+        'is_communicable': pa.bool_(),
+        'is_acute': pa.bool_(),
+        'requires_referral': pa.bool_(),
+    }
+    return pa.schema([(column, types[column]) for column, _ in COLUMNAR_FIELDS if column not in exclude])
+
+
+def _record_batch(columns: Dict[str, list], schema):
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        elif pa.types.is_list(field.type):
+            arrays.append(pa.array(values, type=pa.list_(pa.string())).cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def record_batches(queryset: QuerySet, schema, batch_size: int = ARROW_BATCH_SIZE,
+                   chunk_size: int = CHUNK_SIZE, progress: Optional[Callable[[int], None]] = None) -> Iterator:
+    """
+    Arrow record batches of at most batch_size rows, read through a chunked values() iterator
+    progress(rows) is called after each batch
+    """
+    wanted = [(column, field) for column, field in COLUMNAR_FIELDS if column in schema.names]
+    rows = queryset.values_list(*(field for _, field in wanted)).iterator(chunk_size=chunk_size)
+
+    columns = {column: [] for column, _ in wanted}
+    count = 0
+    done = 0
+    for row in rows:
+        for (column, _), value in zip(wanted, row):
+            if column == 'id':
+                value = str(value)
+            elif column == 'symptoms':
+                value = [str(symptom) for symptom in value] if isinstance(value, list) else []
+            columns[column].append(value)
+        count += 1
+        if count == batch_size:
+            yield _record_batch(columns, schema)
+            done += count
+            if progress:
+                progress(done)
+            columns = {column: [] for column, _ in wanted}
+            count = 0
+    if count:
+        yield _record_batch(columns, schema)
+        done += count
+    if progress:
+        progress(done)
+
+
+def write_parquet(queryset: QuerySet, output, exclude: tuple = (), progress=None) -> int:
+    """Write the export as Parquet (one row group per batch) to a path or binary file; returns rows written"""
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(exclude)
+    rows = 0
+    with pq.ParquetWriter(output, schema, compression='zstd') as writer:
+        for batch in record_batches(queryset, schema, progress=progress):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def parquet_file(queryset: QuerySet):
+    """The Parquet export in a rewound temporary file (the footer needs the whole file); caller closes it"""
+    import pyarrow  # noqa: F401  (fail before creating the file)
+
+    output = tempfile.TemporaryFile(suffix='.parquet')
+    try:
+        write_parquet(queryset, output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def stream_arrow(queryset: QuerySet, progress=None) -> Iterator[bytes]:
+    """
+    Arrow IPC stream bytes, one record batch at a time
+    The stream format (unlike the IPC file format) lets each batch carry its own dictionaries
+    """
+    import pyarrow.ipc as ipc
+
+    schema = arrow_schema()
+    sink = io.BytesIO()
+    writer = ipc.new_stream(sink, schema)
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    for batch in record_batches(queryset, schema, progress=progress):
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'excel': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': (PARQUET_CONTENT_TYPE, 'parquet'),
+    'arrow': (ARROW_STREAM_CONTENT_TYPE, 'arrows'),
+}
+
+
+def write_export(queryset: QuerySet, export_format: str, output, progress=None):
+    """Write the export in any EXPORT_FORMATS format to a binary file"""
+    if export_format == 'csv':
+        for line in stream_csv(queryset, progress=progress):
+            output.write(line.encode('utf-8'))
+    elif export_format == 'excel':
+        write_xlsx(queryset, output, progress=progress)
+    elif export_format == 'parquet':
+        write_parquet(queryset, output, progress=progress)
+    elif export_format == 'arrow':
+        for data in stream_arrow(queryset, progress=progress):
+            output.write(data)
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+
+def _month_bounds(month: date):
+    following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return month, following
+
+
+def partition_name(department: str) -> str:
+    """Hive partition directory for a department (URI-encoded, as pyarrow datasets expect)"""
+    return f"department={quote(department, safe='') if department else EMPTY_PARTITION}"
+
+
+def write_month_snapshot(root: str, month: date) -> Dict[str, int]:
+    """
+    Rewrite the month=YYYY-MM partition under root: one Parquet file per department
+    The month is built in a hidden staging directory (dataset readers skip dot-prefixed
+    entries); the old partition is then renamed aside and the new one renamed in. Readers
+    see the complete old or new month, never a half-written one, though a scan landing
+    between the two renames can miss the month. Returns rows written per department.
+    """
+    start, end = _month_bounds(month.replace(day=1))
+    name = f"month={start:%Y-%m}"
+    month_dir = os.path.join(root, name)
+    staging = os.path.join(root, f".{name}.tmp")
+    retired = os.path.join(root, f".{name}.old")
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(retired, ignore_errors=True)
+
+    records = SymptomRecord.objects.filter(created_at__date__gte=start, created_at__date__lt=end)
+    departments = (
+        records.order_by('student__department')
+        .values_list('student__department', flat=True)
+        .distinct()
+    )
+
+    written = {}
+    try:
+        for department in departments:
+            directory = os.path.join(staging, partition_name(department))
+            os.makedirs(directory)
+            # The department lives in the partition path, not in the file
+            written[department] = write_parquet(
+                records.filter(student__department=department).order_by('created_at'),
+                os.path.join(directory, SNAPSHOT_FILE),
+                exclude=('department',),
+            )
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if os.path.exists(month_dir):
+        os.rename(month_dir, retired)
+    if written:
+        os.rename(staging, month_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+    return written
+
+
+def write_snapshots(root: str, start_month: date, end_month: date) -> Dict[str, Dict[str, int]]:
+    """Snapshot every month from start_month through end_month; returns rows per month and department"""
+    os.makedirs(root, exist_ok=True)
+    month = start_month.replace(day=1)
+    results = {}
+    while month <= end_month:
+        results[f"{month:%Y-%m}"] = write_month_snapshot(root, month)
+        month = _month_bounds(month)[1]
+    return results
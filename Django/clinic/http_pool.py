@@ -0,0 +1,119 @@
+"""
+Pooled HTTP Sessions
+Shared keep-alive requests sessions for Rasa and the LLM HTTP APIs
+
+One session per service (rasa, openrouter, ...) reuses TCP/TLS connections
+across requests instead of a fresh handshake per call. Each session has its
+own per-host pool size, a default (connect, read) timeout and a retry policy:
+connection failures are retried with backoff for every method (nothing was
+sent yet), 502/503/504 only for idempotent methods.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with connection pooling, retries and a default (connect, read) timeout
+    An explicit timeout= on a call still wins over the default
+    """
+
+    def __init__(self, name: str, pool_maxsize: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 30, retries: int = 2, backoff_factor: float = 0.3):
+        super().__init__()
+        self.name = name
+        self.pool_maxsize = pool_maxsize
+        self.default_timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # A read error means the server may have acted on the request
+            status=retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount('http://', self.adapter)
+        self.mount('https://', self.adapter)
+
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.errors = 0
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        try:
+            return super().request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.requests_sent += 1
+
+    def stats(self) -> Dict:
+        """Request/error counts plus connections opened, requests served and idle connections per host"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:  # Evicted since keys() was taken
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': pool.pool.qsize() if pool.pool is not None else 0,
+            }
+
+        with self._lock:
+            return {
+                'requests': self.requests_sent,
+                'errors': self.errors,
+                'pool_maxsize': self.pool_maxsize,
+                'timeout': {'connect': self.default_timeout[0], 'read': self.default_timeout[1]},
+                'hosts': hosts,
+            }
+
+
+_sessions: Dict[str, PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(name: str, read_timeout: Optional[float] = None) -> PooledSession:
+    """
+    Get the shared session for a service (created on first use, sized from HTTP_POOL_* settings)
+    read_timeout only applies when the session is created
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = PooledSession(
+                    name,
+                    pool_maxsize=getattr(settings, 'HTTP_POOL_MAXSIZE', 10),
+                    connect_timeout=getattr(settings, 'HTTP_CONNECT_TIMEOUT', 3.05),
+                    read_timeout=read_timeout or 30,
+                    retries=getattr(settings, 'HTTP_RETRIES', 2),
+                    backoff_factor=getattr(settings, 'HTTP_RETRY_BACKOFF', 0.3),
+                )
+    return session
+
+
+def http_pool_stats() -> Dict[str, Dict]:
+    """Stats of every session created so far, keyed by service name"""
+    return {name: session.stats() for name, session in list(_sessions.items())}
@@ -0,0 +1,318 @@
+"""
+Local ML Inference Sidecar
+Holds one copy of the disease model and serves every gunicorn worker over a Unix socket
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A queued prediction request waiting for its micro-batch to be scored"""
+
+    __slots__ = ('symptom_lists', 'enqueued_at', 'done', 'results', 'error')
+
+    def __init__(self, symptom_lists: List[List[str]]):
+        self.symptom_lists = symptom_lists
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests and scores them together
+    in a single predict_batch() call on the wrapped predictor.
+    """
+
+    def __init__(self, predictor, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=1000)
+        self._requests_total = 0
+        self._rows_total = 0
+        self._batches_total = 0
+        self._errors_total = 0
+
+        self._thread = threading.Thread(target=self._run, name='ml-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, symptom_lists: List[List[str]], timeout: float = 30.0) -> List[Dict]:
+        """Queue symptom lists for scoring and block until the batch containing them completes"""
+        pending = _PendingRequest(symptom_lists)
+        self._queue.put(pending)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"Inference timed out after {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0].symptom_lists)
+            deadline = time.monotonic() + self.max_wait
+
+            # Keep collecting until the batch is full or the wait window closes
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                rows += len(pending.symptom_lists)
+
+            self._score(batch)
+
+    def _score(self, batch: List[_PendingRequest]):
+        symptom_lists = [symptoms for pending in batch for symptoms in pending.symptom_lists]
+
+        try:
+            results = self.predictor.predict_batch(symptom_lists)
+        except Exception as e:
+            logger.error(f"Inference batch failed: {e}")
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            with self._lock:
+                self._errors_total += len(batch)
+            return
+
+        finished_at = time.monotonic()
+        offset = 0
+        with self._lock:
+            self._batches_total += 1
+            self._rows_total += len(symptom_lists)
+            self._requests_total += len(batch)
+            for pending in batch:
+                count = len(pending.symptom_lists)
+                pending.results = results[offset:offset + count]
+                offset += count
+                self._latencies_ms.append((finished_at - pending.enqueued_at) * 1000)
+
+        for pending in batch:
+            pending.done.set()
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput counters and latency percentiles (milliseconds)"""
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            batches = self._batches_total
+            stats = {
+                'queue_depth': self._queue.qsize(),
+                'requests_total': self._requests_total,
+                'rows_total': self._rows_total,
+                'batches_total': batches,
+                'errors_total': self._errors_total,
+                'avg_batch_size': round(self._rows_total / batches, 2) if batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+        if latencies:
+            stats['latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2], 3),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                'max': round(latencies[-1], 3),
+            }
+        else:
+            stats['latency_ms'] = {'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        return stats
+
+
+class _InferenceRequestHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON protocol: one request object per line, one response per line"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = {'ok': True, 'result': self.server.dispatch(request)}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix-socket inference server
+    One thread per worker connection; all scoring goes through the shared MicroBatcher
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, predictor, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.socket_path = str(socket_path)
+        self.predictor = predictor
+        self.batcher = MicroBatcher(predictor, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+        # Remove a stale socket left behind by a previous run
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        super().__init__(self.socket_path, _InferenceRequestHandler)
+        os.chmod(self.socket_path, 0o660)
+
+    def dispatch(self, request: Dict):
+        op = request.get('op')
+
+        if op == 'predict':
+            return self.batcher.submit([request.get('symptoms', [])])[0]
+        if op == 'predict_batch':
+            return self.batcher.submit(request.get('symptom_lists', []))
+        if op == 'symptoms':
+            return self.predictor.get_available_symptoms()
+        if op == 'stats':
+            stats = self.batcher.stats()
+            if hasattr(self.predictor, 'cache_stats'):
+                stats['prediction_cache'] = self.predictor.cache_stats()
+            return stats
+        if op == 'ping':
+            return 'pong'
+
+        raise ValueError(f"Unknown op: {op}")
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class InferenceClient:
+    """
+    Drop-in replacement for MLPredictor that forwards calls to the inference sidecar
+    Keeps one persistent connection per process and reconnects once on failure
+
+    With a fallback factory, a sidecar that cannot be reached (or answers with an error) is
+    skipped for retry_seconds and predictions are served by an in-process predictor, built
+    from the factory on first use; the sidecar is tried again once the back-off has passed.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0, fallback: Optional[Callable] = None,
+                 retry_seconds: float = 30.0):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self.fallback = fallback
+        self.retry_seconds = retry_seconds
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._feature_names = None
+        self._local = None
+        self._local_lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._sock = sock
+        self._file = sock.makefile('rwb')
+
+    def _close(self):
+        for resource in (self._file, self._sock):
+            try:
+                if resource is not None:
+                    resource.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._file = None
+
+    def _call(self, payload: Dict):
+        data = json.dumps(payload).encode('utf-8') + b'\n'
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._file is None:
+                        self._connect()
+                    self._file.write(data)
+                    self._file.flush()
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("Inference server closed the connection")
+                    break
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt == 1:
+                        raise
+
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(f"Inference server error: {response.get('error')}")
+        return response['result']
+
+    def _local_predictor(self):
+        with self._local_lock:
+            if self._local is None:
+                self._local = self.fallback()
+            return self._local
+
+    def _call_or_fallback(self, payload: Dict, method: str, *args):
+        """Send to the sidecar, or to the in-process predictor while the sidecar is backed off"""
+        if self.fallback is None:
+            return self._call(payload)
+
+        if time.monotonic() >= self._down_until:
+            try:
+                return self._call(payload)
+            except (OSError, RuntimeError) as e:
+                self._down_until = time.monotonic() + self.retry_seconds
+                logger.warning(f"ML inference server failed ({e}), using in-process model for {self.retry_seconds}s")
+
+        return getattr(self._local_predictor(), method)(*args)
+
+    def predict(self, symptoms: List[str]) -> Dict:
+        """Predict disease from symptoms (scored by the sidecar)"""
+        return self._call_or_fallback({'op': 'predict', 'symptoms': list(symptoms)}, 'predict', symptoms)
+
+    def predict_batch(self, symptom_lists: List[List[str]]) -> List[Dict]:
+        """Predict diseases for many symptom lists (scored by the sidecar)"""
+        payload = {'op': 'predict_batch', 'symptom_lists': [list(s) for s in symptom_lists]}
+        return self._call_or_fallback(payload, 'predict_batch', symptom_lists)
+
+    def get_available_symptoms(self) -> List[str]:
+        """Get list of all available symptoms the model can recognize"""
+        if self._feature_names is None:
+            self._feature_names = self._call_or_fallback({'op': 'symptoms'}, 'get_available_symptoms')
+        return self._feature_names
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.get_available_symptoms()
+
+    def stats(self) -> Dict:
+        """Queue depth and latency statistics reported by the sidecar"""
+        return self._call({'op': 'stats'})
+
+    def ping(self) -> bool:
+        try:
+            return self._call({'op': 'ping'}) == 'pong'
+        except Exception:
+            return False
+
+    def is_model_loaded(self) -> bool:
+        return self.ping() or (self._local is not None and self._local.is_model_loaded())
@@ -0,0 +1,164 @@
+"""
+Database-Backed Job Queue
+Runs slow work (LLM validation, insight generation) outside the HTTP request
+
+Jobs live in the BackgroundJob table. Workers claim a job with a conditional
+UPDATE, which works on SQLite and PostgreSQL alike: only the worker whose UPDATE
+matched the row owns the job. A claim lasts for the visibility timeout; if the
+worker dies, the job becomes claimable again. Failed jobs are retried with
+exponential backoff until max_attempts.
+"""
+
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(payload) returning a JSON-serializable result
+JOB_HANDLERS: Dict[str, Callable[[Dict], Dict]] = {}
+
+
+def register(kind: str):
+    """Decorator registering a job handler under a kind name"""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind: str, payload: Dict, max_attempts: Optional[int] = None, delay_seconds: float = 0) -> BackgroundJob:
+    """Create a pending job (handlers must be registered in the worker process)"""
+    return BackgroundJob.objects.create(
+        kind=kind,
+        payload=payload,
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 3),
+        run_after=timezone.now() + timedelta(seconds=delay_seconds),
+    )
+
+
+def heartbeat(job_id, seconds: Optional[float] = None) -> bool:
+    """
+    Push back the claim expiry of a running job; long handlers call this as they
+    make progress so no other worker reclaims the job mid-run
+    """
+    seconds = seconds or getattr(settings, 'JOB_VISIBILITY_TIMEOUT', 120)
+    return bool(BackgroundJob.objects.filter(id=job_id, status='running').update(
+        locked_until=timezone.now() + timedelta(seconds=seconds)
+    ))
+
+
+def _claimable(now):
+    # Pending and due, or running with an expired claim (worker crashed or hung)
+    return (
+        Q(status='pending', run_after__lte=now)
+        | Q(status='running', locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+
+
+class JobWorker:
+    """Claims and runs jobs one at a time"""
+
+    def __init__(self, worker_id: Optional[str] = None, visibility_timeout: float = None,
+                 retry_delay: float = None, poll_interval: float = 1.0):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = visibility_timeout or getattr(settings, 'JOB_VISIBILITY_TIMEOUT', 120)
+        self.retry_delay = retry_delay if retry_delay is not None else getattr(settings, 'JOB_RETRY_DELAY', 10)
+        self.poll_interval = poll_interval
+        self._stopping = False
+
+    def claim(self) -> Optional[BackgroundJob]:
+        """Claim the oldest runnable job, or return None when the queue is empty"""
+        now = timezone.now()
+        candidates = (
+            BackgroundJob.objects.filter(_claimable(now))
+            .order_by('run_after', 'created_at')
+            .values_list('id', flat=True)[:10]
+        )
+        for job_id in candidates:
+            claimed = BackgroundJob.objects.filter(_claimable(now), id=job_id).update(
+                status='running',
+                attempts=F('attempts') + 1,
+                locked_by=self.worker_id,
+                locked_until=now + timedelta(seconds=self.visibility_timeout),
+            )
+            if claimed:
+                return BackgroundJob.objects.get(id=job_id)
+        return None
+
+    def _finish(self, job: BackgroundJob, **fields) -> bool:
+        # Only the current claim holder may record the outcome
+        fields.setdefault('locked_until', None)
+        updated = BackgroundJob.objects.filter(
+            id=job.id, status='running', locked_by=self.worker_id
+        ).update(updated_at=timezone.now(), **fields)
+        if not updated:
+            logger.warning(f"Job {job.id} was reclaimed by another worker, dropping this result")
+        return bool(updated)
+
+    def run_job(self, job: BackgroundJob) -> bool:
+        """Run one claimed job and record success, a retry or the final failure"""
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            error = f"No handler registered for job kind '{job.kind}'"
+            logger.error(error)
+            self._finish(job, status='failed', last_error=error, finished_at=timezone.now())
+            return False
+
+        started = time.monotonic()
+        try:
+            result = handler(job.payload)
+        except Exception as e:
+            logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts}/{job.max_attempts} failed: {e}")
+            if job.attempts >= job.max_attempts:
+                self._finish(job, status='failed', last_error=str(e), finished_at=timezone.now())
+            else:
+                backoff = self.retry_delay * 2 ** (job.attempts - 1)
+                self._finish(
+                    job, status='pending', last_error=str(e),
+                    run_after=timezone.now() + timedelta(seconds=backoff),
+                )
+            return False
+
+        logger.info(f"Job {job.id} ({job.kind}) finished in {time.monotonic() - started:.2f}s")
+        return self._finish(job, status='succeeded', result=result, last_error='', finished_at=timezone.now())
+
+    def fail_exhausted(self) -> int:
+        """Mark jobs whose claim expired on their last attempt as failed (not retried again)"""
+        return BackgroundJob.objects.filter(
+            status='running', locked_until__lt=timezone.now(), attempts__gte=F('max_attempts')
+        ).update(
+            status='failed', locked_until=None, finished_at=timezone.now(),
+            last_error='Visibility timeout expired on the last attempt'
+        )
+
+    def run_once(self) -> int:
+        """Drain the queue once; returns the number of jobs run"""
+        self.fail_exhausted()
+        count = 0
+        while not self._stopping:
+            job = self.claim()
+            if job is None:
+                break
+            self.run_job(job)
+            count += 1
+        return count
+
+    def run_forever(self):
+        while not self._stopping:
+            close_old_connections()
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+    def stop(self):
+        self._stopping = True
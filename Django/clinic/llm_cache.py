@@ -0,0 +1,166 @@
+"""
+LLM Response Cache
+In-process cache for LLM answers keyed on normalized prompt inputs,
+with an optional character n-gram similarity lookup for near-identical chat messages
+"""
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, Optional
+
+from django.conf import settings
+
+RE_NON_WORD = re.compile(r'[^\w\s]')
+RE_WHITESPACE = re.compile(r'\s+')
+
+NGRAM_SIZE = 3
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace ("I have Fever!!" == "i have fever")"""
+    return RE_WHITESPACE.sub(' ', RE_NON_WORD.sub(' ', (text or '').lower())).strip()
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> FrozenSet[str]:
+    """Character n-grams of normalized text, padded so short words still contribute"""
+    padded = f' {text} '
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Namespace:
+    """LRU entries and counters for one prompt type"""
+
+    __slots__ = ('entries', 'hits', 'similar_hits', 'misses', 'evictions')
+
+    def __init__(self):
+        # key -> (expires_at, value, ngrams or None)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class LLMResponseCache:
+    """
+    Thread-safe LRU cache of LLM responses with size and TTL bounds per namespace
+    ('chat', 'insights', 'validation', ...)
+
+    Lookups try the exact normalized key first. When a text is given and
+    similarity_threshold > 0, the freshest entry whose trigram Jaccard similarity
+    reaches the threshold is returned instead of a miss.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600, similarity_threshold: float = 0.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+
+    def _namespace(self, namespace: str) -> _Namespace:
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            ns = self._namespaces[namespace] = _Namespace()
+        return ns
+
+    def get(self, namespace: str, key: Hashable, text: Optional[str] = None) -> Optional[Any]:
+        """Return a copy of the cached response or None (counts a hit, similar hit or miss)"""
+        now = time.monotonic()
+        with self._lock:
+            ns = self._namespace(namespace)
+            entry = ns.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    ns.entries.move_to_end(key)
+                    ns.hits += 1
+                    return copy.deepcopy(entry[1])
+                del ns.entries[key]
+
+            if text is not None and self.similarity_threshold > 0:
+                match = self._most_similar(ns, ngrams(normalize_text(text)), now)
+                if match is not None:
+                    ns.entries.move_to_end(match)
+                    ns.similar_hits += 1
+                    return copy.deepcopy(ns.entries[match][1])
+
+            ns.misses += 1
+            return None
+
+    def _most_similar(self, ns: _Namespace, grams: FrozenSet[str], now: float) -> Optional[Hashable]:
+        best_key, best_score = None, self.similarity_threshold
+        # Newest first, so ties go to the most recently used answer
+        for key in reversed(ns.entries):
+            expires_at, _, entry_grams = ns.entries[key]
+            if expires_at <= now or entry_grams is None:
+                continue
+            score = jaccard(grams, entry_grams)
+            if score >= best_score and (best_key is None or score > best_score):
+                best_key, best_score = key, score
+        return best_key
+
+    def set(self, namespace: str, key: Hashable, value: Any, text: Optional[str] = None):
+        """Store a response, evicting the least recently used entries of the namespace beyond max_size"""
+        if self.max_size <= 0:
+            return
+        grams = ngrams(normalize_text(text)) if text is not None else None
+        with self._lock:
+            ns = self._namespace(namespace)
+            ns.entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value), grams)
+            ns.entries.move_to_end(key)
+            while len(ns.entries) > self.max_size:
+                ns.entries.popitem(last=False)
+                ns.evictions += 1
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(namespace, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            namespaces = {}
+            for name, ns in self._namespaces.items():
+                lookups = ns.hits + ns.similar_hits + ns.misses
+                namespaces[name] = {
+                    'size': len(ns.entries),
+                    'hits': ns.hits,
+                    'similar_hits': ns.similar_hits,
+                    'misses': ns.misses,
+                    'evictions': ns.evictions,
+                    'hit_rate': round((ns.hits + ns.similar_hits) / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'similarity_threshold': self.similarity_threshold,
+                'namespaces': namespaces,
+            }
+
+
+_response_cache = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Get LLM response cache singleton (bounds from LLM_RESPONSE_CACHE_* settings)"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache(
+            max_size=getattr(settings, 'LLM_RESPONSE_CACHE_SIZE', 512),
+            ttl_seconds=getattr(settings, 'LLM_RESPONSE_CACHE_TTL', 3600),
+            similarity_threshold=getattr(settings, 'LLM_RESPONSE_CACHE_SIMILARITY', 0.0),
+        )
+    return _response_cache
@@ -0,0 +1,191 @@
+"""
+LLM Provider Health Tracking
+Per-provider circuit breakers and health scores, shared across gunicorn workers via the Django cache
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .llm_providers import ProviderCall
+
+logger = logging.getLogger(__name__)
+
+# Providers shown on health_check / the admin monitoring page
+PROVIDERS = ('groq', 'openrouter', 'cohere', 'gemini')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_rate_limited(error: Optional[Exception]) -> bool:
+    """Spot HTTP 429 across the different SDK exception types"""
+    if error is None:
+        return False
+    for attr in ('status_code', 'code', 'http_status'):
+        if getattr(error, attr, None) == 429:
+            return True
+    text = str(error).lower()
+    return '429' in text or 'rate limit' in text or 'too many requests' in text
+
+
+class ProviderHealthRegistry:
+    """
+    Tracks recent outcomes per provider and decides which providers to call, in which order
+
+    - A circuit opens for cooldown_seconds on any 429, or when the error rate over the
+      window reaches error_rate_threshold (after min_requests calls)
+    - After the cool-down one worker gets a half-open trial call; success closes the circuit
+    - Open circuits are skipped; the rest are ordered by health score, then by configured priority.
+      Half-open providers stay in the order; the trial slot is claimed (allow) only when the
+      call is actually about to be made
+
+    State is read-modify-written in the cache without locking, so counts are best-effort
+    when workers record at the same moment.
+    """
+
+    KEY_PREFIX = 'llm_health'
+
+    def __init__(self, window_seconds: float = 300, max_events: int = 50, min_requests: int = 5,
+                 error_rate_threshold: float = 0.5, cooldown_seconds: float = 60,
+                 slow_latency_ms: float = 30000):
+        self.window_seconds = window_seconds
+        self.max_events = max_events
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.slow_latency_ms = slow_latency_ms
+
+    def _key(self, provider: str) -> str:
+        return f'{self.KEY_PREFIX}:{provider}'
+
+    def _load(self, provider: str, now: float) -> Dict:
+        state = cache.get(self._key(provider)) or {'events': [], 'opened_until': 0.0, 'opens': 0}
+        # Events are [timestamp, ok, latency_ms, rate_limited]
+        state['events'] = [e for e in state['events'] if e[0] >= now - self.window_seconds]
+        return state
+
+    def _save(self, provider: str, state: Dict):
+        cache.set(self._key(provider), state, timeout=int(self.window_seconds + self.cooldown_seconds) * 2)
+
+    def record(self, provider: str, ok: bool, latency_ms: float, error: Optional[Exception] = None):
+        """Record one finished call and open/close the circuit as needed"""
+        now = time.time()
+        state = self._load(provider, now)
+        rate_limited = is_rate_limited(error)
+
+        state['events'].append([now, ok, round(latency_ms, 1), rate_limited])
+        state['events'] = state['events'][-self.max_events:]
+        trial = bool(state['opened_until'])
+
+        if ok:
+            if state['opened_until']:
+                # Half-open trial succeeded: start over with a clean window
+                logger.info(f"LLM provider {provider} recovered, closing circuit")
+                state['opened_until'] = 0.0
+                state['events'] = [state['events'][-1]]
+        else:
+            failures = sum(1 for e in state['events'] if not e[1])
+            total = len(state['events'])
+            if (rate_limited or state['opened_until']
+                    or (total >= self.min_requests and failures / total >= self.error_rate_threshold)):
+                reason = 'rate limited' if rate_limited else f'{failures}/{total} failures'
+                logger.warning(f"Opening circuit for LLM provider {provider} ({reason}) for {self.cooldown_seconds}s")
+                state['opened_until'] = now + self.cooldown_seconds
+                state['opens'] += 1
+
+        self._save(provider, state)
+        if trial:
+            # The half-open trial is over (closed or re-opened); free its slot for the next one
+            cache.delete(f'{self._key(provider)}:probe')
+
+    def record_outcome(self, call: ProviderCall, ok: bool, elapsed: float, error: Optional[Exception]):
+        """on_outcome callback for race_providers()"""
+        self.record(call.key, ok, elapsed * 1000, error)
+
+    def _circuit(self, state: Dict, now: float) -> str:
+        if not state['opened_until']:
+            return CLOSED
+        return OPEN if state['opened_until'] > now else HALF_OPEN
+
+    def allow(self, provider: str) -> bool:
+        """Whether a call to this provider should be made now (claims the half-open trial slot)"""
+        now = time.time()
+        circuit = self._circuit(self._load(provider, now), now)
+        if circuit == CLOSED:
+            return True
+        if circuit == OPEN:
+            return False
+        # Half-open: only the worker that claims the probe slot gets a trial call
+        return cache.add(f'{self._key(provider)}:probe', 1, timeout=int(self.cooldown_seconds))
+
+    def admit(self, call: ProviderCall) -> bool:
+        """admit callback for race_providers()"""
+        return self.allow(call.key)
+
+    def order(self, calls: List[ProviderCall]) -> List[ProviderCall]:
+        """
+        Drop providers with an open circuit and sort the rest by health (priority breaks ties)
+        Nothing is claimed here: most ordered providers are never called
+        """
+        now = time.time()
+        allowed = [
+            (index, call) for index, call in enumerate(calls)
+            if self._circuit(self._load(call.key, now), now) != OPEN
+        ]
+        scores = {call.key: self.stats(call.key)['score'] for _, call in allowed}
+        allowed.sort(key=lambda item: (-round(scores[item[1].key], 1), item[0]))
+        return [call for _, call in allowed]
+
+    def stats(self, provider: str) -> Dict:
+        """Rolling error rate, latency percentiles, 429 count, circuit state and health score"""
+        now = time.time()
+        state = self._load(provider, now)
+        events = state['events']
+        latencies = sorted(e[2] for e in events)
+        failures = sum(1 for e in events if not e[1])
+
+        error_rate = failures / len(events) if events else 0.0
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+
+        # 1.0 = always succeeds quickly; slow p95 costs up to half the score
+        score = (1 - error_rate) * (1 - 0.5 * min(p95 / self.slow_latency_ms, 1.0))
+
+        return {
+            'state': self._circuit(state, now),
+            'requests': len(events),
+            'error_rate': round(error_rate, 3),
+            'rate_limited': sum(1 for e in events if e[3]),
+            'latency_p50_ms': p50,
+            'latency_p95_ms': p95,
+            'score': round(score, 3),
+            'open_until': state['opened_until'] or None,
+            'times_opened': state['opens'],
+        }
+
+    def snapshot(self, providers=PROVIDERS) -> Dict[str, Dict]:
+        return {provider: self.stats(provider) for provider in providers}
+
+    def reset(self, provider: str):
+        cache.delete_many([self._key(provider), f'{self._key(provider)}:probe'])
+
+
+_provider_health = None
+
+
+def get_provider_health() -> ProviderHealthRegistry:
+    """Get provider health registry singleton (thresholds from LLM_BREAKER_* settings)"""
+    global _provider_health
+    if _provider_health is None:
+        _provider_health = ProviderHealthRegistry(
+            window_seconds=getattr(settings, 'LLM_BREAKER_WINDOW', 300),
+            min_requests=getattr(settings, 'LLM_BREAKER_MIN_REQUESTS', 5),
+            error_rate_threshold=getattr(settings, 'LLM_BREAKER_ERROR_RATE', 0.5),
+            cooldown_seconds=getattr(settings, 'LLM_BREAKER_COOLDOWN', 60),
+        )
+    return _provider_health
@@ -0,0 +1,148 @@
+"""
+Async LLM Provider Racing
+Runs an ordered list of provider calls either as a plain fallback chain or hedged:
+if the current provider hasn't answered after a delay, the next one is started too
+and the first valid answer wins.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Blocking SDK calls run here rather than on the loop's default executor, which the loop
+# joins on shutdown: a losing call must not hold up the winner's response
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='llm-provider')
+
+
+class AllProvidersFailed(Exception):
+    """No provider produced a valid answer"""
+
+
+class ProviderHTTPError(Exception):
+    """Non-200 response from a provider's HTTP API (status_code lets the breaker spot 429s)"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class ProviderCall:
+    """
+    One provider attempt: call() returns the raw text, parse() turns it into the result
+    parse() raising (bad JSON, empty text, ...) counts as a failure, so the next provider is tried
+    key identifies the provider for health tracking (several calls can share one provider)
+    """
+
+    __slots__ = ('name', 'call', 'parse', 'key')
+
+    def __init__(self, name: str, call: Callable, parse: Optional[Callable[[str], Any]] = None,
+                 key: Optional[str] = None):
+        self.name = name
+        self.call = call
+        self.parse = parse
+        self.key = key or name
+
+    async def run(self, on_outcome: Optional[Callable] = None) -> Any:
+        started = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(self.call):
+                text = await self.call()
+            else:
+                # SDK clients are blocking; a cancelled call finishes in the background
+                # (bounded by the client timeout) without being waited for
+                text = await asyncio.get_running_loop().run_in_executor(_EXECUTOR, self.call)
+            result = self.parse(text) if self.parse else text
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _report(on_outcome, self, False, time.monotonic() - started, e)
+            raise
+        _report(on_outcome, self, True, time.monotonic() - started, None)
+        return result
+
+
+def _report(on_outcome, provider: ProviderCall, ok: bool, elapsed: float, error: Optional[Exception]):
+    if on_outcome is None:
+        return
+    try:
+        on_outcome(provider, ok, elapsed, error)
+    except Exception as e:
+        logger.error(f"Recording outcome for {provider.name} failed: {e}")
+
+
+async def race_providers(calls: List[ProviderCall], hedge_delay: Optional[float] = None,
+                         on_outcome: Optional[Callable] = None,
+                         admit: Optional[Callable[[ProviderCall], bool]] = None) -> Tuple[str, Any]:
+    """
+    Return (provider name, parsed result) from the first provider that answers validly
+
+    hedge_delay=None keeps the classic sequential chain. With a delay (seconds), the next
+    provider is launched whenever no answer has arrived within hedge_delay, or immediately
+    when a running provider fails. Remaining calls are cancelled once one succeeds.
+    on_outcome(call, ok, elapsed_seconds, error) is told about every finished (not cancelled) call.
+    admit(call) is asked right before each call is started; a False answer skips that provider
+    (e.g. a half-open circuit whose trial call another request already claimed).
+    """
+    if not calls:
+        raise AllProvidersFailed("No LLM providers configured")
+
+    errors = []
+
+    def admitted(provider: ProviderCall) -> bool:
+        if admit is None or admit(provider):
+            return True
+        errors.append(f"{provider.name}: skipped (circuit half-open)")
+        return False
+
+    if hedge_delay is None:
+        for provider in calls:
+            if not admitted(provider):
+                continue
+            try:
+                return provider.name, await provider.run(on_outcome)
+            except Exception as e:
+                logger.warning(f"{provider.name} failed: {e}")
+                errors.append(f"{provider.name}: {e}")
+        raise AllProvidersFailed('; '.join(errors))
+
+    waiting = list(calls)
+    running = {}
+    priority = {id(provider): index for index, provider in enumerate(calls)}
+
+    def launch_next():
+        while waiting:
+            provider = waiting.pop(0)
+            if admitted(provider):
+                running[asyncio.ensure_future(provider.run(on_outcome))] = provider
+                return
+
+    launch_next()
+    try:
+        while running:
+            done, _ = await asyncio.wait(
+                running, timeout=hedge_delay if waiting else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                logger.info(f"No LLM answer after {hedge_delay}s, hedging with {waiting[0].name}")
+                launch_next()
+                continue
+
+            # Several may finish together: prefer the higher-priority provider
+            for task in sorted(done, key=lambda t: priority[id(running[t])]):
+                provider = running.pop(task)
+                try:
+                    return provider.name, task.result()
+                except Exception as e:
+                    logger.warning(f"{provider.name} failed: {e}")
+                    errors.append(f"{provider.name}: {e}")
+                    if waiting:
+                        launch_next()
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise AllProvidersFailed('; '.join(errors))
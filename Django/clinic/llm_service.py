@@ -5,7 +5,8 @@ Supports multiple LLM providers: Gemini, OpenRouter (Qwen 3), Groq, and Cohere
 
 import logging
 import re
-from typing import Dict, List
+import time
+from typing import Dict, Iterator, List
 
 # Pre-compiled regex patterns for JSON cleanup
 RE_TRUE_FALSE = re.compile(r':\s*true/false')
@@ -18,10 +19,15 @@ RE_NONE = re.compile(r':\s*None\b')
 RE_TRUE = re.compile(r':\s*True\b')
 RE_FALSE = re.compile(r':\s*False\b')
 from django.conf import settings
+from asgiref.sync import async_to_sync
 import os
-import requests
 import json
 
+from .http_pool import get_http_session
+from .llm_cache import get_response_cache, normalize_text
+from .llm_health import get_provider_health
+from .llm_providers import AllProvidersFailed, ProviderCall, ProviderHTTPError, race_providers
+
 try:
     from google import genai
     GEMINI_AVAILABLE = True
@@ -48,6 +54,17 @@ class AIInsightGenerator:
     """
     _instance = None
     
+    # Chat generation settings shared by the blocking and streaming paths
+    CHAT_PARAMS = {
+        'groq': {'temperature': 0.6, 'max_tokens': 1024, 'top_p': 0.95},
+        'openrouter': {'temperature': 0.6, 'max_tokens': 500},
+    }
+    CHAT_OPENROUTER_MODEL = "stepfun/step-3.5-flash:free"
+    CHAT_FALLBACK_RESPONSE = (
+        "Thank you for your message. Based on your symptoms, "
+        "I recommend consulting with our clinic staff for proper evaluation."
+    )
+    
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -112,6 +129,11 @@ class AIInsightGenerator:
         else:
             self.cohere_client = None
         
+        # Hedged mode starts the next provider if the current one is slow (None = strict fallback chain)
+        self.hedge_delay = None
+        if getattr(settings, 'LLM_HEDGED_REQUESTS', False):
+            self.hedge_delay = getattr(settings, 'LLM_HEDGE_DELAY', 2.0)
+        
         self.logger.info("AI Insight Generator initialized with real LLM APIs")
     
     def _fix_json_response(self, text: str) -> str:
@@ -144,6 +166,115 @@ class AIInsightGenerator:
         
         return text
     
+    # ------------------------------------------------------------------
+    # Provider calls (blocking, return raw text; raced by llm_providers)
+    # ------------------------------------------------------------------
+    
+    def _groq_complete(self, messages: List[Dict], **params) -> str:
+        response = self.groq_client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=messages,
+            **params
+        )
+        return response.choices[0].message.content
+    
+    def _openrouter_complete(self, model: str, messages: List[Dict], **params) -> str:
+        response = get_http_session('openrouter').post(
+            url="https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.openrouter_api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://cpsu-health-assistant.edu.ph",
+                "X-Title": "CPSU Virtual Health Assistant",
+            },
+            json={"model": model, "messages": messages, **params}  # json= escapes special characters
+        )
+        if response.status_code != 200:
+            raise ProviderHTTPError(response.status_code)
+        return response.json()['choices'][0]['message']['content']
+    
+    def _cohere_complete(self, message: str, preamble: str = None) -> str:
+        if preamble:
+            return self.cohere_client.chat(message=message, preamble=preamble).text
+        return self.cohere_client.chat(message=message).text
+    
+    def _gemini_complete(self, prompt: str) -> str:
+        response = self.gemini_client.models.generate_content(
+            model="gemini-3-flash-preview",
+            contents=prompt
+        )
+        return response.text
+    
+    # Streaming variants yield text chunks as the provider produces them
+    
+    def _groq_stream(self, messages: List[Dict], **params) -> Iterator[str]:
+        stream = self.groq_client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=messages,
+            stream=True,
+            **params
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _openrouter_stream(self, model: str, messages: List[Dict], **params) -> Iterator[str]:
+        response = get_http_session('openrouter').post(
+            url="https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.openrouter_api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://cpsu-health-assistant.edu.ph",
+                "X-Title": "CPSU Virtual Health Assistant",
+            },
+            json={"model": model, "messages": messages, "stream": True, **params},
+            stream=True
+        )
+        with response:
+            if response.status_code != 200:
+                raise ProviderHTTPError(response.status_code)
+            # Server-sent events: "data: {...}" lines, ": comment" keep-alives, "data: [DONE]" at the end
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data: '):
+                    continue
+                data = line[len('data: '):]
+                if data == '[DONE]':
+                    break
+                choices = json.loads(data).get('choices') or [{}]
+                text = choices[0].get('delta', {}).get('content')
+                if text:
+                    yield text
+    
+    def _cohere_stream(self, message: str, preamble: str = None) -> Iterator[str]:
+        kwargs = {'preamble': preamble} if preamble else {}
+        for event in self.cohere_client.chat_stream(message=message, **kwargs):
+            if event.event_type == 'text-generation' and event.text:
+                yield event.text
+    
+    def _gemini_stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.gemini_client.models.generate_content_stream(
+            model="gemini-3-flash-preview",
+            contents=prompt
+        ):
+            if chunk.text:
+                yield chunk.text
+    
+    def _run_providers(self, calls: List[ProviderCall]):
+        """
+        Race provider calls (sequential unless LLM_HEDGED_REQUESTS) and return (name, result)
+        Providers with an open circuit are skipped and the rest are ordered by observed health
+        """
+        health = get_provider_health()
+        return async_to_sync(race_providers)(
+            health.order(calls), self.hedge_delay, health.record_outcome, health.admit
+        )
+    
+    @staticmethod
+    def _require_text(text: str) -> str:
+        if not text or not text.strip():
+            raise ValueError("Empty response")
+        return text
+    
     def generate_chat_response(self, message: str, context: dict = None) -> str:
         """
         Generate AI response for health chat using available LLM.
@@ -156,6 +287,120 @@ class AIInsightGenerator:
         Returns:
             AI-generated response
         """
+        system_prompt, messages, gemini_prompt, summary = self._chat_prompts(message, context)
+        
+        # Near-identical messages ("I have fever and headache") reuse an earlier answer
+        cache = get_response_cache()
+        cache_key = (normalize_text(message), normalize_text(summary))
+        cache_text = f"{message} {summary}"
+        cached = cache.get('chat', cache_key, text=cache_text)
+        if cached is not None:
+            return cached
+        
+        # Fallback chain: Groq → Qwen (OpenRouter) → Cohere → Gemini (rate limited, last)
+        calls = []
+        if self.groq_client:
+            calls.append(ProviderCall(
+                'Groq (Llama 3.3 70B)',
+                lambda: self._groq_complete(messages, **self.CHAT_PARAMS['groq']),
+                self._require_text,
+                key='groq'
+            ))
+        if self.openrouter_api_key:
+            calls.append(ProviderCall(
+                'OpenRouter (StepFun)',
+                lambda: self._openrouter_complete(self.CHAT_OPENROUTER_MODEL, messages, **self.CHAT_PARAMS['openrouter']),
+                self._require_text,
+                key='openrouter'
+            ))
+        if self.cohere_client:
+            calls.append(ProviderCall(
+                'Cohere', lambda: self._cohere_complete(message, preamble=system_prompt), self._require_text,
+                key='cohere'
+            ))
+        if self.gemini_client:
+            calls.append(ProviderCall(
+                'Gemini 3 Flash', lambda: self._gemini_complete(gemini_prompt), self._require_text,
+                key='gemini'
+            ))
+        
+        try:
+            provider, result = self._run_providers(calls)
+            self.logger.info(f"Response from {provider}")
+            cache.set('chat', cache_key, result, text=cache_text)
+            return result
+        except AllProvidersFailed as e:
+            self.logger.error(f"All LLM providers failed for chat: {e}")
+        
+        # Ultimate fallback
+        return self.CHAT_FALLBACK_RESPONSE
+    
+    def stream_chat_response(self, message: str, context: dict = None) -> Iterator[str]:
+        """
+        Like generate_chat_response(), but yields the answer in chunks as the provider streams it
+        
+        Providers are tried in the same health-ordered chain. A provider that fails before its
+        first chunk is skipped; one that fails mid-answer ends the stream (sent text can't be
+        taken back). Complete answers go into the same response cache.
+        """
+        system_prompt, messages, gemini_prompt, summary = self._chat_prompts(message, context)
+        
+        cache = get_response_cache()
+        cache_key = (normalize_text(message), normalize_text(summary))
+        cache_text = f"{message} {summary}"
+        cached = cache.get('chat', cache_key, text=cache_text)
+        if cached is not None:
+            yield cached
+            return
+        
+        calls = []
+        if self.groq_client:
+            calls.append(ProviderCall(
+                'Groq (Llama 3.3 70B)', lambda: self._groq_stream(messages, **self.CHAT_PARAMS['groq']), key='groq'
+            ))
+        if self.openrouter_api_key:
+            calls.append(ProviderCall(
+                'OpenRouter (StepFun)',
+                lambda: self._openrouter_stream(self.CHAT_OPENROUTER_MODEL, messages, **self.CHAT_PARAMS['openrouter']),
+                key='openrouter'
+            ))
+        if self.cohere_client:
+            calls.append(ProviderCall(
+                'Cohere', lambda: self._cohere_stream(message, preamble=system_prompt), key='cohere'
+            ))
+        if self.gemini_client:
+            calls.append(ProviderCall('Gemini 3 Flash', lambda: self._gemini_stream(gemini_prompt), key='gemini'))
+        
+        health = get_provider_health()
+        for provider in health.order(calls):
+            if not health.allow(provider.key):
+                continue
+            chunks = []
+            started = time.monotonic()
+            try:
+                for chunk in provider.call():
+                    chunks.append(chunk)
+                    yield chunk
+                if not ''.join(chunks).strip():
+                    raise ValueError("Empty response")
+            except Exception as e:
+                health.record(provider.key, False, (time.monotonic() - started) * 1000, e)
+                if chunks:
+                    self.logger.error(f"{provider.name} stream broke off: {e}")
+                    return
+                self.logger.warning(f"{provider.name} failed: {e}")
+                continue
+            
+            health.record(provider.key, True, (time.monotonic() - started) * 1000)
+            self.logger.info(f"Streamed response from {provider.name}")
+            cache.set('chat', cache_key, ''.join(chunks), text=cache_text)
+            return
+        
+        self.logger.error("All LLM providers failed for streamed chat")
+        yield self.CHAT_FALLBACK_RESPONSE
+    
+    def _chat_prompts(self, message: str, context: dict = None):
+        """System prompt, chat messages, Gemini prompt and context summary for a chat message"""
         # Build system prompt
         system_prompt = """You are a compassionate health assistant for CPSU (Central Philippines State University) students. Your STRICT scope is HEALTH only.
         
@@ -169,99 +414,16 @@ Guidelines:
 - Be culturally sensitive to Filipino students
 - Never diagnose - only provide general health information"""
         
-        # Fallback chain: Groq → Qwen (OpenRouter) → Cohere → Gemini
-        
-        # Try Groq first (fast, free tier)
-        if self.groq_client:
-            try:
-                response = self.groq_client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": message}
-                    ],
-                    temperature=0.6,
-                    max_tokens=1024,
-                    top_p=0.95
-                )
-                result = response.choices[0].message.content
-                if result and result.strip():
-                    self.logger.info("Response from Groq (Llama 3.3 70B)")
-                    return result
-                else:
-                    raise ValueError("Empty response from Groq")
-            except Exception as e:
-                self.logger.warning(f"Groq failed: {e}, trying OpenRouter...")
-        
-        # Try OpenRouter with Mistral free model
-        if self.openrouter_api_key:
-            try:
-                # Prepare payload - json parameter will properly escape all special characters
-                payload = {
-                    "model": "stepfun/step-3.5-flash:free",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": message}
-                    ],
-                    "temperature": 0.6,
-                    "max_tokens": 500
-                }
-                
-                response = requests.post(
-                    url="https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.openrouter_api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://cpsu-health-assistant.edu.ph",
-                        "X-Title": "CPSU Virtual Health Assistant",
-                    },
-                    json=payload,  # Use json parameter instead of data=json.dumps()
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result['choices'][0]['message']['content']
-                    if content and content.strip():
-                        self.logger.info("Response from OpenRouter (StepFun)")
-                        return content
-                    else:
-                        raise ValueError("Empty response from OpenRouter")
-                else:
-                    self.logger.warning(f"OpenRouter failed with status {response.status_code}, trying Cohere...")
-            except Exception as e:
-                self.logger.warning(f"OpenRouter failed: {e}, trying Cohere...")
-        
-        # Try Cohere
-        if self.cohere_client:
-            try:
-                response = self.cohere_client.chat(
-                    message=message,
-                    preamble=system_prompt
-                )
-                self.logger.info("Response from Cohere")
-                return response.text
-            except Exception as e:
-                self.logger.warning(f"Cohere failed: {e}, trying Gemini...")
-        
-        # Try Gemini as last fallback (rate limited)
-        if self.gemini_client:
-            try:
-                prompt = f"{system_prompt}\n\nUser message: {message}"
-                if context:
-                    prompt += f"\n\nContext: {context.get('summary', '')}"
-                
-                response = self.gemini_client.models.generate_content(
-                    model="gemini-3-flash-preview",
-                    contents=prompt
-                )
-                self.logger.info("Response from Gemini 3 Flash (last fallback)")
-                return response.text
-            except Exception as e:
-                self.logger.error(f"Gemini (last fallback) failed: {e}")
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message}
+        ]
+        gemini_prompt = f"{system_prompt}\n\nUser message: {message}"
+        summary = context.get('summary', '') if context else ''
+        if context:
+            gemini_prompt += f"\n\nContext: {summary}"
         
-        # Ultimate fallback
-        return "Thank you for your message. Based on your symptoms, I recommend consulting with our clinic staff for proper evaluation."
+        return system_prompt, messages, gemini_prompt, summary
     
     def generate_health_insights(self, symptoms: list, predictions: dict, chat_summary: str = None) -> list:
         """
@@ -278,6 +440,13 @@ Guidelines:
         disease = predictions.get('predicted_disease') or predictions.get('top_disease', 'Unknown')
         confidence = predictions.get('confidence_score') or predictions.get('confidence', 0)
         
+        # The prompt only depends on the symptom set, disease and rounded confidence
+        cache = get_response_cache()
+        cache_key = (tuple(sorted({normalize_text(s) for s in symptoms})), normalize_text(disease), round(confidence, 2))
+        cached = cache.get('insights', cache_key)
+        if cached is not None:
+            return cached
+        
         # Build prompt for insight generation with structured JSON output
         prompt = f"""You are a health assistant for CPSU (Central Philippine State University) students in the Philippines.
 
@@ -293,64 +462,38 @@ Respond ONLY with a JSON array in this exact format:
 
 Keep each insight under 100 words. Be culturally sensitive to Filipino students."""
 
-        # Try providers in order: Groq → OpenRouter → Cohere → Gemini
-        insights_text = None
+        messages = [{"role": "user", "content": prompt}]
         
-        # Try Groq first
-        if self.groq_client:
-            try:
-                response = self.groq_client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.5,
-                    max_tokens=800
-                )
-                insights_text = response.choices[0].message.content
-                self.logger.info("Health insights from Groq")
-            except Exception as e:
-                self.logger.warning(f"Groq insights failed: {e}")
+        # A response only counts once it parses into insights
+        def parse(text):
+            return self._parse_insights_response(text, disease, confidence)
         
-        # Try OpenRouter
-        if not insights_text and self.openrouter_api_key:
-            try:
-                response = requests.post(
-                    url="https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.openrouter_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "stepfun/step-3.5-flash:free",
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.5,
-                        "max_tokens": 800
-                    },
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    insights_text = response.json()['choices'][0]['message']['content']
-                    self.logger.info("Health insights from OpenRouter")
-            except Exception as e:
-                self.logger.warning(f"OpenRouter insights failed: {e}")
-        
-        # Try Gemini
-        if not insights_text and self.gemini_client:
-            try:
-                response = self.gemini_client.models.generate_content(
-                    model="gemini-3-flash-preview",
-                    contents=prompt
-                )
-                insights_text = response.text
-                self.logger.info("Health insights from Gemini")
-            except Exception as e:
-                self.logger.warning(f"Gemini insights failed: {e}")
+        # Try providers in order: Groq → OpenRouter → Gemini
+        calls = []
+        if self.groq_client:
+            calls.append(ProviderCall(
+                'Groq', lambda: self._groq_complete(messages, temperature=0.5, max_tokens=800), parse,
+                key='groq'
+            ))
+        if self.openrouter_api_key:
+            calls.append(ProviderCall(
+                'OpenRouter',
+                lambda: self._openrouter_complete(
+                    "stepfun/step-3.5-flash:free", messages, temperature=0.5, max_tokens=800
+                ),
+                parse,
+                key='openrouter'
+            ))
+        if self.gemini_client:
+            calls.append(ProviderCall('Gemini', lambda: self._gemini_complete(prompt), parse, key='gemini'))
         
-        # Parse LLM response into structured insights
-        if insights_text:
-            try:
-                return self._parse_insights_response(insights_text, disease, confidence)
-            except Exception as e:
-                self.logger.error(f"Failed to parse insights: {e}")
+        try:
+            provider, insights = self._run_providers(calls)
+            self.logger.info(f"Health insights from {provider}")
+            cache.set('insights', cache_key, insights)
+            return insights
+        except AllProvidersFailed as e:
+            self.logger.warning(f"LLM insights unavailable: {e}")
         
         # Fallback to basic insights
         return self._generate_fallback_insights(symptoms, predictions)
@@ -414,10 +557,10 @@ Keep each insight under 100 words. Be culturally sensitive to Filipino students.
     
     def validate_ml_prediction(self, symptoms: List[str], ml_prediction: str, ml_confidence: float) -> Dict:
         """
-        Use LLM (Gemini, OpenRouter, or Groq) to validate ML prediction for added accuracy
+        Use LLM (Groq, OpenRouter, or Cohere) to validate ML prediction for added accuracy
         
         This creates a HYBRID system: ML for fast prediction + LLM for validation
-        Cost: FREE (uses Gemini, OpenRouter Qwen 3, or Groq free tier)
+        Cost: FREE (uses Groq, OpenRouter free models, or Cohere free tier)
         
         Returns:
         {
@@ -428,6 +571,16 @@ Keep each insight under 100 words. Be culturally sensitive to Filipino students.
         }
         """
         try:
+            cache = get_response_cache()
+            cache_key = (
+                tuple(sorted({normalize_text(s) for s in symptoms[:10]})),
+                normalize_text(ml_prediction),
+                round(ml_confidence, 2)
+            )
+            cached = cache.get('validation', cache_key)
+            if cached is not None:
+                return cached
+            
             # Create validation prompt
             symptoms_str = ', '.join(symptoms[:10])  # Limit to avoid token overflow
             
@@ -452,180 +605,45 @@ Respond ONLY in this exact JSON format:
 
 Be concise. Focus on medical accuracy."""
 
-            # Try Groq first (fast, free tier)
-            if self.groq_client:
-                try:
-                    response = self.groq_client.chat.completions.create(
-                        model="llama-3.3-70b-versatile",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.3,
-                        max_tokens=500,
-                        top_p=0.95
-                    )
-                    
-                    result_text = response.choices[0].message.content
-                    
-                    # Check for empty response
-                    if not result_text or not result_text.strip():
-                        raise ValueError("Empty response from Groq API")
-                    
-                    result_text = result_text.strip()
-                    self.logger.info(f"Groq (Llama 3.3 70B) validation response: {result_text[:100]}")
-                    
-                    # Extract JSON from markdown code blocks if present
-                    if '```json' in result_text:
-                        result_text = result_text.split('```json')[1].split('```')[0].strip()
-                    elif '```' in result_text:
-                        result_text = result_text.split('```')[1].split('```')[0].strip()
-                    
-                    # Try to find JSON object in response
-                    if not result_text.startswith('{'):
-                        # Look for JSON object pattern (allow nested content)
-                        json_match = re.search(r'\{[\s\S]*?"agrees"[\s\S]*?\}', result_text)
-                        if json_match:
-                            result_text = json_match.group(0)
-                    
-                    # Fix common LLM JSON errors
-                    result_text = self._fix_json_response(result_text)
-                    
-                    # Validate JSON before parsing
-                    if not result_text or not result_text.startswith('{'):
-                        raise ValueError(f"No valid JSON found in response: {result_text[:50]}")
-                    
-                    result_json = json.loads(result_text)
-                    
-                    return {
-                        'agrees_with_ml': result_json.get('agrees', True),
-                        'confidence_boost': max(-0.15, min(0.15, result_json.get('confidence_adjustment', 0.0))),
-                        'reasoning': result_json.get('reasoning', 'LLM validation completed'),
-                        'alternative_diagnosis': result_json.get('alternative_diagnosis')
-                    }
-                    
-                except Exception as groq_error:
-                    self.logger.warning(f"Groq validation failed, trying OpenRouter: {groq_error}")
-            
-            # Try OpenRouter with Mistral free model
-            if self.openrouter_api_key:
-                try:
-                    # Prepare payload - json.dumps will properly escape all special characters
-                    payload = {
-                        "model": "mistralai/devstral-2512:free",
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.3,
-                        "max_tokens": 500
-                    }
-                    
-                    response = requests.post(
-                        url="https://openrouter.ai/api/v1/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {self.openrouter_api_key}",
-                            "Content-Type": "application/json",
-                            "HTTP-Referer": "https://cpsu-health-assistant.edu.ph",
-                            "X-Title": "CPSU Virtual Health Assistant",
-                        },
-                        json=payload,  # Use json parameter instead of data=json.dumps()
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        response_json = response.json()
-                        result_text = response_json['choices'][0]['message']['content']
-                        
-                        # Check for empty response
-                        if not result_text or not result_text.strip():
-                            raise ValueError("Empty response from OpenRouter API")
-                        
-                        result_text = result_text.strip()
-                        
-                        # Extract JSON from markdown code blocks if present
-                        if '```json' in result_text:
-                            result_text = result_text.split('```json')[1].split('```')[0].strip()
-                        elif '```' in result_text:
-                            result_text = result_text.split('```')[1].split('```')[0].strip()
-                        
-                        # Try to find JSON object in response
-                        if not result_text.startswith('{'):
-                            json_match = re.search(r'\{[\s\S]*?"agrees"[\s\S]*?\}', result_text)
-                            if json_match:
-                                result_text = json_match.group(0)
-                        
-                        # Fix common LLM JSON errors
-                        result_text = self._fix_json_response(result_text)
-                        
-                        # Validate JSON before parsing
-                        if not result_text or not result_text.startswith('{'):
-                            raise ValueError(f"No valid JSON found in response: {result_text[:50]}")
-                        
-                        result_json = json.loads(result_text)
-                        self.logger.info(f"OpenRouter (Mistral) validation: agrees={result_json.get('agrees')}")
-                        
-                        return {
-                            'agrees_with_ml': result_json.get('agrees', True),
-                            'confidence_boost': max(-0.15, min(0.15, result_json.get('confidence_adjustment', 0.0))),
-                            'reasoning': result_json.get('reasoning', 'LLM validation completed'),
-                            'alternative_diagnosis': result_json.get('alternative_diagnosis')
-                        }
-                    else:
-                        self.logger.warning(f"OpenRouter failed with status {response.status_code}, trying Cohere...")
-                        
-                except Exception as openrouter_error:
-                    self.logger.warning(f"OpenRouter validation failed, trying Cohere: {openrouter_error}")
-            
-            # Try Cohere
-            if self.cohere_client:
-                try:
-                    # Cohere doesn't support structured JSON, so use simple text parsing
-                    simplified_prompt = f"""Given symptoms: {symptoms_str}
+            # Cohere doesn't support structured JSON, so it gets a yes/no prompt
+            simplified_prompt = f"""Given symptoms: {symptoms_str}
 ML predicted: {ml_prediction} ({ml_confidence:.0%})
 
 Do you agree with this prediction? Answer: yes/no and brief reason."""
-                    
-                    response = self.cohere_client.chat(
-                        message=simplified_prompt
-                    )
-                    
-                    result_text = response.text.lower()
-                    agrees = 'yes' in result_text or 'agree' in result_text or 'correct' in result_text
-                    
-                    self.logger.info(f"Cohere validation: agrees={agrees}")
-                    
-                    return {
-                        'agrees_with_ml': agrees,
-                        'confidence_boost': 0.05 if agrees else -0.05,
-                        'reasoning': response.text[:200],
-                        'alternative_diagnosis': None
-                    }
-                    
-                except Exception as cohere_error:
-                    self.logger.warning(f"Cohere validation failed, trying Gemini: {cohere_error}")
             
-            # Try Gemini as last resort (rate limited)
-            # if self.gemini_client:
-            #     try:
-            #         response = self.gemini_client.models.generate_content(
-            #             model="gemini-2.5-flash",
-            #             contents=prompt
-            #         )
-            #         result_text = response.text.strip()
-                    
-            #         # Extract JSON from markdown code blocks if present
-            #         if '```json' in result_text:
-            #             result_text = result_text.split('```json')[1].split('```')[0].strip()
-            #         elif '```' in result_text:
-            #             result_text = result_text.split('```')[1].split('```')[0].strip()
-                    
-            #         result_json = json.loads(result_text)
-            #         self.logger.info(f"Gemini validation (last resort): agrees={result_json.get('agrees')}")
-                    
-            #         return {
-            #             'agrees_with_ml': result_json.get('agrees', True),
-            #             'confidence_boost': max(-0.15, min(0.15, result_json.get('confidence_adjustment', 0.0))),
-            #             'reasoning': result_json.get('reasoning', 'LLM validation completed'),
-            #             'alternative_diagnosis': result_json.get('alternative_diagnosis')
-            #         }
-                    
-            #     except Exception as gemini_error:
-            #         self.logger.warning(f"Gemini validation (last resort) failed: {gemini_error}")
+            messages = [{"role": "user", "content": prompt}]
+            
+            # Groq (fast, free tier) → OpenRouter (Mistral free model) → Cohere
+            calls = []
+            if self.groq_client:
+                calls.append(ProviderCall(
+                    'Groq (Llama 3.3 70B)',
+                    lambda: self._groq_complete(messages, temperature=0.3, max_tokens=500, top_p=0.95),
+                    self._parse_validation_json,
+                    key='groq'
+                ))
+            if self.openrouter_api_key:
+                calls.append(ProviderCall(
+                    'OpenRouter (Mistral)',
+                    lambda: self._openrouter_complete(
+                        "mistralai/devstral-2512:free", messages, temperature=0.3, max_tokens=500
+                    ),
+                    self._parse_validation_json,
+                    key='openrouter'
+                ))
+            if self.cohere_client:
+                calls.append(ProviderCall(
+                    'Cohere', lambda: self._cohere_complete(simplified_prompt), self._parse_validation_text,
+                    key='cohere'
+                ))
+            
+            try:
+                provider, validation = self._run_providers(calls)
+                self.logger.info(f"{provider} validation: agrees={validation['agrees_with_ml']}")
+                cache.set('validation', cache_key, validation)
+                return validation
+            except AllProvidersFailed as e:
+                self.logger.warning(f"LLM validation unavailable: {e}")
             
             # If all LLMs fail, return neutral validation
             return {
@@ -643,4 +661,53 @@ Do you agree with this prediction? Answer: yes/no and brief reason."""
                 'reasoning': f'Validation error: {str(e)}',
                 'alternative_diagnosis': None
             }
-
+    
+    def _parse_validation_json(self, result_text: str) -> Dict:
+        """Parse a JSON validation answer (raises if the response holds no usable JSON)"""
+        # Check for empty response
+        if not result_text or not result_text.strip():
+            raise ValueError("Empty response")
+        
+        result_text = result_text.strip()
+        
+        # Extract JSON from markdown code blocks if present
+        if '```json' in result_text:
+            result_text = result_text.split('```json')[1].split('```')[0].strip()
+        elif '```' in result_text:
+            result_text = result_text.split('```')[1].split('```')[0].strip()
+        
+        # Try to find JSON object in response
+        if not result_text.startswith('{'):
+            # Look for JSON object pattern (allow nested content)
+            json_match = re.search(r'\{[\s\S]*?"agrees"[\s\S]*?\}', result_text)
+            if json_match:
+                result_text = json_match.group(0)
+        
+        # Fix common LLM JSON errors
+        result_text = self._fix_json_response(result_text)
+        
+        # Validate JSON before parsing
+        if not result_text or not result_text.startswith('{'):
+            raise ValueError(f"No valid JSON found in response: {result_text[:50]}")
+        
+        result_json = json.loads(result_text)
+        
+        return {
+            'agrees_with_ml': result_json.get('agrees', True),
+            'confidence_boost': max(-0.15, min(0.15, result_json.get('confidence_adjustment', 0.0))),
+            'reasoning': result_json.get('reasoning', 'LLM validation completed'),
+            'alternative_diagnosis': result_json.get('alternative_diagnosis')
+        }
+    
+    def _parse_validation_text(self, text: str) -> Dict:
+        """Parse a free-text yes/no validation answer"""
+        self._require_text(text)
+        result_text = text.lower()
+        agrees = 'yes' in result_text or 'agree' in result_text or 'correct' in result_text
+        
+        return {
+            'agrees_with_ml': agrees,
+            'confidence_boost': 0.05 if agrees else -0.05,
+            'reasoning': text[:200],
+            'alternative_diagnosis': None
+        }
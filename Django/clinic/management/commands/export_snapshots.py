@@ -0,0 +1,75 @@
+"""
+Management command to write columnar snapshots of symptom records
+Usage: python manage.py export_snapshots [--months 2 | --since 2025-01 | --all] [--output DIR]
+
+Writes Parquet files partitioned as month=YYYY-MM/department=<name>/ under
+EXPORT_SNAPSHOT_DIR, readable as one dataset by pyarrow, pandas, DuckDB or
+Spark. Each selected month is rebuilt in full, so re-running is safe; run it
+from cron (e.g. nightly) to keep the current and previous month up to date.
+"""
+
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from clinic.exports import write_snapshots
+from clinic.models import SymptomRecord
+
+
+def _month(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = 'Write month/department-partitioned Parquet snapshots of symptom records'
+
+    def add_arguments(self, parser):
+        window = parser.add_mutually_exclusive_group()
+        window.add_argument(
+            '--months', type=int, default=2,
+            help='Snapshot the last N months, the current one included (default: 2)'
+        )
+        window.add_argument(
+            '--since', type=_month,
+            help='Snapshot from this month (YYYY-MM) through the current one'
+        )
+        window.add_argument(
+            '--all', action='store_true',
+            help='Snapshot the whole history'
+        )
+        parser.add_argument(
+            '--output', default=settings.EXPORT_SNAPSHOT_DIR,
+            help='Snapshot root directory (default: EXPORT_SNAPSHOT_DIR)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise CommandError('Snapshots require pyarrow. Install with: pip install pyarrow')
+
+        current = timezone.localdate().replace(day=1)
+        if options['all']:
+            first = SymptomRecord.objects.aggregate(first=Min('created_at'))['first']
+            start = timezone.localdate(first).replace(day=1) if first else current
+        elif options['since']:
+            start = options['since']
+        else:
+            if options['months'] < 1:
+                raise CommandError('--months must be at least 1')
+            months_back = current.year * 12 + current.month - options['months']
+            start = date(months_back // 12, months_back % 12 + 1, 1)
+
+        if start > current:
+            raise CommandError(f'Start month {start:%Y-%m} is in the future')
+
+        self.stdout.write(f"Writing snapshots for {start:%Y-%m} .. {current:%Y-%m} to {options['output']}...")
+        results = write_snapshots(options['output'], start, current)
+
+        for month, departments in results.items():
+            self.stdout.write(f"  {month}: {sum(departments.values())} records in {len(departments)} department(s)")
+        total = sum(sum(departments.values()) for departments in results.values())
+        self.stdout.write(self.style.SUCCESS(f'✅ Wrote {total} records across {len(results)} month(s)'))
@@ -0,0 +1,27 @@
+"""
+Management command to roll medication schedules forward
+Usage: python manage.py extend_medication_schedules [--days-ahead 7]
+
+With MEDICATION_SCHEDULE_DAYS_AHEAD set, prescriptions only get their next N
+days of doses up front; run this daily (cron) to keep every active course
+materialized N days ahead. Safe to re-run: existing doses are skipped.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from clinic.medication_schedule import extend_schedules
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming MedicationLog doses for active medications (rolling schedule window)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days-ahead', type=int, default=settings.MEDICATION_SCHEDULE_DAYS_AHEAD,
+            help='Days of doses to keep materialized from today (0 = whole course)'
+        )
+
+    def handle(self, *args, **options):
+        count = extend_schedules(options['days_ahead'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Submitted {count} scheduled dose(s)'))
@@ -0,0 +1,26 @@
+"""
+Management command to recompute the department statistics cache
+Usage: python manage.py refresh_department_stats [--department "Computer Science" ...]
+
+Symptom submissions refresh their own department; schedule this (e.g. every
+15 minutes from cron) to pick up referral updates, profile changes and the
+rolling 30-day window moving on.
+"""
+
+from django.core.management.base import BaseCommand
+
+from clinic.department_stats import refresh_department_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute DepartmentStats (student counts, top diseases, referrals) with grouped queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--department', action='append', dest='departments',
+            help='Only refresh this department (repeatable); default is all departments'
+        )
+
+    def handle(self, *args, **options):
+        count = refresh_department_stats(options['departments'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Refreshed statistics for {count} department(s)'))
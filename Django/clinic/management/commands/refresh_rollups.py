@@ -0,0 +1,59 @@
+"""
+Management command to rebuild the daily analytics rollups
+Usage: python manage.py refresh_rollups [--days 7 | --since 2025-01-01 | --all]
+
+Inserts keep the rollups current on their own; run this from cron (e.g. nightly)
+to catch up after downtime and to pick up edited or deleted records, and once
+after deploying to backfill history. Without options it rebuilds from the
+latest rolled-up day through today.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from clinic.rollups import catch_up_start, first_raw_date, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily symptom and audit rollups from the raw tables (catch-up or backfill)'
+
+    def add_arguments(self, parser):
+        window = parser.add_mutually_exclusive_group()
+        window.add_argument(
+            '--days', type=int,
+            help='Rebuild the last N days (today included)'
+        )
+        window.add_argument(
+            '--since', type=date.fromisoformat,
+            help='Rebuild from this date (YYYY-MM-DD) through today'
+        )
+        window.add_argument(
+            '--all', action='store_true',
+            help='Rebuild the whole history'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+
+        if options['days'] is not None:
+            if options['days'] < 1:
+                raise CommandError('--days must be at least 1')
+            start_date = today - timedelta(days=options['days'] - 1)
+        elif options['since']:
+            start_date = options['since']
+        elif options['all']:
+            start_date = first_raw_date() or today
+        else:
+            start_date = catch_up_start() or today
+
+        if start_date > today:
+            raise CommandError(f'Start date {start_date} is in the future')
+
+        self.stdout.write(f'Rebuilding rollups for {start_date} .. {today} ({(today - start_date).days + 1} days)...')
+        written = rebuild_rollups(start_date, today)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {written['symptom_rollups']} symptom rollup rows, {written['audit_rollups']} audit rollup rows"
+        ))
@@ -0,0 +1,56 @@
+"""
+Management command to run the shared ML inference sidecar
+Usage: python manage.py run_inference_server [--socket /tmp/cpsu-ml.sock]
+
+Set ML_INFERENCE_SOCKET to the same path in the web workers' environment so
+get_ml_predictor() forwards predictions here instead of loading the model itself.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from clinic.inference_server import InferenceServer
+from clinic.ml_service import MLPredictor
+
+
+class Command(BaseCommand):
+    help = 'Run the local ML inference server (one model copy shared by all gunicorn workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket', type=str, default=settings.ML_INFERENCE_SOCKET,
+            help='Unix socket path (default: ML_INFERENCE_SOCKET)'
+        )
+        parser.add_argument(
+            '--max-batch-size', type=int, default=settings.ML_INFERENCE_MAX_BATCH_SIZE,
+            help='Maximum rows scored in one predict_proba call'
+        )
+        parser.add_argument(
+            '--max-wait-ms', type=float, default=settings.ML_INFERENCE_MAX_WAIT_MS,
+            help='How long to wait for more requests before scoring a partial batch'
+        )
+
+    def handle(self, *args, **options):
+        socket_path = options.get('socket')
+        if not socket_path:
+            raise CommandError('No socket path given. Pass --socket or set ML_INFERENCE_SOCKET.')
+
+        predictor = MLPredictor()
+        server = InferenceServer(
+            socket_path,
+            predictor,
+            max_batch_size=options['max_batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'\n✅ ML inference server listening on {socket_path}'))
+        self.stdout.write(f'   Symptoms: {len(predictor.get_available_symptoms())}')
+        self.stdout.write(f'   Max batch size: {options["max_batch_size"]}')
+        self.stdout.write(f'   Max wait: {options["max_wait_ms"]} ms\n')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('\nShutting down inference server...')
+        finally:
+            server.server_close()
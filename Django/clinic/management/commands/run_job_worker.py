@@ -0,0 +1,65 @@
+"""
+Management command to run the background job worker
+Usage: python manage.py run_job_worker [--once] [--poll-interval 1.0]
+
+Processes BackgroundJob rows (LLM validation and insights queued by the Rasa
+prediction webhook when LLM_ENRICHMENT_ASYNC=True, and report exports queued
+through /api/staff/exports/). Run as many workers as needed; each job is
+claimed by exactly one of them.
+"""
+
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from clinic import tasks  # noqa: F401 - registers the job handlers
+from clinic.job_queue import JOB_HANDLERS, JobWorker
+
+
+class Command(BaseCommand):
+    help = 'Run the database-backed background job worker (no external broker needed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process all runnable jobs and exit (for cron)'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to sleep when the queue is empty'
+        )
+        parser.add_argument(
+            '--visibility-timeout', type=float, default=settings.JOB_VISIBILITY_TIMEOUT,
+            help='Seconds before a claimed job that has not finished can be claimed again'
+        )
+        parser.add_argument(
+            '--worker-id', type=str, default=None,
+            help='Name recorded on claimed jobs (default: hostname:pid)'
+        )
+
+    def handle(self, *args, **options):
+        worker = JobWorker(
+            worker_id=options['worker_id'],
+            visibility_timeout=options['visibility_timeout'],
+            poll_interval=options['poll_interval'],
+        )
+
+        if options['once']:
+            count = worker.run_once()
+            self.stdout.write(self.style.SUCCESS(f'✅ Processed {count} job(s)'))
+            return
+
+        # Finish the current job on SIGTERM/Ctrl+C instead of abandoning its claim
+        def request_stop(signum, frame):
+            self.stdout.write('\nStopping after the current job...')
+            worker.stop()
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Job worker {worker.worker_id} started'))
+        self.stdout.write(f'   Job kinds: {", ".join(sorted(JOB_HANDLERS))}')
+        self.stdout.write(f'   Visibility timeout: {worker.visibility_timeout}s')
+        self.stdout.write(f'   Poll interval: {worker.poll_interval}s\n')
+
+        worker.run_forever()
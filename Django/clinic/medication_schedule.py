@@ -0,0 +1,99 @@
+"""
+Medication Schedule Expansion
+Turns a medication's schedule_times and date window into MedicationLog rows
+
+Times are parsed once, every (date, time) dose is generated up front and
+written with chunked bulk_create inside one transaction; existing doses are
+skipped through the (medication, scheduled_date, scheduled_time) unique
+constraint, so materializing the same window twice is harmless.
+
+With MEDICATION_SCHEDULE_DAYS_AHEAD > 0 only the next N days are created when
+a medication is prescribed; `python manage.py extend_medication_schedules`
+(run daily) rolls every active course forward.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from .models import Medication, MedicationLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def parse_schedule_times(schedule_times: Iterable[str]) -> List[time]:
+    """Sorted, de-duplicated dose times from "HH:MM" strings (invalid entries are skipped)"""
+    times = set()
+    for time_str in schedule_times or []:
+        try:
+            times.add(datetime.strptime(str(time_str).strip(), '%H:%M').time())
+        except ValueError:
+            logger.warning(f"Skipping invalid medication schedule time: {time_str!r}")
+    return sorted(times)
+
+
+def expand_schedule(start_date: date, end_date: date, times: List[time]) -> Iterator[Tuple[date, time]]:
+    """Every (date, time) dose from start_date to end_date inclusive"""
+    for offset in range((end_date - start_date).days + 1):
+        day = start_date + timedelta(days=offset)
+        for dose_time in times:
+            yield day, dose_time
+
+
+def materialization_horizon(days_ahead: Optional[int] = None) -> Optional[date]:
+    """Last day to pre-create doses for (None = the whole course)"""
+    if days_ahead is None:
+        days_ahead = getattr(settings, 'MEDICATION_SCHEDULE_DAYS_AHEAD', 0)
+    if not days_ahead:
+        return None
+    return timezone.localdate() + timedelta(days=days_ahead - 1)
+
+
+def materialize_logs(medication: Medication, until: Optional[date] = None,
+                     from_date: Optional[date] = None) -> int:
+    """
+    Create the pending doses of a medication from from_date (default: its start)
+    through min(until, end_date); returns the number of doses submitted
+    """
+    times = parse_schedule_times(medication.schedule_times)
+    start = max(from_date or medication.start_date, medication.start_date)
+    end = min(until, medication.end_date) if until else medication.end_date
+    if not times or start > end:
+        return 0
+
+    logs = [
+        MedicationLog(medication=medication, scheduled_date=day, scheduled_time=dose_time, status='pending')
+        for day, dose_time in expand_schedule(start, end, times)
+    ]
+    with transaction.atomic():
+        MedicationLog.objects.bulk_create(logs, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(logs)
+
+
+def extend_schedules(days_ahead: Optional[int] = None) -> int:
+    """
+    Roll every active, unfinished course forward to the materialization horizon
+    Resumes from each medication's last materialized day; returns doses submitted
+    """
+    horizon = materialization_horizon(days_ahead)
+    medications = Medication.objects.filter(
+        is_active=True, end_date__gte=timezone.localdate()
+    ).annotate(
+        last_scheduled=Max('logs__scheduled_date')
+    ).filter(Q(last_scheduled__isnull=True) | Q(last_scheduled__lt=F('end_date')))
+    if horizon is not None:
+        # Courses already materialized through the horizon have nothing to add
+        medications = medications.filter(Q(last_scheduled__isnull=True) | Q(last_scheduled__lt=horizon))
+
+    total = 0
+    for medication in medications.iterator(chunk_size=200):
+        # The last day is included again in case it was only partly scheduled; duplicates are ignored
+        total += materialize_logs(medication, until=horizon, from_date=medication.last_scheduled)
+    return total
@@ -3,7 +3,7 @@ Custom middleware for audit logging and security
 """
 
 from django.utils.deprecation import MiddlewareMixin
-from .models import AuditLog
+from .audit_writer import record_audit
 
 
 def get_client_ip(request):
@@ -51,7 +51,7 @@ class AuditMiddleware(MiddlewareMixin):
         if not hasattr(request, 'user') or not request.user.is_authenticated:
             # Log failed login attempts
             if 'login' in path and response.status_code == 401:
-                AuditLog.objects.create(
+                record_audit(
                     user=None,
                     action='failed_login',
                     ip_address=request.audit_data['ip_address'],
@@ -66,7 +66,7 @@ class AuditMiddleware(MiddlewareMixin):
         
         if action:
             try:
-                AuditLog.objects.create(
+                record_audit(
                     user=request.user,
                     action=action,
                     model_name=self._extract_model_name(path),
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.10 on 2026-10-17 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0007_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySymptomRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(blank=True, help_text="Student's department when the record was made", max_length=100)),
+                ('predicted_disease', models.CharField(blank=True, max_length=100)),
+                ('severity', models.IntegerField(choices=[(1, 'Mild'), (2, 'Moderate'), (3, 'Severe')], default=1)),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('high_confidence_count', models.PositiveIntegerField(default=0, help_text='confidence_score >= 0.8')),
+                ('medium_confidence_count', models.PositiveIntegerField(default=0, help_text='0.6 <= confidence_score < 0.8')),
+                ('low_confidence_count', models.PositiveIntegerField(default=0, help_text='confidence_score < 0.6')),
+            ],
+            options={
+                'verbose_name': 'Daily Symptom Rollup',
+                'verbose_name_plural': 'Daily Symptom Rollups',
+                'db_table': 'daily_symptom_rollups',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'predicted_disease'], name='daily_sympt_date_b8f2e8_idx')],
+                'unique_together': {('date', 'department', 'predicted_disease', 'severity')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySymptomCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('symptom', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Symptom Count',
+                'verbose_name_plural': 'Daily Symptom Counts',
+                'db_table': 'daily_symptom_counts',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'symptom')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyAuditRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('action', models.CharField(choices=[('view', 'Viewed Record'), ('create', 'Created Record'), ('update', 'Updated Record'), ('delete', 'Deleted Record'), ('export', 'Exported Data'), ('login', 'User Login'), ('logout', 'User Logout'), ('failed_login', 'Failed Login Attempt')], max_length=20)),
+                ('success', models.BooleanField(default=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Audit Rollup',
+                'verbose_name_plural': 'Daily Audit Rollups',
+                'db_table': 'daily_audit_rollups',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'action', 'success')},
+            },
+        ),
+    ]
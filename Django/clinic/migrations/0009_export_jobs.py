@@ -0,0 +1,39 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0008_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel'), ('parquet', 'Parquet'), ('arrow', 'Arrow IPC stream')], max_length=10)),
+                ('filters', models.JSONField(default=dict, help_text='start_date, end_date, department, disease')),
+                ('cache_key', models.CharField(help_text='Hash of format + filters; identical requests reuse the file', max_length=64)),
+                ('rows_total', models.PositiveIntegerField(blank=True, null=True)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('file_name', models.CharField(blank=True, help_text='Path relative to MEDIA_ROOT', max_length=255)),
+                ('file_size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='export', to='clinic.backgroundjob')),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'db_table': 'export_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['cache_key', 'created_at'], name='export_jobs_cache_k_37f041_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0009_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Request time (kept when the entry is inserted later in a batch)'),
+        ),
+    ]
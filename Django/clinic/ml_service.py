@@ -3,18 +3,132 @@ ML/AI Integration Services
 Handles disease prediction and health insights generation
 """
 
+import copy
+import hashlib
 import pickle
+import threading
+import time
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from django.conf import settings
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import os
 import logging
 
 # Import LLM service
 from .llm_service import AIInsightGenerator
 
+# Import flat-array forest evaluator and packed symptom helpers
+from .compiled_forest import CompiledForest
+from .symptom_vectors import pack_indices, unpack_dense, unpack_indices
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache for prediction results with size and TTL bounds
+    Entries are tagged with the model hash; loading a different model clears the cache
+    """
+    
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model_hash = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Return a cached result or None (counts a hit or miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key: Tuple, value: Dict):
+        """Store a result, evicting the least recently used entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            # Key[0] is the model hash - a new model invalidates everything cached so far
+            if key[0] != self.model_hash:
+                self._entries.clear()
+                self.model_hash = key[0]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Categorization rules (substring match on the lowercased disease name),
+# applied once per disease when the DiseaseInfo table is built
+COMMUNICABLE_DISEASES = (
+    'common cold', 'flu', 'tuberculosis', 'pneumonia', 'covid-19',
+    'malaria', 'dengue', 'typhoid', 'hepatitis', 'chickenpox',
+    'chicken pox', 'measles', 'mumps', 'influenza', 'aids',
+    'hiv', 'impetigo', 'gastroenteritis', 'cholera'
+)
+NON_COMMUNICABLE_VARIANTS = ('alcoholic hepatitis',)
+CHRONIC_DISEASES = (
+    'diabetes', 'hypertension', 'asthma', 'arthritis', 'chronic',
+    'migraine', 'allergy', 'gerd', 'osteoporosis'
+)
+ICD10_MAPPING = {
+    'common cold': 'J00',
+    'influenza': 'J11',
+    'pneumonia': 'J18',
+    'diabetes': 'E11',
+    'hypertension': 'I10',
+    'asthma': 'J45',
+    'migraine': 'G43',
+    'dengue': 'A90',
+    'typhoid': 'A01',
+    'malaria': 'B54',
+}
+
+
+class DiseaseInfo:
+    """Precomputed description, precautions and categorization for one disease class"""
+    
+    __slots__ = ('name', 'description', 'precautions', 'is_communicable', 'is_acute', 'icd10_code')
+    
+    def __init__(self, name: str, description: str, precautions: Tuple[str, ...],
+                 is_communicable: bool, is_acute: bool, icd10_code: str):
+        self.name = name
+        self.description = description
+        self.precautions = precautions
+        self.is_communicable = is_communicable
+        self.is_acute = is_acute
+        self.icd10_code = icd10_code
+
 
 class MLPredictor:
     """
@@ -25,35 +139,55 @@ class MLPredictor:
     def __init__(self):
         self.model = None
         self.feature_names = None
+        self.feature_index = {}
+        self.model_hash = ''
         self.severity_dict = {}
         self.description_dict = {}
         self.precaution_dict = {}
+        self.disease_table: List[DiseaseInfo] = []
+        self.disease_info: Dict[str, DiseaseInfo] = {}
         self._load_model()
         self._load_metadata()
+        self._build_disease_table()
     
     def _load_model(self):
         """Load trained ML model"""
         model_path = settings.ML_MODEL_PATH
+        compiled_path = getattr(settings, 'ML_COMPILED_MODEL_PATH', None)
         
         try:
+            # Prefer the memory-mapped forest artifact (no unpickling, pages shared across workers)
+            if compiled_path and (compiled_path / 'metadata.json').exists():
+                self.model = CompiledForest.load(compiled_path)
+                self.feature_names = self.model.feature_names
+                # Prediction cache keys include this, so a retrained model never serves stale results
+                self.model_hash = self.model.model_hash
+                print(f"[OK] Loaded compiled ML model from {compiled_path}")
             # Try v2 model first
-            if model_path.exists():
+            elif model_path.exists():
                 with open(model_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                    model_bytes = f.read()
+                model_data = pickle.loads(model_bytes)
                 self.model = model_data['model']
                 self.feature_names = model_data['feature_names']
+                self.model_hash = hashlib.sha256(model_bytes).hexdigest()[:16]
                 print(f"[OK] Loaded ML model from {model_path}")
             else:
                 # Fallback to v1 model
                 fallback_path = model_path.parent / 'disease_predictor.pkl'
                 with open(fallback_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                    model_bytes = f.read()
+                model_data = pickle.loads(model_bytes)
                 self.model = model_data['model']
                 self.feature_names = model_data['feature_names']
+                self.model_hash = hashlib.sha256(model_bytes).hexdigest()[:16]
                 print(f"[OK] Loaded ML model from {fallback_path}")
         except Exception as e:
             print(f"[ERROR] Error loading ML model: {e}")
             raise
+        
+        # Symptom -> column lookup, built once so predict() never scans feature_names
+        self.feature_index = {name: idx for idx, name in enumerate(self.feature_names)}
     
     def _load_metadata(self):
         """Load symptom severity, descriptions, and precautions"""
@@ -76,19 +210,43 @@ class MLPredictor:
             precaution_path = datasets_path / 'symptom_precaution.csv'
             if precaution_path.exists():
                 precaution_df = pd.read_csv(precaution_path)
-                for _, row in precaution_df.iterrows():
-                    disease = row['Disease']
-                    precautions = [
-                        row[f'Precaution_{i}'] 
-                        for i in range(1, 5) 
-                        if pd.notna(row.get(f'Precaution_{i}', ''))
-                    ]
-                    self.precaution_dict[disease] = precautions
+                columns = [f'Precaution_{i}' for i in range(1, 5) if f'Precaution_{i}' in precaution_df.columns]
+                for disease, *precautions in precaution_df[['Disease', *columns]].itertuples(index=False, name=None):
+                    self.precaution_dict[disease] = [p for p in precautions if pd.notna(p)]
             
             print("[OK] Loaded disease metadata")
         except Exception as e:
             print(f"[WARN] Error loading metadata: {e}")
     
+    def _build_disease_table(self):
+        """Compile per-class DiseaseInfo records so predictions need no string work"""
+        classes = getattr(self.model, 'classes_', None)
+        if classes is None:
+            return
+        
+        self.disease_table = [self._compile_disease_info(str(name)) for name in classes]
+        self.disease_info = {info.name: info for info in self.disease_table}
+    
+    def _compile_disease_info(self, disease: str) -> DiseaseInfo:
+        # Some class labels carry trailing spaces that the metadata CSVs don't ('Diabetes ')
+        key = disease.strip()
+        description = self.description_dict.get(disease, self.description_dict.get(key, ''))
+        precautions = self.precaution_dict.get(disease, self.precaution_dict.get(key, []))
+        
+        return DiseaseInfo(
+            name=disease,
+            description=description,
+            precautions=tuple(precautions),
+            is_communicable=self._is_communicable(disease),
+            is_acute=self._is_acute(disease),
+            icd10_code=self._get_icd10_code(disease),
+        )
+    
+    def _lookup_disease(self, disease: str) -> DiseaseInfo:
+        """DiseaseInfo by label (for models without predict_proba); compiles unknown labels on the fly"""
+        info = self.disease_info.get(disease)
+        return info if info is not None else self._compile_disease_info(disease)
+    
     def predict(self, symptoms: List[str]) -> Dict:
         """
         Predict disease from symptoms
@@ -99,65 +257,136 @@ class MLPredictor:
         Returns:
             Dictionary with prediction results
         """
+        return self.predict_batch([symptoms])[0]
+    
+    def predict_batch(self, symptom_lists: List[List[str]], top_k: int = 3) -> List[Dict]:
+        """
+        Predict diseases for many symptom lists in one vectorized model call
+        
+        Args:
+            symptom_lists: List of symptom lists (e.g., [['fever'], ['cough', 'chills']])
+            top_k: Number of ranked predictions to include per row
+        
+        Returns:
+            List of prediction dictionaries, in the same order as the input
+        """
         if not self.model or not self.feature_names:
             raise ValueError("ML model not loaded")
         
-        # Normalize symptom names (lowercase, replace spaces with underscores)
-        normalized_symptoms = [s.lower().replace(' ', '_') for s in symptoms]
+        if not symptom_lists:
+            return []
         
-        # Create input vector
-        input_vector = np.zeros(len(self.feature_names))
-        matched_symptoms = []
+        cache = get_prediction_cache()
+        matched = [self._match_symptoms(symptoms) for symptoms in symptom_lists]
+        keys = [(self.model_hash, top_k, tuple(sorted(set(row)))) for row in matched]
         
-        for symptom in normalized_symptoms:
-            if symptom in self.feature_names:
-                idx = self.feature_names.index(symptom)
-                input_vector[idx] = 1
-                matched_symptoms.append(symptom)
+        # Serve repeated symptom combinations from the cache, score the rest in one call
+        results = [cache.get(key) for key in keys]
+        misses = [row for row, result in enumerate(results) if result is None]
+        if misses:
+            scored = self._score_batch([matched[row] for row in misses], top_k)
+            for row, result in zip(misses, scored):
+                cache.set(keys[row], result)
+                results[row] = result
         
-        # Get prediction
-        prediction = self.model.predict(input_vector.reshape(1, -1))[0]
-        
-        # Get confidence scores (initialize empty list first)
-        top_predictions = []
+        # Copy so callers can't mutate cached entries; matched_symptoms follows the caller's order
+        return [
+            dict(copy.deepcopy(result), matched_symptoms=matched[row])
+            for row, result in enumerate(results)
+        ]
+    
+    def predict_packed(self, packed: np.ndarray, top_k: int = 3) -> List[Dict]:
+        """
+        Score bit-packed symptom rows (see symptom_vectors) without building dense inputs
+        Meant for bulk scoring of stored records, so results bypass the prediction cache
+        """
+        if not self.model or not self.feature_names:
+            raise ValueError("ML model not loaded")
         
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        matched = [
+            [self.feature_names[idx] for idx in row]
+            for row in unpack_indices(packed, len(self.feature_names))
+        ]
+        return self._score_packed(packed, matched, top_k)
+    
+    def pack_symptoms(self, symptom_lists: List[List[str]]) -> np.ndarray:
+        """Encode symptom name lists as bit-packed rows for storage or predict_packed()"""
+        return self._build_input_matrix([self._match_symptoms(symptoms) for symptoms in symptom_lists])
+    
+    def _score_batch(self, matched: List[List[str]], top_k: int) -> List[Dict]:
+        """Run the model once over all rows and build (uncached) results"""
+        return self._score_packed(self._build_input_matrix(matched), matched, top_k)
+    
+    def _score_packed(self, packed: np.ndarray, matched: List[List[str]], top_k: int) -> List[Dict]:
         if hasattr(self.model, 'predict_proba'):
-            proba = self.model.predict_proba(input_vector.reshape(1, -1))[0]
-            top_3_idx = np.argsort(proba)[::-1][:3]
+            # Single pass: the label is the argmax of the probabilities
+            if hasattr(self.model, 'predict_proba_packed'):
+                proba = self.model.predict_proba_packed(packed)
+            else:
+                proba = self.model.predict_proba(self._dense(packed))
+            top_idx = np.argsort(proba, axis=1)[:, ::-1][:, :top_k]
             
-            for idx in top_3_idx:
-                disease = self.model.classes_[idx]
-                confidence = float(proba[idx])
-                top_predictions.append({
-                    'disease': disease,
-                    'confidence': confidence
-                })
-        else:
-            # Fallback if model doesn't support probability
-            top_predictions.append({
-                'disease': prediction,
-                'confidence': 0.85  # Default confidence for non-probabilistic models
-            })
-        
-        # Get disease information
-        description = self.description_dict.get(prediction, '')
-        precautions = self.precaution_dict.get(prediction, [])
-        
-        # Categorize disease
-        is_communicable = self._is_communicable(prediction)
-        is_acute = self._is_acute(prediction)
-        icd10_code = self._get_icd10_code(prediction)
+            results = []
+            for row, row_idx in enumerate(top_idx):
+                top_predictions = [
+                    {
+                        'disease': self.disease_table[idx].name,
+                        'confidence': float(proba[row, idx])
+                    }
+                    for idx in row_idx
+                ]
+                results.append(self._build_result(
+                    self.disease_table[row_idx[0]], top_predictions, matched[row]
+                ))
+            return results
         
+        # Fallback if model doesn't support probability
+        predictions = self.model.predict(self._dense(packed))
+        return [
+            self._build_result(
+                self._lookup_disease(prediction),
+                [{
+                    'disease': prediction,
+                    'confidence': 0.85  # Default confidence for non-probabilistic models
+                }],
+                matched[row]
+            )
+            for row, prediction in enumerate(predictions)
+        ]
+    
+    def _match_symptoms(self, symptoms: List[str]) -> List[str]:
+        """Normalize symptom names (lowercase, underscores) and keep those the model knows"""
+        matched_symptoms = []
+        for symptom in symptoms:
+            normalized = symptom.lower().replace(' ', '_')
+            if normalized in self.feature_index:
+                matched_symptoms.append(normalized)
+        return matched_symptoms
+    
+    def _build_input_matrix(self, matched: List[List[str]]) -> np.ndarray:
+        """Bit-pack already-matched symptoms (3 uint64 words per row instead of 132 floats)"""
+        return pack_indices(
+            [[self.feature_index[symptom] for symptom in symptoms] for symptoms in matched],
+            len(self.feature_names)
+        )
+    
+    def _dense(self, packed: np.ndarray) -> np.ndarray:
+        """Dense float32 input for scikit-learn models (the dtype they convert to anyway)"""
+        return unpack_dense(packed, len(self.feature_names), dtype=np.float32)
+    
+    def _build_result(self, info: DiseaseInfo, top_predictions: List[Dict], matched_symptoms: List[str]) -> Dict:
+        """Enrich a raw prediction with the precomputed disease information"""
         return {
-            'predicted_disease': prediction,
+            'predicted_disease': info.name,
             'confidence_score': float(top_predictions[0]['confidence']) if top_predictions else 0.0,
             'top_predictions': top_predictions,
-            'description': description,
-            'precautions': precautions,
+            'description': info.description,
+            'precautions': list(info.precautions),
             'matched_symptoms': matched_symptoms,
-            'is_communicable': is_communicable,
-            'is_acute': is_acute,
-            'icd10_code': icd10_code
+            'is_communicable': info.is_communicable,
+            'is_acute': info.is_acute,
+            'icd10_code': info.icd10_code
         }
     
     def _is_communicable(self, disease: str) -> bool:
@@ -165,42 +394,19 @@ class MLPredictor:
         disease_lower = disease.lower()
 
         # Explicitly non-communicable variations
-        if 'alcoholic hepatitis' in disease_lower:
+        if any(variant in disease_lower for variant in NON_COMMUNICABLE_VARIANTS):
             return False
 
-        communicable_diseases = [
-            'common cold', 'flu', 'tuberculosis', 'pneumonia', 'covid-19',
-            'malaria', 'dengue', 'typhoid', 'hepatitis', 'chickenpox',
-            'chicken pox', 'measles', 'mumps', 'influenza', 'aids',
-            'hiv', 'impetigo', 'gastroenteritis', 'cholera'
-        ]
-        return any(comm in disease_lower for comm in communicable_diseases)
+        return any(comm in disease_lower for comm in COMMUNICABLE_DISEASES)
     
     def _is_acute(self, disease: str) -> bool:
         """Determine if disease is acute (vs chronic)"""
-        chronic_diseases = [
-            'diabetes', 'hypertension', 'asthma', 'arthritis', 'chronic',
-            'migraine', 'allergy', 'gerd', 'osteoporosis'
-        ]
-        return not any(chronic in disease.lower() for chronic in chronic_diseases)
+        return not any(chronic in disease.lower() for chronic in CHRONIC_DISEASES)
     
     def _get_icd10_code(self, disease: str) -> str:
         """Get ICD-10 code for disease (simplified mapping)"""
-        icd10_mapping = {
-            'common cold': 'J00',
-            'influenza': 'J11',
-            'pneumonia': 'J18',
-            'diabetes': 'E11',
-            'hypertension': 'I10',
-            'asthma': 'J45',
-            'migraine': 'G43',
-            'dengue': 'A90',
-            'typhoid': 'A01',
-            'malaria': 'B54',
-        }
-        
         disease_lower = disease.lower()
-        for key, code in icd10_mapping.items():
+        for key, code in ICD10_MAPPING.items():
             if key in disease_lower:
                 return code
         
@@ -209,17 +415,56 @@ class MLPredictor:
     def get_available_symptoms(self) -> List[str]:
         """Get list of all available symptoms the model can recognize"""
         return self.feature_names if self.feature_names else []
+    
+    def is_model_loaded(self) -> bool:
+        """Check if the ML model and feature names are available"""
+        return self.model is not None and bool(self.feature_names)
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the prediction cache"""
+        return get_prediction_cache().stats()
 
 
 # Singleton instances
 _ml_predictor = None
 _ai_generator = None
+_prediction_cache = None
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Get prediction cache singleton instance (bounds from ML_PREDICTION_CACHE_SIZE / _TTL)"""
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache(
+            max_size=getattr(settings, 'ML_PREDICTION_CACHE_SIZE', 2048),
+            ttl_seconds=getattr(settings, 'ML_PREDICTION_CACHE_TTL', 3600)
+        )
+    return _prediction_cache
 
 
 def get_ml_predictor() -> MLPredictor:
-    """Get ML predictor singleton instance"""
+    """
+    Get ML predictor singleton instance
+    Uses the shared inference sidecar when ML_INFERENCE_SOCKET is configured, otherwise loads
+    the model in-process. While the sidecar is unreachable the client falls back to an
+    in-process model (loaded on first use) and re-probes every ML_INFERENCE_RETRY seconds
+    """
     global _ml_predictor
     if _ml_predictor is None:
+        socket_path = getattr(settings, 'ML_INFERENCE_SOCKET', None)
+        if socket_path:
+            from .inference_server import InferenceClient
+            _ml_predictor = InferenceClient(
+                socket_path,
+                timeout=getattr(settings, 'ML_INFERENCE_TIMEOUT', 30),
+                fallback=MLPredictor,
+                retry_seconds=getattr(settings, 'ML_INFERENCE_RETRY', 30),
+            )
+            if _ml_predictor.ping():
+                print(f"[OK] Using ML inference server at {socket_path}")
+            else:
+                print(f"[WARN] ML inference server not reachable at {socket_path}, falling back to in-process model")
+            return _ml_predictor
         _ml_predictor = MLPredictor()
     return _ml_predictor
 
@@ -547,7 +547,7 @@ class AuditLog(models.Model):
     )
     
     # When & Where
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, help_text='Request time (kept when the entry is inserted later in a batch)')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     
@@ -712,12 +712,38 @@ class EmergencyAlert(models.Model):
         return None
 
 
+class MedicationQuerySet(models.QuerySet):
+    """Medication queries that carry their adherence counts and recent logs along"""
+    
+    def with_adherence(self):
+        """Annotate logs_taken, logs_missed and logs_recorded (every non-pending log) in the same query"""
+        return self.annotate(
+            logs_taken=models.Count('logs', filter=models.Q(logs__status='taken')),
+            logs_missed=models.Count('logs', filter=models.Q(logs__status='missed')),
+            logs_recorded=models.Count('logs', filter=~models.Q(logs__status='pending')),
+        )
+    
+    def with_recent_logs(self, limit=7):
+        """Prefetch each medication's latest logs into recent_log_list (one query for all medications)"""
+        return self.prefetch_related(models.Prefetch(
+            'logs',
+            queryset=MedicationLog.objects.order_by('-scheduled_date', '-scheduled_time')[:limit],
+            to_attr='recent_log_list'
+        ))
+    
+    def for_serializer(self):
+        """Everything MedicationSerializer reads, so serializing a list costs a fixed number of queries"""
+        return self.select_related('student', 'prescribed_by').with_adherence().with_recent_logs()
+
+
 class Medication(models.Model):
     """
     Medication prescribed by clinic staff to students
     Tracks medication details, dosage schedule, and duration
     """
     
+    objects = MedicationQuerySet.as_manager()
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student = models.ForeignKey(
         CustomUser,
@@ -909,3 +935,174 @@ class MedicationLog(models.Model):
             timezone.datetime.combine(self.scheduled_date, self.scheduled_time)
         )
         return now > scheduled_datetime
+
+
+class BackgroundJob(models.Model):
+    """
+    Database-backed job queue entry (no external broker needed)
+    Claimed by `python manage.py run_job_worker`; a claim expires after the
+    visibility timeout so jobs from crashed workers are picked up again
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, help_text='Registered handler name (clinic.tasks)')
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    
+    # Scheduling & claiming
+    run_after = models.DateTimeField(default=timezone.now, help_text='Not claimed before this time (retry backoff)')
+    locked_until = models.DateTimeField(null=True, blank=True, help_text='Claim expires at this time')
+    locked_by = models.CharField(max_length=100, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'background_jobs'
+        verbose_name = 'Background Job'
+        verbose_name_plural = 'Background Jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['status', 'locked_until']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} ({self.get_status_display()}, attempt {self.attempts}/{self.max_attempts})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class ExportJob(models.Model):
+    """
+    Report export run by the background job worker (clinic/export_jobs.py)
+    Status comes from the linked BackgroundJob; this row holds the request,
+    the progress counters and the finished file under MEDIA_ROOT/exports
+    """
+    
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('excel', 'Excel'),
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC stream'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job = models.OneToOneField(BackgroundJob, on_delete=models.CASCADE, related_name='export')
+    requested_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs'
+    )
+    
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    filters = models.JSONField(default=dict, help_text='start_date, end_date, department, disease')
+    cache_key = models.CharField(max_length=64, help_text='Hash of format + filters; identical requests reuse the file')
+    
+    # Progress
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    
+    # Artifact
+    file_name = models.CharField(max_length=255, blank=True, help_text='Path relative to MEDIA_ROOT')
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'export_jobs'
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['cache_key', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_format_display()} export ({self.job.get_status_display()})"
+
+
+class DailySymptomRollup(models.Model):
+    """
+    Symptom record counts per day, department, disease and severity
+    Incremented on every SymptomRecord insert (clinic/rollups.py) and rebuilt by
+    `python manage.py refresh_rollups`, so analytics never rescan symptom_records
+    """
+    
+    date = models.DateField()
+    department = models.CharField(max_length=100, blank=True, help_text="Student's department when the record was made")
+    predicted_disease = models.CharField(max_length=100, blank=True)
+    severity = models.IntegerField(choices=SymptomRecord.SEVERITY_CHOICES, default=1)
+    
+    record_count = models.PositiveIntegerField(default=0)
+    
+    # Prediction confidence buckets (records without a score are in none of them)
+    high_confidence_count = models.PositiveIntegerField(default=0, help_text='confidence_score >= 0.8')
+    medium_confidence_count = models.PositiveIntegerField(default=0, help_text='0.6 <= confidence_score < 0.8')
+    low_confidence_count = models.PositiveIntegerField(default=0, help_text='confidence_score < 0.6')
+    
+    class Meta:
+        db_table = 'daily_symptom_rollups'
+        verbose_name = 'Daily Symptom Rollup'
+        verbose_name_plural = 'Daily Symptom Rollups'
+        ordering = ['-date']
+        unique_together = ['date', 'department', 'predicted_disease', 'severity']
+        indexes = [
+            models.Index(fields=['date', 'predicted_disease']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.department or '-'} {self.predicted_disease or '-'} (severity {self.severity}): {self.record_count}"
+
+
+class DailySymptomCount(models.Model):
+    """Reported symptom occurrences per day (symptoms JSON of SymptomRecord, unnested)"""
+    
+    date = models.DateField()
+    symptom = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'daily_symptom_counts'
+        verbose_name = 'Daily Symptom Count'
+        verbose_name_plural = 'Daily Symptom Counts'
+        ordering = ['-date']
+        unique_together = ['date', 'symptom']
+    
+    def __str__(self):
+        return f"{self.date} {self.symptom}: {self.count}"
+
+
+class DailyAuditRollup(models.Model):
+    """Audit log entries per day, action and outcome (API analytics without scanning audit_logs)"""
+    
+    date = models.DateField()
+    action = models.CharField(max_length=20, choices=AuditLog.ACTION_TYPES)
+    success = models.BooleanField(default=True)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'daily_audit_rollups'
+        verbose_name = 'Daily Audit Rollup'
+        verbose_name_plural = 'Daily Audit Rollups'
+        ordering = ['-date']
+        unique_together = ['date', 'action', 'success']
+    
+    def __str__(self):
+        return f"{self.date} {self.action} ({'ok' if self.success else 'failed'}): {self.count}"
@@ -0,0 +1,132 @@
+"""
+Keyset (Cursor) Pagination
+Opaque-cursor pages for the high-volume list endpoints
+
+Each page is `WHERE (key, pk) < (last key, last pk) ORDER BY key DESC, pk DESC
+LIMIT n` on an indexed key column, so page 1000 costs the same as page 1
+(offset pages scan and discard every earlier row). The primary key breaks ties,
+so rows sharing a key (same scheduled date, same start date) are neither
+skipped nor rescanned. Cursors are DRF's base64 `cursor` parameter; follow the
+`next` / `previous` links rather than building them.
+"""
+
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+def _reversed(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Newest first on created_at (symptom_records, emergency_alerts: created_at indexes)
+    Subclasses set `ordering` to another indexed column; ?ordering= is not honoured.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-created_at'
+
+    def get_ordering(self, request, queryset, view):
+        key = self.ordering if isinstance(self.ordering, str) else self.ordering[0]
+        return (key, '-pk' if key.startswith('-') else 'pk')
+
+    def _position(self, instance) -> str:
+        value = getattr(instance, self.ordering[0].lstrip('-'))
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        return json.dumps([value, str(instance.pk)])
+
+    def _after(self, position: str, ordering) -> Q:
+        # Rows strictly after (key, pk) in the given ordering; the leading inclusive
+        # bound keeps it an index range scan despite the OR
+        try:
+            value, pk = json.loads(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        key = ordering[0]
+        attr, op = key.lstrip('-'), 'lt' if key.startswith('-') else 'gt'
+        return Q(**{f'{attr}__{op}e': value}) & (Q(**{f'{attr}__{op}': value}) | Q(**{attr: value, f'pk__{op}': pk}))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        ordering = _reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, ordering))
+
+        # One extra row tells whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        # An empty backwards page means the cursor was already at the start
+        position = self._position(self.page[-1]) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.cursor.position))
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+
+class AuditLogPagination(KeysetPagination):
+    """Newest first on audit_logs.timestamp (-timestamp index)"""
+    ordering = '-timestamp'
+
+
+class EmergencyHistoryPagination(KeysetPagination):
+    page_size = 20
+
+
+class FollowUpReviewPagination(KeysetPagination):
+    """Latest scheduled first ((scheduled_date, status) index)"""
+    ordering = '-scheduled_date'
+
+
+class MedicationPagination(KeysetPagination):
+    """Latest courses first ((start_date, end_date) index)"""
+    ordering = '-start_date'
+
+
+def paginate(paginator, queryset, request):
+    """
+    Page a function view's queryset; returns (page, extra response keys)
+    The extra keys (next, previous) go next to the view's own list key
+    """
+    page = paginator.paginate_queryset(queryset, request)
+    return page, {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+    }
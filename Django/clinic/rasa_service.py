@@ -4,9 +4,14 @@ Handles primary chat conversations with LLM fallback
 """
 
 import logging
+import threading
+import time
 import requests
 from typing import Dict, Optional
 from django.conf import settings
+from django.core.cache import cache
+
+from .http_pool import get_http_session
 
 
 class RasaChatService:
@@ -37,6 +42,12 @@ class RasaChatService:
         # Confidence threshold for Rasa responses
         self.confidence_threshold = getattr(settings, 'RASA_CONFIDENCE_THRESHOLD', 0.6)
         
+        # Keep-alive connection pool shared by all Rasa calls
+        self.session = get_http_session('rasa', read_timeout=self.rasa_timeout)
+        
+        # Availability is cached (shared by all workers) and refreshed in the background
+        self.status_ttl = getattr(settings, 'RASA_STATUS_TTL', 30)
+        
         self.logger.info(f"Rasa Chat Service initialized (enabled={self.rasa_enabled}, url={self.rasa_url})")
     
     def send_message(self, message: str, sender_id: str, metadata: dict = None) -> Optional[Dict]:
@@ -68,13 +79,15 @@ class RasaChatService:
                 payload["metadata"] = metadata
             
             # Send request to Rasa
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json=payload,
-                timeout=self.rasa_timeout,
                 headers={"Content-Type": "application/json"}
             )
             
+            # Real traffic doubles as a health check
+            self._set_available(response.status_code < 500, source='send_message')
+            
             if response.status_code == 200:
                 rasa_responses = response.json()
                 
@@ -125,27 +138,72 @@ class RasaChatService:
                 
         except requests.exceptions.Timeout:
             self.logger.error(f"Rasa timeout after {self.rasa_timeout}s")
+            self._set_available(False, source='send_message')
             return None
         except requests.exceptions.ConnectionError:
             self.logger.error(f"Cannot connect to Rasa at {self.rasa_url}")
+            self._set_available(False, source='send_message')
             return None
         except Exception as e:
             self.logger.error(f"Rasa error: {e}")
             return None
     
+    STATUS_CACHE_KEY = 'rasa:availability'
+    PROBE_LOCK_KEY = 'rasa:availability:probe'
+    
     def is_available(self) -> bool:
-        """Check if Rasa server is available"""
+        """
+        Last known Rasa availability, without a network round-trip
+        
+        The state comes from the Django cache (updated by send_message outcomes and
+        status probes). When it is older than RASA_STATUS_TTL, one worker re-probes
+        in a background thread while callers keep getting the last known value.
+        """
         if not self.rasa_enabled:
             return False
         
+        state = cache.get(self.STATUS_CACHE_KEY)
+        if state is None or time.time() - state['checked_at'] > self.status_ttl:
+            self._refresh_in_background()
+        return bool(state and state['available'])
+    
+    def availability(self) -> Dict:
+        """Cached availability state for monitoring ({available, checked_at, source} or unknown)"""
+        if not self.rasa_enabled:
+            return {'available': False, 'source': 'disabled'}
+        state = cache.get(self.STATUS_CACHE_KEY)
+        if state is None:
+            return {'available': None, 'source': 'unknown'}
+        return {**state, 'age_seconds': round(time.time() - state['checked_at'], 1)}
+    
+    def probe(self) -> bool:
+        """Blocking GET /status (2 s timeout) that updates the cached availability"""
         try:
-            response = requests.get(
-                f"{self.rasa_url}/status",
-                timeout=2
-            )
-            return response.status_code == 200
-        except:
-            return False
+            available = self.session.get(f"{self.rasa_url}/status", timeout=2).status_code == 200
+        except requests.RequestException:
+            available = False
+        self._set_available(available, source='probe')
+        return available
+    
+    def _set_available(self, available: bool, source: str):
+        # Outlives the TTL so a stale value is still served while the refresh runs
+        cache.set(
+            self.STATUS_CACHE_KEY,
+            {'available': available, 'checked_at': time.time(), 'source': source},
+            timeout=max(self.status_ttl * 10, 300)
+        )
+    
+    def _refresh_in_background(self):
+        # cache.add is atomic, so only one worker probes per refresh window
+        if not cache.add(self.PROBE_LOCK_KEY, 1, timeout=self.status_ttl):
+            return
+        threading.Thread(target=self._probe_quietly, name='rasa-status-probe', daemon=True).start()
+    
+    def _probe_quietly(self):
+        try:
+            self.probe()
+        except Exception as e:
+            self.logger.error(f"Rasa status probe failed: {e}")
     
     def should_use_llm_fallback(self, rasa_response: Optional[Dict]) -> bool:
         """
@@ -188,7 +246,7 @@ class RasaChatService:
         """
         try:
             url = f"{self.rasa_url}/conversations/{sender_id}/tracker"
-            response = requests.get(url, timeout=self.rasa_timeout)
+            response = self.session.get(url)
             
             if response.status_code == 200:
                 tracker = response.json()
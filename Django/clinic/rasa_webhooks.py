@@ -6,8 +6,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from .ml_service import get_ml_predictor
-from .llm_service import AIInsightGenerator
+from .job_queue import enqueue
+from .tasks import PREDICTION_ENRICHMENT, enrich_prediction
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +39,10 @@ def rasa_webhook_predict(request):
         "precautions": [...],
         "insights": [...]  # if generate_insights=true
     }
+    
+    With LLM_ENRICHMENT_ASYNC, generate_insights=true returns the ML result at once plus
+    "enrichment": {"job_id", "status", "status_url"}; poll GET /api/jobs/<job_id>/ for
+    the validated confidence, llm_validation and insights.
     """
     try:
         # Validate request
@@ -53,39 +59,12 @@ def rasa_webhook_predict(request):
         predictor = get_ml_predictor()
         prediction = predictor.predict(symptoms)
         
-        # HYBRID: Use LLM to validate ML prediction (FREE tier)
-        llm_validation = None
-        validation_confidence_boost = 0.0
-        
-        if generate_insights:
-            try:
-                llm_validator = AIInsightGenerator()
-                llm_validation = llm_validator.validate_ml_prediction(
-                    symptoms=symptoms,
-                    ml_prediction=prediction.get('predicted_disease'),
-                    ml_confidence=prediction.get('confidence_score')
-                )
-                
-                # Boost confidence if LLM agrees
-                if llm_validation and llm_validation.get('agrees_with_ml'):
-                    validation_confidence_boost = llm_validation.get('confidence_boost', 0.05)
-                    logger.info(f"LLM validated ML prediction: {llm_validation.get('reasoning')}")
-                
-            except Exception as e:
-                logger.warning(f"LLM validation failed (continuing with ML only): {e}")
-        
-        # Calculate final confidence (ML + LLM validation boost)
-        final_confidence = min(
-            prediction.get('confidence_score', 0.0) + validation_confidence_boost,
-            1.0  # Cap at 100%
-        )
-        
-        # Prepare response
+        # Prepare response (ML result only; LLM enrichment is merged in below)
         response_data = {
             'predicted_disease': prediction.get('predicted_disease'),
-            'confidence': final_confidence,
+            'confidence': prediction.get('confidence_score', 0.0),
             'ml_confidence': prediction.get('confidence_score'),  # Original ML score
-            'llm_validated': llm_validation is not None,
+            'llm_validated': False,
             'top_predictions': prediction.get('top_predictions', [])[:3],
             'description': prediction.get('description'),
             'precautions': prediction.get('precautions', []),
@@ -95,29 +74,27 @@ def rasa_webhook_predict(request):
             'matched_symptoms': prediction.get('matched_symptoms', [])
         }
         
-        # Add LLM validation results to response
-        if llm_validation:
-            response_data['llm_validation'] = {
-                'agrees': llm_validation.get('agrees_with_ml'),
-                'reasoning': llm_validation.get('reasoning'),
-                'confidence_boost': validation_confidence_boost,
-                'alternative_diagnosis': llm_validation.get('alternative_diagnosis')
-            }
-        
-        # Generate AI insights if requested (optional, uses LLM)
+        # HYBRID: LLM validation + insights (optional, uses LLM)
         if generate_insights:
-            try:
-                ai_generator = AIInsightGenerator()
-                insights = ai_generator.generate_health_insights(
-                    symptoms=symptoms,
-                    predictions=prediction
-                )
-                response_data['insights'] = insights
-            except Exception as e:
-                logger.error(f"Failed to generate insights: {e}")
-                response_data['insights'] = []
+            if getattr(settings, 'LLM_ENRICHMENT_ASYNC', False):
+                # Answer with the ML result now; a job worker adds validation and insights
+                job = enqueue(PREDICTION_ENRICHMENT, {
+                    'symptoms': symptoms,
+                    'prediction': {
+                        'predicted_disease': prediction.get('predicted_disease'),
+                        'confidence_score': prediction.get('confidence_score', 0.0),
+                    },
+                    'sender_id': sender_id,
+                })
+                response_data['enrichment'] = {
+                    'job_id': str(job.id),
+                    'status': job.status,
+                    'status_url': request.build_absolute_uri(f'/api/jobs/{job.id}/'),
+                }
+            else:
+                response_data.update(enrich_prediction(symptoms, prediction))
         
-        logger.info(f"Rasa webhook prediction for {sender_id}: {prediction.get('predicted_disease')} (confidence: {final_confidence:.2f}, validated: {llm_validation is not None})")
+        logger.info(f"Rasa webhook prediction for {sender_id}: {prediction.get('predicted_disease')} (confidence: {response_data['confidence']:.2f}, validated: {response_data['llm_validated']})")
         
         return Response(response_data)
         
@@ -0,0 +1,207 @@
+"""
+Daily Rollups
+Maintains DailySymptomRollup, DailySymptomCount and DailyAuditRollup
+
+Inserts increment the matching rows (post_save signals, connected in
+ClinicConfig.ready). `python manage.py refresh_rollups` recomputes whole days
+from the raw tables: backfills, and days whose records were edited or deleted.
+"""
+
+import logging
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .analytics import symptom_frequencies
+from .models import AuditLog, DailyAuditRollup, DailySymptomCount, DailySymptomRollup, SymptomRecord
+
+logger = logging.getLogger(__name__)
+
+HIGH_CONFIDENCE = 0.8
+MEDIUM_CONFIDENCE = 0.6
+
+SYMPTOM_MAX_LENGTH = DailySymptomCount._meta.get_field('symptom').max_length
+
+
+def confidence_bucket(score: Optional[float]) -> Optional[str]:
+    """Rollup counter field for a prediction confidence score (None when there is no score)"""
+    if score is None:
+        return None
+    if score >= HIGH_CONFIDENCE:
+        return 'high_confidence_count'
+    if score >= MEDIUM_CONFIDENCE:
+        return 'medium_confidence_count'
+    return 'low_confidence_count'
+
+
+def symptom_names(symptoms) -> List[str]:
+    """Symptom strings of a record's symptoms JSON, cut to the rollup column length"""
+    if not isinstance(symptoms, list):
+        return []
+    return [str(symptom)[:SYMPTOM_MAX_LENGTH] for symptom in symptoms]
+
+
+def _increment(model, keys: Dict, counts: Dict[str, int]):
+    # UPDATE first: after the first insert of the day this is the only statement
+    increments = {field: F(field) + n for field, n in counts.items()}
+    if model.objects.filter(**keys).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **counts)
+    except IntegrityError:
+        # Another request created the row between our UPDATE and INSERT
+        model.objects.filter(**keys).update(**increments)
+
+
+def add_symptom_record(record: SymptomRecord):
+    """Count a newly created symptom record in its day's rollups"""
+    day = timezone.localdate(record.created_at)
+
+    counts = {'record_count': 1}
+    bucket = confidence_bucket(record.confidence_score)
+    if bucket:
+        counts[bucket] = 1
+    _increment(DailySymptomRollup, {
+        'date': day,
+        'department': record.student.department or '',
+        'predicted_disease': record.predicted_disease or '',
+        'severity': record.severity,
+    }, counts)
+
+    for symptom, count in Counter(symptom_names(record.symptoms)).items():
+        _increment(DailySymptomCount, {'date': day, 'symptom': symptom}, {'count': count})
+
+
+def add_audit_logs(logs: Iterable[AuditLog]):
+    """Count newly created audit log entries in their day's rollups"""
+    counts = Counter((timezone.localdate(log.timestamp), log.action, log.success) for log in logs)
+    for (day, action, success), count in counts.items():
+        _increment(DailyAuditRollup, {'date': day, 'action': action, 'success': success}, {'count': count})
+
+
+@receiver(post_save, sender=SymptomRecord, dispatch_uid='rollups_symptom_record')
+def _symptom_record_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    try:
+        with transaction.atomic():
+            add_symptom_record(instance)
+    except Exception as e:
+        # The catch-up command repairs the day; never fail the submission itself
+        logger.error(f"Symptom rollup update failed for record {instance.id}: {e}")
+
+
+@receiver(post_save, sender=AuditLog, dispatch_uid='rollups_audit_log')
+def _audit_log_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    try:
+        with transaction.atomic():
+            add_audit_logs([instance])
+    except Exception as e:
+        logger.error(f"Audit rollup update failed for log {instance.id}: {e}")
+
+
+def rebuild_symptom_rollups(start_date: date, end_date: date) -> int:
+    """Recompute symptom rollups and symptom counts for start_date..end_date from symptom_records"""
+    records = SymptomRecord.objects.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
+    groups = (
+        records.annotate(day=TruncDate('created_at'))
+        .values('day', 'student__department', 'predicted_disease', 'severity')
+        .annotate(
+            record_count=Count('id'),
+            high=Count('id', filter=Q(confidence_score__gte=HIGH_CONFIDENCE)),
+            medium=Count('id', filter=Q(confidence_score__gte=MEDIUM_CONFIDENCE, confidence_score__lt=HIGH_CONFIDENCE)),
+            low=Count('id', filter=Q(confidence_score__lt=MEDIUM_CONFIDENCE)),
+        )
+        .order_by()
+    )
+    rollups = [
+        DailySymptomRollup(
+            date=group['day'],
+            department=group['student__department'] or '',
+            predicted_disease=group['predicted_disease'] or '',
+            severity=group['severity'],
+            record_count=group['record_count'],
+            high_confidence_count=group['high'],
+            medium_confidence_count=group['medium'],
+            low_confidence_count=group['low'],
+        )
+        for group in groups
+    ]
+
+    # One unnest query per day that has records
+    symptom_counts = []
+    for day in sorted({rollup.date for rollup in rollups}):
+        day_counts = Counter()
+        for row in symptom_frequencies(records.filter(created_at__date=day), limit=None):
+            day_counts[str(row['symptom'])[:SYMPTOM_MAX_LENGTH]] += row['count']
+        symptom_counts.extend(
+            DailySymptomCount(date=day, symptom=symptom, count=count) for symptom, count in day_counts.items()
+        )
+
+    with transaction.atomic():
+        DailySymptomRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailySymptomCount.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailySymptomRollup.objects.bulk_create(rollups, batch_size=500)
+        DailySymptomCount.objects.bulk_create(symptom_counts, batch_size=500)
+    return len(rollups)
+
+
+def rebuild_audit_rollups(start_date: date, end_date: date) -> int:
+    """Recompute audit rollups for start_date..end_date from audit_logs"""
+    groups = (
+        AuditLog.objects.filter(timestamp__date__gte=start_date, timestamp__date__lte=end_date)
+        .annotate(day=TruncDate('timestamp'))
+        .values('day', 'action', 'success')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    rollups = [
+        DailyAuditRollup(date=group['day'], action=group['action'], success=group['success'], count=group['count'])
+        for group in groups
+    ]
+
+    with transaction.atomic():
+        DailyAuditRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailyAuditRollup.objects.bulk_create(rollups, batch_size=500)
+    return len(rollups)
+
+
+def rebuild_rollups(start_date: date, end_date: date) -> Dict[str, int]:
+    """Recompute every rollup table for start_date..end_date (inclusive); returns rows written per table"""
+    return {
+        'symptom_rollups': rebuild_symptom_rollups(start_date, end_date),
+        'audit_rollups': rebuild_audit_rollups(start_date, end_date),
+    }
+
+
+def first_raw_date() -> Optional[date]:
+    """Day of the oldest symptom record or audit log entry (None when both tables are empty)"""
+    firsts = [
+        SymptomRecord.objects.aggregate(first=Min('created_at'))['first'],
+        AuditLog.objects.aggregate(first=Min('timestamp'))['first'],
+    ]
+    firsts = [timezone.localdate(moment) for moment in firsts if moment is not None]
+    return min(firsts) if firsts else None
+
+
+def catch_up_start() -> Optional[date]:
+    """
+    First day a catch-up run must rebuild: the latest day already rolled up
+    (it may have been partial), or the first raw record when nothing is rolled up yet
+    """
+    latest = [
+        DailySymptomRollup.objects.aggregate(day=Max('date'))['day'],
+        DailyAuditRollup.objects.aggregate(day=Max('date'))['day'],
+    ]
+    latest = [day for day in latest if day is not None]
+    return min(latest) if latest else first_raw_date()
@@ -259,16 +259,21 @@ class MedicationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'prescribed_by']
     
     def get_recent_logs(self, obj):
-        """Get last 7 logs"""
-        logs = obj.logs.all()[:7]
+        """Get last 7 logs (prefetched by Medication.objects.with_recent_logs() when available)"""
+        logs = getattr(obj, 'recent_log_list', None)
+        if logs is None:
+            logs = obj.logs.all()[:7]
         return MedicationLogSerializer(logs, many=True).data
     
     def get_adherence_rate(self, obj):
-        """Calculate adherence percentage"""
-        total_logs = obj.logs.exclude(status='pending').count()
+        """Calculate adherence percentage (from Medication.objects.with_adherence() annotations when present)"""
+        if hasattr(obj, 'logs_recorded'):
+            total_logs, taken_logs = obj.logs_recorded, obj.logs_taken
+        else:
+            total_logs = obj.logs.exclude(status='pending').count()
+            taken_logs = obj.logs.filter(status='taken').count() if total_logs else 0
         if total_logs == 0:
             return None
-        taken_logs = obj.logs.filter(status='taken').count()
         return round((taken_logs / total_logs) * 100, 1)
 
 
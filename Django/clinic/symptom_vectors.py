@@ -0,0 +1,84 @@
+"""
+Compact Symptom Vectors
+Bit-packed symptom sets shared by the predictor, the ML scripts and analytics
+
+Bit i of a row is feature i, stored in little-endian uint64 words, so a
+132-symptom row takes 3 words (24 bytes) instead of 132 float64 values (1056 bytes).
+Only NumPy is imported here so ML/scripts can use it without Django settings.
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+WORD_BITS = 64
+
+# Rows per chunk when unpacking large arrays (bounds the temporary dense matrix)
+UNPACK_CHUNK_ROWS = 65536
+
+
+def n_words(n_features: int) -> int:
+    """Number of uint64 words needed per row"""
+    return (n_features + WORD_BITS - 1) // WORD_BITS
+
+
+def indices_from_symptoms(symptoms: Iterable[str], feature_index: Dict[str, int]) -> np.ndarray:
+    """Sorted column indices of the known symptoms (unknown names are ignored)"""
+    return np.array(
+        sorted({feature_index[s] for s in symptoms if s in feature_index}), dtype=np.int64
+    )
+
+
+def pack_indices(index_lists: List[Iterable[int]], n_features: int) -> np.ndarray:
+    """Pack per-row column index lists into a (n_rows, n_words) uint64 array"""
+    index_lists = [np.asarray(idx, dtype=np.int64).ravel() for idx in index_lists]
+    packed = np.zeros((len(index_lists), n_words(n_features)), dtype=np.uint64)
+    if not index_lists:
+        return packed
+
+    cols = np.concatenate(index_lists)
+    if cols.size and (cols.min() < 0 or cols.max() >= n_features):
+        raise ValueError(f"Symptom index out of range for {n_features} features")
+    rows = np.repeat(np.arange(len(index_lists)), [len(idx) for idx in index_lists])
+
+    bits = np.left_shift(np.uint64(1), (cols % WORD_BITS).astype(np.uint64))
+    np.bitwise_or.at(packed, (rows, cols // WORD_BITS), bits)
+    return packed
+
+
+def unpack_indices(packed: np.ndarray, n_features: int) -> List[np.ndarray]:
+    """Column indices set in each packed row"""
+    dense = unpack_dense(packed, n_features, dtype=np.bool_)
+    return [np.flatnonzero(row) for row in dense]
+
+
+def pack_dense(X: np.ndarray) -> np.ndarray:
+    """Pack a dense binary matrix (any dtype, non-zero = present) into uint64 words"""
+    X = np.atleast_2d(np.asarray(X)) != 0
+    width = n_words(X.shape[1]) * WORD_BITS
+    if width != X.shape[1]:
+        X = np.pad(X, ((0, 0), (0, width - X.shape[1])))
+    return np.packbits(X, axis=1, bitorder='little').view('<u8').astype(np.uint64, copy=False)
+
+
+def unpack_dense(packed: np.ndarray, n_features: int, dtype=np.float32) -> np.ndarray:
+    """Expand packed rows into a dense (n_rows, n_features) matrix"""
+    packed = np.ascontiguousarray(np.atleast_2d(packed), dtype='<u8')
+    as_bytes = packed.view(np.uint8).reshape(packed.shape[0], -1)
+    return np.unpackbits(as_bytes, axis=1, count=n_features, bitorder='little').astype(dtype, copy=False)
+
+
+def get_bits(packed: np.ndarray, rows: np.ndarray, features: np.ndarray) -> np.ndarray:
+    """Read single bits (0/1) at broadcast (row, feature) positions without unpacking"""
+    words = packed[rows, features // WORD_BITS]
+    return (words >> (features % WORD_BITS).astype(np.uint64)) & np.uint64(1)
+
+
+def symptom_counts(packed: np.ndarray, n_features: int) -> np.ndarray:
+    """How many rows have each symptom (column sums), unpacked in bounded chunks"""
+    packed = np.atleast_2d(packed)
+    counts = np.zeros(n_features, dtype=np.int64)
+    for start in range(0, packed.shape[0], UNPACK_CHUNK_ROWS):
+        chunk = unpack_dense(packed[start:start + UNPACK_CHUNK_ROWS], n_features, dtype=np.uint8)
+        counts += chunk.sum(axis=0, dtype=np.int64)
+    return counts
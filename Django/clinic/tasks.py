@@ -0,0 +1,76 @@
+"""
+Background job handlers (run by `python manage.py run_job_worker`)
+"""
+
+import logging
+from typing import Dict, List
+
+from .export_jobs import REPORT_EXPORT, run_export
+from .job_queue import register
+from .llm_service import AIInsightGenerator
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_ENRICHMENT = 'prediction_enrichment'
+
+
+def enrich_prediction(symptoms: List[str], prediction: Dict) -> Dict:
+    """
+    LLM validation of an ML prediction followed by health insights
+
+    Returns the fields rasa_webhook_predict merges into its response: confidence,
+    llm_validated, llm_validation (when validated) and insights
+    """
+    generator = AIInsightGenerator()
+    ml_confidence = prediction.get('confidence_score', 0.0)
+
+    # HYBRID: Use LLM to validate ML prediction (FREE tier)
+    llm_validation = None
+    validation_confidence_boost = 0.0
+    try:
+        llm_validation = generator.validate_ml_prediction(
+            symptoms=symptoms,
+            ml_prediction=prediction.get('predicted_disease'),
+            ml_confidence=ml_confidence
+        )
+
+        # Boost confidence if LLM agrees
+        if llm_validation and llm_validation.get('agrees_with_ml'):
+            validation_confidence_boost = llm_validation.get('confidence_boost', 0.05)
+            logger.info(f"LLM validated ML prediction: {llm_validation.get('reasoning')}")
+    except Exception as e:
+        logger.warning(f"LLM validation failed (continuing with ML only): {e}")
+
+    enrichment = {
+        # Calculate final confidence (ML + LLM validation boost), capped at 100%
+        'confidence': min(ml_confidence + validation_confidence_boost, 1.0),
+        'llm_validated': llm_validation is not None,
+    }
+
+    if llm_validation:
+        enrichment['llm_validation'] = {
+            'agrees': llm_validation.get('agrees_with_ml'),
+            'reasoning': llm_validation.get('reasoning'),
+            'confidence_boost': validation_confidence_boost,
+            'alternative_diagnosis': llm_validation.get('alternative_diagnosis')
+        }
+
+    try:
+        enrichment['insights'] = generator.generate_health_insights(symptoms=symptoms, predictions=prediction)
+    except Exception as e:
+        logger.error(f"Failed to generate insights: {e}")
+        enrichment['insights'] = []
+
+    return enrichment
+
+
+@register(PREDICTION_ENRICHMENT)
+def run_prediction_enrichment(payload: Dict) -> Dict:
+    """payload: {"symptoms": [...], "prediction": {"predicted_disease", "confidence_score"}, "sender_id"}"""
+    return enrich_prediction(payload['symptoms'], payload['prediction'])
+
+
+@register(REPORT_EXPORT)
+def run_report_export(payload: Dict) -> Dict:
+    """payload: {"export_id": ...}; writes the ExportJob's file under MEDIA_ROOT/exports"""
+    return run_export(payload['export_id'])
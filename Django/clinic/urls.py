@@ -37,14 +37,21 @@ urlpatterns = [
     # AI Chat endpoints
     path('chat/start/', views.start_chat_session, name='start-chat'),
     path('chat/message/', views.send_chat_message, name='send-message'),
+    path('chat/message/stream/', views.stream_chat_message, name='stream-message'),
     path('chat/insights/', views.generate_insights, name='generate-insights'),
     path('chat/end/', views.end_chat_session, name='end-chat'),
     
+    # Background jobs
+    path('jobs/<uuid:job_id>/', views.background_job_status, name='job-status'),
+    
     # Clinic staff endpoints
     path('staff/dashboard/', views.clinic_dashboard, name='dashboard'),
     path('staff/students/', views.student_directory, name='students'),
     path('staff/analytics/', views.staff_analytics, name='analytics'),
     path('staff/export/', views.export_report, name='export'),
+    path('staff/exports/', views.export_job_create, name='export-job-create'),
+    path('staff/exports/<uuid:export_id>/', views.export_job_status, name='export-job-status'),
+    path('staff/exports/<uuid:export_id>/download/', views.export_job_download, name='export-job-download'),
     
     # Emergency SOS endpoints
     path('emergency/trigger/', views.trigger_emergency, name='emergency-trigger'),
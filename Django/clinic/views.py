@@ -6,17 +6,28 @@ Implements all endpoints for student and clinic staff
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer, BaseRenderer
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, get_user_model
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.urls import reverse
+from django.db import transaction
+from django.db.models import Count, IntegerField, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from datetime import timedelta
 import uuid
+import json
+import os
 import logging
 import requests
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.core.exceptions import ValidationError
 
-from .models import SymptomRecord, HealthInsight, ChatSession, ConsentLog, AuditLog, DepartmentStats, EmergencyAlert, Medication, MedicationLog, FollowUp
+from .models import SymptomRecord, HealthInsight, ChatSession, ConsentLog, AuditLog, DepartmentStats, EmergencyAlert, Medication, MedicationLog, FollowUp, BackgroundJob, DailySymptomRollup, ExportJob
 from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer,
     SymptomRecordSerializer, SymptomSubmissionSerializer,
@@ -30,6 +41,18 @@ from .serializers import (
 )
 from .permissions import IsStudent, IsClinicStaff, IsOwnerOrStaff, CanModifyProfile, HasDataConsent
 from .ml_service import get_ml_predictor
+from .analytics import rollup_daily_counts, rollup_symptom_frequencies
+from .department_stats import refresh_department_stats, stats_freshness
+from .medication_schedule import materialization_horizon, materialize_logs
+from .exports import (
+    ARROW_STREAM_CONTENT_TYPE, EXPORT_FORMATS, PARQUET_CONTENT_TYPE,
+    export_queryset, parquet_file, stream_arrow, stream_csv, xlsx_file,
+)
+from .export_jobs import export_path, file_range_response, normalize_filters, request_export
+from .pagination import (
+    AuditLogPagination, EmergencyHistoryPagination, FollowUpReviewPagination,
+    KeysetPagination, MedicationPagination, paginate,
+)
 
 logger = logging.getLogger(__name__)
 from .llm_service import AIInsightGenerator
@@ -211,6 +234,7 @@ class SymptomRecordViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SymptomRecordSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrStaff]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -341,6 +365,90 @@ def start_chat_session(request):
     }, status=status.HTTP_201_CREATED)
 
 
+# Canned chat replies when the LLM fallback itself fails
+CHAT_TIMEOUT_RESPONSE = "I apologize for the delay. The system is experiencing high load. Please try again in a moment, or consult with our clinic staff for immediate assistance."
+CHAT_ERROR_RESPONSE = "Thank you for your message. I'm experiencing technical difficulties. Please consult with our clinic staff for proper evaluation of your symptoms."
+
+
+def _fallback_diagnosis(message):
+    """
+    Extract known symptoms from a free-text message and run the ML prediction
+    Used when the LLM answers instead of Rasa; returns diagnosis data or None
+    """
+    try:
+        predictor = get_ml_predictor()
+        available_symptoms = predictor.get_available_symptoms()
+        
+        # Simple symptom extraction from message
+        message_lower = message.lower().replace(' ', '_')
+        extracted_symptoms = [s for s in available_symptoms if s in message_lower]
+        
+        # If we found symptoms, get ML prediction
+        if extracted_symptoms:
+            prediction = predictor.predict(extracted_symptoms)
+            logger.info(f"LLM fallback: extracted {len(extracted_symptoms)} symptoms, predicted {prediction.get('predicted_disease')}")
+            return {
+                'symptoms': extracted_symptoms,
+                'predicted_disease': prediction.get('predicted_disease'),
+                'confidence': prediction.get('confidence_score', 0.0),
+                'top_predictions': prediction.get('top_predictions', []),
+                'is_communicable': prediction.get('is_communicable', False),
+                'is_acute': prediction.get('is_acute', False),
+                'icd10_code': prediction.get('icd10_code', ''),
+                'severity': 'moderate',
+                'duration_days': 1
+            }
+    except Exception as extract_error:
+        logger.warning(f"Could not extract symptoms from LLM fallback message: {extract_error}")
+    return None
+
+
+def _save_chat_diagnosis(user, diagnosis_data):
+    """Save a chat diagnosis as a symptom record with a follow-up; returns the record id or None"""
+    if not diagnosis_data or not diagnosis_data.get('predicted_disease'):
+        return None
+    
+    try:
+        # Extract symptoms from diagnosis data or session metadata
+        symptoms = diagnosis_data.get('symptoms', [])
+        
+        # Convert severity string to integer (1=Mild, 2=Moderate, 3=Severe)
+        severity_map = {'mild': 1, 'moderate': 2, 'severe': 3}
+        severity_value = diagnosis_data.get('severity', 'moderate')
+        if isinstance(severity_value, str):
+            severity_int = severity_map.get(severity_value.lower(), 2)  # Default to moderate (2)
+        else:
+            severity_int = int(severity_value) if severity_value else 2
+        
+        # Create symptom record for history tracking
+        record = SymptomRecord.objects.create(
+            student=user,
+            symptoms=symptoms,
+            duration_days=diagnosis_data.get('duration_days', 1),
+            severity=severity_int,
+            predicted_disease=diagnosis_data['predicted_disease'],
+            confidence_score=diagnosis_data.get('confidence', 0.0),
+            top_predictions=diagnosis_data.get('top_predictions', []),
+            is_communicable=diagnosis_data.get('is_communicable', False),
+            is_acute=diagnosis_data.get('is_acute', False),
+            icd10_code=diagnosis_data.get('icd10_code', '')
+        )
+        
+        # Check referral criteria
+        record.check_referral_criteria()
+        record.save()
+        
+        # Auto-create follow-up (3 days from now)
+        FollowUp.create_from_symptom(record, days_ahead=3)
+        
+        logger.info(f"Created symptom record {record.id} from chat diagnosis")
+        return str(record.id)
+    
+    except Exception as e:
+        logger.error(f"Failed to create symptom record from chat: {e}")
+        return None
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsStudent, HasDataConsent])
 def send_chat_message(request):
@@ -398,42 +506,17 @@ def send_chat_message(request):
                     raise ValueError("LLM returned empty response")
             except requests.exceptions.Timeout as timeout_error:
                 logger.error(f"LLM call timed out: {timeout_error}")
-                response_text = "I apologize for the delay. The system is experiencing high load. Please try again in a moment, or consult with our clinic staff for immediate assistance."
+                response_text = CHAT_TIMEOUT_RESPONSE
             except Exception as llm_error:
                 logger.error(f"LLM fallback failed: {llm_error}")
                 # Ultimate fallback - hardcoded response
-                response_text = "Thank you for your message. I'm experiencing technical difficulties. Please consult with our clinic staff for proper evaluation of your symptoms."
+                response_text = CHAT_ERROR_RESPONSE
             
             response_source = "llm_fallback"
             buttons = []
             
             # Try to extract symptoms from message and get ML prediction for LLM fallback
-            diagnosis_data = None
-            try:
-                predictor = get_ml_predictor()
-                available_symptoms = predictor.get_available_symptoms()
-                
-                # Simple symptom extraction from message
-                message_lower = message.lower().replace(' ', '_')
-                extracted_symptoms = [s for s in available_symptoms if s in message_lower]
-                
-                # If we found symptoms, get ML prediction
-                if extracted_symptoms:
-                    prediction = predictor.predict(extracted_symptoms)
-                    diagnosis_data = {
-                        'symptoms': extracted_symptoms,
-                        'predicted_disease': prediction.get('predicted_disease'),
-                        'confidence': prediction.get('confidence_score', 0.0),
-                        'top_predictions': prediction.get('top_predictions', []),
-                        'is_communicable': prediction.get('is_communicable', False),
-                        'is_acute': prediction.get('is_acute', False),
-                        'icd10_code': prediction.get('icd10_code', ''),
-                        'severity': 'moderate',
-                        'duration_days': 1
-                    }
-                    logger.info(f"LLM fallback: extracted {len(extracted_symptoms)} symptoms, predicted {prediction.get('predicted_disease')}")
-            except Exception as extract_error:
-                logger.warning(f"Could not extract symptoms from LLM fallback message: {extract_error}")
+            diagnosis_data = _fallback_diagnosis(message)
         else:
             # Use Rasa response (Rasa handles conversation flow)
             response_text = rasa_response['text']
@@ -444,46 +527,7 @@ def send_chat_message(request):
             diagnosis_data = rasa_response.get('custom', {}).get('diagnosis')
         
         # Step 3: Save symptom record if diagnosis was provided
-        record_id = None
-        if diagnosis_data and diagnosis_data.get('predicted_disease'):
-            try:
-                # Extract symptoms from diagnosis data or session metadata
-                symptoms = diagnosis_data.get('symptoms', [])
-                
-                # Convert severity string to integer (1=Mild, 2=Moderate, 3=Severe)
-                severity_map = {'mild': 1, 'moderate': 2, 'severe': 3}
-                severity_value = diagnosis_data.get('severity', 'moderate')
-                if isinstance(severity_value, str):
-                    severity_int = severity_map.get(severity_value.lower(), 2)  # Default to moderate (2)
-                else:
-                    severity_int = int(severity_value) if severity_value else 2
-                
-                # Create symptom record for history tracking
-                record = SymptomRecord.objects.create(
-                    student=request.user,
-                    symptoms=symptoms,
-                    duration_days=diagnosis_data.get('duration_days', 1),
-                    severity=severity_int,
-                    predicted_disease=diagnosis_data['predicted_disease'],
-                    confidence_score=diagnosis_data.get('confidence', 0.0),
-                    top_predictions=diagnosis_data.get('top_predictions', []),
-                    is_communicable=diagnosis_data.get('is_communicable', False),
-                    is_acute=diagnosis_data.get('is_acute', False),
-                    icd10_code=diagnosis_data.get('icd10_code', '')
-                )
-                
-                # Check referral criteria
-                record.check_referral_criteria()
-                record.save()
-                
-                # Auto-create follow-up (3 days from now)
-                FollowUp.create_from_symptom(record, days_ahead=3)
-                
-                record_id = str(record.id)
-                logger.info(f"Created symptom record {record_id} from chat diagnosis")
-                
-            except Exception as e:
-                logger.error(f"Failed to create symptom record from chat: {e}")
+        record_id = _save_chat_diagnosis(request.user, diagnosis_data)
         
         return Response({
             'response': response_text,
@@ -492,7 +536,8 @@ def send_chat_message(request):
             'buttons': buttons,  # Interactive buttons from Rasa
             'rasa_available': rasa_service.is_available(),  # Debug info
             'record_id': record_id,  # ID of created symptom record (if any)
-            'diagnosis_saved': record_id is not None  # Whether diagnosis was saved to history
+            'diagnosis_saved': record_id is not None,  # Whether diagnosis was saved to history
+            'enrichment_job_id': (diagnosis_data or {}).get('enrichment_job_id')  # Poll /api/jobs/<id>/ for LLM insights
         })
     
     except ChatSession.DoesNotExist:
@@ -507,6 +552,138 @@ def send_chat_message(request):
         )
 
 
+def _sse(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _chat_event_stream(user, session_id, message, language, django_api):
+    """
+    Server-sent events for one chat message: "meta" straight away, "token" chunks as
+    Rasa or the LLM answers, and "done" after the symptom record has been saved
+    """
+    yield _sse('meta', {'session_id': session_id})
+    
+    try:
+        rasa_service = RasaChatService()
+        rasa_response = rasa_service.send_message(
+            message=message,
+            sender_id=session_id,
+            metadata={'language': language, 'user_id': str(user.id), 'django_api': django_api}
+        )
+        
+        if rasa_service.should_use_llm_fallback(rasa_response):
+            response_source = "llm_fallback"
+            buttons = []
+            try:
+                for chunk in AIInsightGenerator().stream_chat_response(
+                    message=message,
+                    context={'language': language, 'session_id': session_id, 'rasa_failed': True}
+                ):
+                    yield _sse('token', {'text': chunk})
+            except requests.exceptions.Timeout as timeout_error:
+                logger.error(f"LLM stream timed out: {timeout_error}")
+                yield _sse('token', {'text': CHAT_TIMEOUT_RESPONSE})
+            except Exception as llm_error:
+                logger.error(f"LLM stream failed: {llm_error}")
+                yield _sse('token', {'text': CHAT_ERROR_RESPONSE})
+            diagnosis_data = _fallback_diagnosis(message)
+        else:
+            # Rasa's REST channel answers in one piece
+            response_source = "rasa"
+            buttons = rasa_response.get('buttons', [])
+            yield _sse('token', {'text': rasa_response['text']})
+            diagnosis_data = rasa_response.get('custom', {}).get('diagnosis')
+        
+        # Side effects only once the full answer has been sent
+        record_id = _save_chat_diagnosis(user, diagnosis_data)
+        
+        yield _sse('done', {
+            'session_id': session_id,
+            'source': response_source,
+            'buttons': buttons,
+            'rasa_available': rasa_service.is_available(),
+            'record_id': record_id,
+            'diagnosis_saved': record_id is not None,
+            'enrichment_job_id': (diagnosis_data or {}).get('enrichment_job_id')
+        })
+    except Exception as e:
+        logger.error(f"Chat stream failed: {e}")
+        yield _sse('error', {'error': str(e)})
+
+
+async def _iterate_in_sync_thread(iterator):
+    """
+    Async view of a blocking iterator for ASGI (StreamingHttpResponse buffers sync iterators there)
+    Each chunk is pulled in the request's thread-sensitive sync thread, so ORM calls stay on one connection
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+class EventStreamRendererSimple(BaseRenderer):
+    """
+    Renderer that lets EventSource-style clients (Accept: text/event-stream) pass content negotiation.
+    The view streams the events itself; plain responses (validation, session and permission
+    errors) are sent as a single error event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return _sse('error', data).encode(self.charset)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsStudent, HasDataConsent])
+@renderer_classes([JSONRenderer, EventStreamRendererSimple])
+def stream_chat_message(request):
+    """
+    Streaming variant of send_chat_message (server-sent events)
+    POST /api/chat/message/stream/
+    
+    Events: meta {session_id}, token {text} (repeated), then done with the same fields as
+    /api/chat/message/ minus the text, or error {error}
+    """
+    serializer = ChatMessageSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    session_id = data.get('session_id')
+    if not session_id:
+        return Response(
+            {'error': 'session_id is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not ChatSession.objects.filter(id=session_id, student=request.user).exists():
+        return Response(
+            {'error': 'Invalid session_id'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    events = _chat_event_stream(
+        request.user, str(session_id), data['message'], data.get('language', 'english'),
+        request.build_absolute_uri('/api/')
+    )
+    if isinstance(request._request, ASGIRequest):
+        events = _iterate_in_sync_thread(events)
+    
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsStudent, HasDataConsent])
 def generate_insights(request):
@@ -613,6 +790,41 @@ def end_chat_session(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def background_job_status(request, job_id):
+    """
+    Poll a background job (e.g. LLM validation + insights queued by /api/rasa/predict/)
+    GET /api/jobs/<job_id>/
+    
+    Students only see jobs for their own chat sessions; staff see all jobs.
+    """
+    try:
+        job = BackgroundJob.objects.get(id=job_id)
+    except BackgroundJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.user.role != 'staff':
+        sender_id = job.payload.get('sender_id')
+        try:
+            owns_session = ChatSession.objects.filter(id=sender_id, student=request.user).exists()
+        except (ValueError, ValidationError):  # sender_id isn't a session UUID
+            owns_session = False
+        if not owns_session:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'result': job.result if job.status == 'succeeded' else None,
+        'error': job.last_error if job.status == 'failed' else None,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+
 # ============================================================================
 # Clinic Staff Dashboard Views
 # ============================================================================
@@ -648,38 +860,26 @@ def clinic_dashboard(request):
         referral_triggered=False
     ).count()
     
-    # Department breakdown - Calculate from real data
-    departments = User.objects.filter(role='student').values_list('department', flat=True).distinct()
-    dept_breakdown = []
-    
-    for dept in departments:
-        if not dept:  # Skip None/empty departments
-            continue
-            
-        total_in_dept = User.objects.filter(role='student', department=dept).count()
-        students_with_symptoms = SymptomRecord.objects.filter(
-            student__department=dept,
-            created_at__date__gte=thirty_days_ago
-        ).values('student').distinct().count()
-        
-        dept_breakdown.append({
-            'department': dept,
-            'total_students': total_in_dept,
-            'students_with_symptoms': students_with_symptoms,
-            'percentage': round((students_with_symptoms / total_in_dept * 100), 1) if total_in_dept > 0 else 0
-        })
+    # Department breakdown from the DepartmentStats cache (clinic/department_stats.py)
+    department_stats = list(DepartmentStats.objects.order_by('-students_with_symptoms', 'department'))
+    if not department_stats:
+        # First use, before any scheduled refresh has run
+        refresh_department_stats()
+        department_stats = list(DepartmentStats.objects.order_by('-students_with_symptoms', 'department'))
     
-    # Sort by students with symptoms (descending)
-    dept_breakdown.sort(key=lambda x: x['students_with_symptoms'], reverse=True)
+    dept_breakdown = [
+        {**DepartmentStatsSerializer(stat).data, 'percentage': stat.percentage_with_symptoms}
+        for stat in department_stats
+    ]
     
     # Recent symptom records
     recent_symptoms = SymptomRecord.objects.select_related('student').order_by('-created_at')[:10]
     
     # Top insight (most common disease in last 30 days)
-    top_disease = SymptomRecord.objects.filter(
-        created_at__date__gte=thirty_days_ago
+    top_disease = DailySymptomRollup.objects.filter(
+        date__gte=thirty_days_ago
     ).values('predicted_disease').annotate(
-        count=Count('id')
+        count=Sum('record_count')
     ).order_by('-count').first()
     
     top_insight = f"{top_disease['predicted_disease']} ({top_disease['count']} cases this month)" if top_disease else 'No consultations yet'
@@ -692,6 +892,7 @@ def clinic_dashboard(request):
         'students_with_symptoms_30days': students_30days,
         'top_insight': top_insight,
         'department_breakdown': dept_breakdown,
+        'department_stats_freshness': stats_freshness(department_stats),
         'recent_symptoms': SymptomRecordSerializer(recent_symptoms, many=True).data,
         'pending_referrals': pending_referrals
     }
@@ -699,20 +900,43 @@ def clinic_dashboard(request):
     return Response(data)
 
 
+def _subquery_count(queryset, group_field):
+    """COUNT(*) of a correlated queryset as an annotation (0 when there are no rows)"""
+    counts = queryset.order_by().values(group_field).annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class StudentDirectoryPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsClinicStaff])
 def student_directory(request):
     """
     Get filtered list of students with health records
-    GET /api/staff/students/
+    GET /api/staff/students/?page=1&page_size=50
+    Filters: department, search, has_symptoms, on_medication, pending_followup (true/false)
+    
+    Per-student counts are correlated subqueries and the recent records and
+    active medications are prefetched, so a page costs the same few queries
+    whatever its size.
     """
-    from django.db.models import Prefetch, Avg
+    from django.db.models import Exists, OuterRef, Prefetch
     
-    queryset = User.objects.filter(role='student').prefetch_related(
-        'symptom_records',
-        'medications',
-        'follow_ups'
-    )
+    student_records = SymptomRecord.objects.filter(student=OuterRef('pk'))
+    student_logs = MedicationLog.objects.filter(medication__student=OuterRef('pk'))
+    
+    queryset = User.objects.filter(role='student').annotate(
+        total_visits=_subquery_count(student_records, 'student'),
+        medication_count=_subquery_count(
+            Medication.objects.filter(student=OuterRef('pk'), is_active=True), 'student'
+        ),
+        logs_total=_subquery_count(student_logs, 'medication__student'),
+        logs_taken=_subquery_count(student_logs.filter(status='taken'), 'medication__student'),
+        pending_followup=Exists(FollowUp.objects.filter(student=OuterRef('pk'), status='pending')),
+    ).order_by('name', 'school_id')
     
     # Filters
     department = request.query_params.get('department')
@@ -728,57 +952,79 @@ def student_directory(request):
         )
     
     if has_symptoms == 'true':
-        queryset = queryset.filter(symptom_records__isnull=False).distinct()
+        queryset = queryset.filter(Exists(student_records))
     elif has_symptoms == 'false':
-        queryset = queryset.filter(symptom_records__isnull=True)
+        queryset = queryset.filter(~Exists(student_records))
+    
+    on_medication = request.query_params.get('on_medication')
+    if on_medication == 'true':
+        queryset = queryset.filter(medication_count__gt=0)
+    elif on_medication == 'false':
+        queryset = queryset.filter(medication_count=0)
+    
+    pending_followup = request.query_params.get('pending_followup')
+    if pending_followup in ('true', 'false'):
+        queryset = queryset.filter(pending_followup=pending_followup == 'true')
+    
+    # Last 5 records and active medications (with their last 7 logs and adherence counts) for the page only
+    queryset = queryset.prefetch_related(
+        Prefetch(
+            'symptom_records',
+            queryset=SymptomRecord.objects.select_related('student').order_by('-created_at')[:5],
+            to_attr='recent_symptom_records'
+        ),
+        Prefetch(
+            'medications',
+            queryset=Medication.objects.filter(is_active=True).for_serializer(),
+            to_attr='active_medications'
+        ),
+    )
+    
+    paginator = StudentDirectoryPagination()
+    page = paginator.paginate_queryset(queryset, request)
     
     # Build enriched student data
     students_data = []
-    for student in queryset:
-        # Get symptom records
-        recent_symptoms = student.symptom_records.order_by('-created_at')[:5]
-        last_visit = recent_symptoms.first().created_at if recent_symptoms.exists() else None
-        
-        # Get medications
-        active_meds = student.medications.filter(is_active=True)
+    for student in page:
+        recent_symptoms = student.recent_symptom_records
+        last_visit = recent_symptoms[0].created_at if recent_symptoms else None
         
         # Calculate adherence
-        med_logs = MedicationLog.objects.filter(medication__student=student)
-        total_logs = med_logs.count()
-        taken_logs = med_logs.filter(status='taken').count()
-        adherence_rate = round((taken_logs / total_logs * 100) if total_logs > 0 else 100, 1)
-        
-        # Get follow-ups
-        pending_followups = student.follow_ups.filter(status='pending').exists()
+        adherence_rate = round((student.logs_taken / student.logs_total * 100) if student.logs_total > 0 else 100, 1)
         
         student_data = {
             'id': student.id,
             'name': student.name,
             'school_id': student.school_id,
             'department': student.department,
-            'total_visits': student.symptom_records.count(),
+            'total_visits': student.total_visits,
             'last_visit': last_visit.isoformat() if last_visit else None,
-            'on_medication': active_meds.exists(),
-            'medication_count': active_meds.count(),
+            'on_medication': student.medication_count > 0,
+            'medication_count': student.medication_count,
             'adherence_rate': adherence_rate,
-            'pending_followup': pending_followups,
-            'recent_symptoms': recent_symptoms.exists(),
+            'pending_followup': student.pending_followup,
+            'recent_symptoms': bool(recent_symptoms),
             'recent_symptom_reports': SymptomRecordSerializer(recent_symptoms, many=True).data,
-            'medications': MedicationSerializer(active_meds, many=True).data
+            'medications': MedicationSerializer(student.active_medications, many=True).data
         }
         
         students_data.append(student_data)
     
-    return Response({'students': students_data})
+    return Response({
+        'students': students_data,
+        'count': paginator.page.paginator.count,
+        'page': paginator.page.number,
+        'page_size': paginator.get_page_size(request),
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+    })
 
 
-from rest_framework.renderers import JSONRenderer, BaseRenderer
-
 
 class CSVRendererSimple(BaseRenderer):
     """
     Renderer that allows DRF to accept format=csv via query param.
-    Rendering is bypassed because we return HttpResponse for CSV.
+    Rendering is bypassed because the view streams CSV itself.
     """
     media_type = 'text/csv'
     format = 'csv'
@@ -791,7 +1037,7 @@ class CSVRendererSimple(BaseRenderer):
 class ExcelRendererSimple(BaseRenderer):
     """
     Renderer that allows DRF to accept format=excel via query param.
-    Rendering is bypassed because we return HttpResponse for Excel.
+    Rendering is bypassed because the view streams the workbook itself.
     """
     media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     format = 'excel'
@@ -800,48 +1046,58 @@ class ExcelRendererSimple(BaseRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
         return data
 
+
+class ParquetRendererSimple(BaseRenderer):
+    """
+    Renderer that allows DRF to accept format=parquet via query param.
+    Rendering is bypassed because the view streams the Parquet file itself.
+    """
+    media_type = PARQUET_CONTENT_TYPE
+    format = 'parquet'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class ArrowRendererSimple(BaseRenderer):
+    """
+    Renderer that allows DRF to accept format=arrow via query param.
+    Rendering is bypassed because the view streams Arrow IPC itself.
+    """
+    media_type = ARROW_STREAM_CONTENT_TYPE
+    format = 'arrow'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsClinicStaff])
-@renderer_classes([JSONRenderer, CSVRendererSimple, ExcelRendererSimple])
+@renderer_classes([JSONRenderer, CSVRendererSimple, ExcelRendererSimple, ParquetRendererSimple, ArrowRendererSimple])
 def export_report(request):
     """
-    Export symptom data to Excel or CSV format
-    GET /api/staff/export/?format=csv|excel|json&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+    Export symptom data to Excel, CSV or columnar (Parquet / Arrow IPC stream) format
+    GET /api/staff/export/?format=csv|excel|json|parquet|arrow&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
     
     Query Parameters:
-        - format: 'json', 'csv' or 'excel' (default: csv)
+        - format: 'json', 'csv', 'excel', 'parquet' or 'arrow' (default: csv)
         - start_date: Filter records from this date (optional)
         - end_date: Filter records until this date (optional)
         - department: Filter by department (optional)
         - disease: Filter by predicted disease (optional)
     """
-    import csv
-    from django.http import HttpResponse
     from datetime import datetime
-    
+    from django.http import FileResponse
+
     # Get query parameters
     export_format = request.query_params.get('format', 'csv').lower()
-    start_date = request.query_params.get('start_date')
-    
-    # Debug: confirm view is being called
-    print(f"[DEBUG] export_report called with format={export_format}")
-    end_date = request.query_params.get('end_date')
-    department = request.query_params.get('department')
-    disease = request.query_params.get('disease')
-    
-    # Build queryset
-    queryset = SymptomRecord.objects.select_related('student').all()
-    
-    if start_date:
-        queryset = queryset.filter(created_at__gte=start_date)
-    if end_date:
-        queryset = queryset.filter(created_at__lte=end_date)
-    if department:
-        queryset = queryset.filter(student__department=department)
-    if disease:
-        queryset = queryset.filter(predicted_disease__icontains=disease)
-    
-    queryset = queryset.order_by('-created_at')
+    queryset = export_queryset(
+        start_date=request.query_params.get('start_date'),
+        end_date=request.query_params.get('end_date'),
+        department=request.query_params.get('department'),
+        disease=request.query_params.get('disease'),
+    )
     
     # Generate filename with timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -849,7 +1105,7 @@ def export_report(request):
     # JSON format for preview
     if export_format == 'json':
         data = []
-        for record in queryset:
+        for record in queryset.select_related('student'):
             data.append({
                 'id': str(record.id),
                 'created_at': record.created_at.isoformat(),
@@ -874,139 +1130,202 @@ def export_report(request):
         })
     
     if export_format == 'excel':
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Excel export requested with {queryset.count()} records")
-        print(f"[DEBUG] Excel export requested with {queryset.count()} records")
-        
+        logger.info(f"Excel export requested by {request.user.school_id}")
         try:
-            import openpyxl
-            from openpyxl.styles import Font, Alignment, PatternFill
-            from openpyxl.utils import get_column_letter
-            print("[DEBUG] openpyxl imported successfully")
-        except ImportError as e:
-            print(f"[DEBUG] openpyxl import failed: {e}")
+            output = xlsx_file(queryset)
+        except ImportError:
             return Response(
                 {'error': 'Excel export requires openpyxl. Install with: pip install openpyxl'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        try:
-            
-            # Create workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Symptom Records"
-            
-            # Define headers
-            headers = [
-                'Date', 'Time', 'Student ID', 'Student Name', 'Department',
-                'Symptoms', 'Duration (days)', 'Severity', 'Predicted Disease',
-                'Confidence', 'ICD-10 Code', 'Communicable', 'Acute',
-                'Requires Referral'
-            ]
-            
-            # Style header row
-            header_fill = PatternFill(start_color='006B3F', end_color='006B3F', fill_type='solid')
-            header_font = Font(bold=True, color='FFFFFF')
-            
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num)
-                cell.value = header
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Add data rows
-            for row_num, record in enumerate(queryset, 2):
-                severity_map = {1: 'Mild', 2: 'Moderate', 3: 'Severe'}
-                
-                ws.cell(row=row_num, column=1).value = record.created_at.strftime('%Y-%m-%d')
-                ws.cell(row=row_num, column=2).value = record.created_at.strftime('%H:%M:%S')
-                ws.cell(row=row_num, column=3).value = record.student.school_id
-                ws.cell(row=row_num, column=4).value = record.student.name
-                ws.cell(row=row_num, column=5).value = record.student.department
-                ws.cell(row=row_num, column=6).value = ', '.join(record.symptoms)
-                ws.cell(row=row_num, column=7).value = record.duration_days
-                ws.cell(row=row_num, column=8).value = severity_map.get(record.severity, 'Unknown')
-                ws.cell(row=row_num, column=9).value = record.predicted_disease
-                ws.cell(row=row_num, column=10).value = f"{record.confidence_score:.1%}" if record.confidence_score else 'N/A'
-                ws.cell(row=row_num, column=11).value = record.icd10_code or 'N/A'
-                ws.cell(row=row_num, column=12).value = 'Yes' if record.is_communicable else 'No'
-                ws.cell(row=row_num, column=13).value = 'Yes' if record.is_acute else 'No'
-                ws.cell(row=row_num, column=14).value = 'Yes' if record.requires_referral else 'No'
-            
-            # Auto-adjust column widths
-            for col_num, header in enumerate(headers, 1):
-                column_letter = get_column_letter(col_num)
-                max_length = len(header)
-                for row in ws[column_letter]:
-                    if row.value:
-                        max_length = max(max_length, len(str(row.value)))
-                ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-            
-            # Create HTTP response
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename="cpsu_health_report_{timestamp}.xlsx"'
-            
-            wb.save(response)
-            return response
-            
         except Exception as e:
-            import traceback
-            print(f"[DEBUG] Excel export EXCEPTION: {e}")
-            traceback.print_exc()
+            logger.exception(f"Excel export failed: {e}")
             return Response(
                 {'error': f'Excel export failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        # Streamed from the temporary file, which FileResponse closes (and so deletes) when done
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'cpsu_health_report_{timestamp}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
     
     elif export_format == 'csv':  # CSV format
-        response = HttpResponse(content_type='text/csv')
+        response = StreamingHttpResponse(stream_csv(queryset), content_type='text/csv')
         response['Content-Disposition'] = f'attachment; filename="cpsu_health_report_{timestamp}.csv"'
+        return response
+    
+    elif export_format in ('parquet', 'arrow'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return Response(
+                {'error': 'Parquet/Arrow export requires pyarrow. Install with: pip install pyarrow'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
-        writer = csv.writer(response)
-        
-        # Write header
-        writer.writerow([
-            'Date', 'Time', 'Student ID', 'Student Name', 'Department',
-            'Symptoms', 'Duration (days)', 'Severity', 'Predicted Disease',
-            'Confidence', 'ICD-10 Code', 'Communicable', 'Acute',
-            'Requires Referral'
-        ])
-        
-        # Write data rows
-        severity_map = {1: 'Mild', 2: 'Moderate', 3: 'Severe'}
-        
-        for record in queryset:
-            writer.writerow([
-                record.created_at.strftime('%Y-%m-%d'),
-                record.created_at.strftime('%H:%M:%S'),
-                record.student.school_id,
-                record.student.name,
-                record.student.department,
-                ', '.join(record.symptoms),
-                record.duration_days,
-                severity_map.get(record.severity, 'Unknown'),
-                record.predicted_disease,
-                f"{record.confidence_score:.1%}" if record.confidence_score else 'N/A',
-                record.icd10_code or 'N/A',
-                'Yes' if record.is_communicable else 'No',
-                'Yes' if record.is_acute else 'No',
-                'Yes' if record.requires_referral else 'No'
-            ])
+        if export_format == 'arrow':
+            response = StreamingHttpResponse(stream_arrow(queryset), content_type=ARROW_STREAM_CONTENT_TYPE)
+            response['Content-Disposition'] = f'attachment; filename="cpsu_health_report_{timestamp}.arrows"'
+            return response
         
-        return response
+        try:
+            output = parquet_file(queryset)
+        except Exception as e:
+            logger.exception(f"Parquet export failed: {e}")
+            return Response(
+                {'error': f'Parquet export failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'cpsu_health_report_{timestamp}.parquet',
+            content_type=PARQUET_CONTENT_TYPE
+        )
     
     else:
         return Response(
-            {'error': f'Unsupported format: {export_format}. Use json, csv, or excel.'},
+            {'error': f'Unsupported format: {export_format}. Use json, csv, excel, parquet, or arrow.'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
 
+class DownloadRendererSimple(BaseRenderer):
+    """
+    Renderer that lets file downloads pass content negotiation for any Accept header.
+    Rendering is bypassed because the view returns the file response itself.
+    """
+    media_type = '*/*'
+    format = None
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+def _export_job_data(request, export):
+    job = export.job
+    progress = None
+    if job.status == 'succeeded':
+        progress = 100.0
+    elif export.rows_total:
+        progress = round(min(export.rows_written / export.rows_total * 100, 100.0), 1)
+    elif export.rows_total == 0:
+        progress = 0.0
+
+    return {
+        'export_id': str(export.id),
+        'format': export.format,
+        'filters': export.filters,
+        'status': job.status,
+        'rows_total': export.rows_total,
+        'rows_written': export.rows_written,
+        'progress': progress,
+        'file_size': export.file_size if job.status == 'succeeded' else None,
+        'download_url': request.build_absolute_uri(
+            reverse('clinic:export-job-download', args=[export.id])
+        ) if job.status == 'succeeded' else None,
+        'error': job.last_error if job.status == 'failed' else None,
+        'created_at': export.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsClinicStaff])
+def export_job_create(request):
+    """
+    Queue a report export for the background job worker
+    POST /api/staff/exports/
+    
+    Body: {"format": "csv|excel|parquet|arrow", "start_date", "end_date", "department", "disease"}
+    (same filters as /api/staff/export/). An identical request made within
+    EXPORT_REUSE_WINDOW returns the existing export instead of a new one.
+    Poll GET /api/staff/exports/<export_id>/ for progress.
+    """
+    export_format = str(request.data.get('format', 'csv')).lower()
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f'Unsupported format: {export_format}. Use csv, excel, parquet, or arrow.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if export_format in ('parquet', 'arrow'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return Response(
+                {'error': 'Parquet/Arrow export requires pyarrow. Install with: pip install pyarrow'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    export, reused = request_export(request.user, export_format, normalize_filters(request.data))
+    if not reused:
+        logger.info(f"Export {export.id} ({export_format}) queued by {request.user.school_id}")
+    
+    return Response(
+        {**_export_job_data(request, export), 'reused': reused},
+        status=status.HTTP_200_OK if reused else status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsClinicStaff])
+def export_job_status(request, export_id):
+    """
+    Poll a queued report export
+    GET /api/staff/exports/<export_id>/
+    
+    Returns status (pending/running/succeeded/failed), rows_written of rows_total
+    and, once finished, download_url.
+    """
+    try:
+        export = ExportJob.objects.select_related('job').get(id=export_id)
+    except ExportJob.DoesNotExist:
+        return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response(_export_job_data(request, export))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsClinicStaff])
+@renderer_classes([JSONRenderer, DownloadRendererSimple])
+def export_job_download(request, export_id):
+    """
+    Download a finished report export
+    GET /api/staff/exports/<export_id>/download/
+    
+    Supports Range requests (with If-Range on the ETag), so interrupted
+    downloads can be resumed.
+    """
+    try:
+        export = ExportJob.objects.select_related('job').get(id=export_id)
+    except ExportJob.DoesNotExist:
+        return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if export.job.status != 'succeeded':
+        return Response(
+            {'error': f'Export is not ready (status: {export.job.status})'},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    path = export_path(export)
+    if not os.path.exists(path):
+        return Response({'error': 'Export file has expired'}, status=status.HTTP_410_GONE)
+    
+    content_type, extension = EXPORT_FORMATS[export.format]
+    return file_range_response(
+        request,
+        path,
+        content_type=content_type,
+        filename=f'cpsu_health_report_{export.created_at:%Y%m%d_%H%M%S}.{extension}',
+        etag=f'"{export.id}-{export.file_size}"',
+    )
+
+
 # ============================================================================
 # Audit Log Views (Staff Only)
 # ============================================================================
@@ -1019,6 +1338,7 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all().select_related('user').order_by('-timestamp')
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated, IsClinicStaff]
+    pagination_class = AuditLogPagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -1137,13 +1457,13 @@ def emergency_history(request):
     else:
         emergencies = EmergencyAlert.objects.filter(student=request.user)
     
-    # Pagination
-    page_size = int(request.GET.get('page_size', 20))
-    emergencies = emergencies[:page_size]
+    # Keyset pages, newest first (?page_size=20, then follow next/previous)
+    page, links = paginate(EmergencyHistoryPagination(), emergencies, request)
     
-    serializer = EmergencyAlertSerializer(emergencies, many=True)
+    serializer = EmergencyAlertSerializer(page, many=True)
     return Response({
-        'count': emergencies.count(),
+        'count': len(page),
+        **links,
         'emergencies': serializer.data
     })
 
@@ -1250,32 +1570,30 @@ def medication_list(request):
     Students: Their own medications
     Staff: Can filter by student_id
     """
+    # Adherence counts and recent logs come with the list (no per-medication queries)
+    medications = Medication.objects.for_serializer()
+    
+    # Filter by active status
+    active_only = request.GET.get('active_only', 'false').lower() == 'true'
+    if active_only:
+        medications = medications.filter(is_active=True)
+    
     if request.user.role == 'staff':
-        # Staff can query specific student
+        # Staff can query specific student (otherwise all medications, for the staff dashboard)
         student_id = request.GET.get('student_id')
         if student_id:
-            medications = Medication.objects.filter(
-                student__school_id=student_id
-            ).select_related('student', 'prescribed_by', 'symptom_record')
-        else:
-            # All medications (for staff dashboard)
-            medications = Medication.objects.all().select_related(
-                'student', 'prescribed_by'
-            )[:50]  # Limit to recent 50
+            medications = medications.filter(student__school_id=student_id)
     else:
         # Students see only their own
-        medications = Medication.objects.filter(
-            student=request.user
-        ).select_related('prescribed_by', 'symptom_record')
+        medications = medications.filter(student=request.user)
     
-    # Filter by active status
-    active_only = request.GET.get('active_only', 'false').lower() == 'true'
-    if active_only:
-        medications = medications.filter(is_active=True)
+    # Keyset pages of 50, latest courses first (follow next/previous)
+    page, links = paginate(MedicationPagination(), medications, request)
     
-    serializer = MedicationSerializer(medications, many=True)
+    serializer = MedicationSerializer(page, many=True)
     return Response({
-        'count': medications.count(),
+        'count': medications.count(),  # All matching medications, not just this page
+        **links,
         'medications': serializer.data
     })
 
@@ -1292,28 +1610,13 @@ def medication_create(request):
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    # Create medication
-    medication = serializer.save(prescribed_by=request.user)
-    
-    # Auto-generate medication logs based on schedule
-    from datetime import datetime, timedelta
-    
-    current_date = medication.start_date
-    while current_date <= medication.end_date:
-        for time_str in medication.schedule_times:
-            # Parse time (HH:MM format)
-            try:
-                scheduled_time = datetime.strptime(time_str, '%H:%M').time()
-                MedicationLog.objects.create(
-                    medication=medication,
-                    scheduled_date=current_date,
-                    scheduled_time=scheduled_time,
-                    status='pending'
-                )
-            except ValueError:
-                pass  # Skip invalid time formats
+    with transaction.atomic():
+        # Create medication
+        medication = serializer.save(prescribed_by=request.user)
         
-        current_date += timedelta(days=1)
+        # Auto-generate medication logs based on schedule (bulk insert; with
+        # MEDICATION_SCHEDULE_DAYS_AHEAD only the next N days, extended daily)
+        materialize_logs(medication, until=materialization_horizon())
     
     # Log the prescription
     AuditLog.objects.create(
@@ -1343,9 +1646,7 @@ def medication_detail(request, medication_id):
     GET /api/medications/<id>/
     """
     try:
-        medication = Medication.objects.select_related(
-            'student', 'prescribed_by', 'symptom_record'
-        ).prefetch_related('logs').get(id=medication_id)
+        medication = Medication.objects.for_serializer().get(id=medication_id)
     except Medication.DoesNotExist:
         return Response({'error': 'Medication not found'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -1380,6 +1681,11 @@ def medication_update(request, medication_id):
     
     medication.save()
     
+    # A longer course needs doses for the added days (existing ones are skipped)
+    if 'end_date' in request.data:
+        medication.refresh_from_db()
+        materialize_logs(medication, until=materialization_horizon())
+    
     return Response({
         'message': 'Medication updated',
         'medication': MedicationSerializer(medication).data
@@ -1456,32 +1762,29 @@ def medication_adherence(request):
     Get medication adherence statistics
     GET /api/medications/adherence/
     """
+    # Taken/missed/recorded counts for every medication in one query
+    medications = Medication.objects.filter(is_active=True).with_adherence()
     if request.user.role == 'student':
-        medications = Medication.objects.filter(student=request.user, is_active=True)
+        medications = medications.filter(student=request.user)
     else:
         student_id = request.GET.get('student_id')
         if student_id:
-            medications = Medication.objects.filter(
-                student__school_id=student_id,
-                is_active=True
-            )
+            medications = medications.filter(student__school_id=student_id)
         else:
             return Response({'error': 'student_id required for staff'}, status=400)
     
     stats = []
     for med in medications:
-        total_logs = med.logs.exclude(status='pending').count()
+        total_logs = med.logs_recorded
         if total_logs > 0:
-            taken_count = med.logs.filter(status='taken').count()
-            missed_count = med.logs.filter(status='missed').count()
-            adherence_rate = (taken_count / total_logs) * 100
+            adherence_rate = (med.logs_taken / total_logs) * 100
             
             stats.append({
                 'medication_id': str(med.id),
                 'medication_name': med.name,
                 'total_doses': total_logs,
-                'taken': taken_count,
-                'missed': missed_count,
+                'taken': med.logs_taken,
+                'missed': med.logs_missed,
                 'adherence_rate': round(adherence_rate, 1),
                 'days_remaining': med.days_remaining
             })
@@ -1624,15 +1927,30 @@ def followup_review(request, pk):
 def followup_needs_review(request):
     """
     Get follow-ups that need staff review
-    GET /api/followups/needs-review/
+    GET /api/followups/needs-review/?status=pending,overdue&page_size=50&cursor=...
+    
+    Follow-ups (optionally only the given statuses), latest scheduled first, in keyset
+    pages ({next, previous, results}); follow `next` for more. The first page also carries
+    `counts`: follow-ups per status across all pages, for the summary cards.
     """
-    # Return all follow-ups; frontend filters for counts
-    followups = FollowUp.objects.select_related('student', 'reviewed_by')\
-        .order_by('-scheduled_date')
+    followups = FollowUp.objects.select_related('student', 'reviewed_by')
+    
+    statuses = [s for s in request.query_params.get('status', '').split(',') if s]
+    valid = {choice for choice, _ in FollowUp.STATUS_CHOICES}
+    if any(s not in valid for s in statuses):
+        return Response(
+            {'error': f"status must be among: {', '.join(sorted(valid))}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    paginator = FollowUpReviewPagination()
+    page = paginator.paginate_queryset(
+        followups.filter(status__in=statuses) if statuses else followups, request
+    )
     
     # Enrich with student data
     data = []
-    for followup in followups:
+    for followup in page:
         followup_data = FollowUpSerializer(followup).data
         followup_data['student_name'] = followup.student.name
         followup_data['student_school_id'] = followup.student.school_id
@@ -1640,7 +1958,13 @@ def followup_needs_review(request):
         followup_data['reviewed_by_name'] = followup.reviewed_by.name if followup.reviewed_by else None
         data.append(followup_data)
     
-    return Response(data)
+    response = paginator.get_paginated_response(data)
+    if not request.query_params.get('cursor'):
+        # Totals per status for the summary cards: one GROUP BY, sent with the first page only
+        response.data['counts'] = dict(
+            FollowUp.objects.order_by().values_list('status').annotate(n=Count('id'))
+        )
+    return response
 
 
 # ============================================================================
@@ -1671,62 +1995,47 @@ def staff_analytics(request):
     else:
         start_date = today - timedelta(days=30)
     
-    # Summary stats
-    total_consultations = SymptomRecord.objects.filter(created_at__date__gte=start_date).count()
-    unique_patients = SymptomRecord.objects.filter(created_at__date__gte=start_date).values('student').distinct().count()
+    # Per-day rollups instead of rescanning symptom_records (clinic/rollups.py)
+    rollups = DailySymptomRollup.objects.filter(date__gte=start_date, date__lte=today)
+    
+    # Summary stats and severity distribution in one aggregate
+    # (severity field: 1=Mild, 2=Moderate, 3=Severe)
+    record_stats = rollups.aggregate(
+        total=Sum('record_count'),
+        mild=Sum('record_count', filter=Q(severity=1)),
+        moderate=Sum('record_count', filter=Q(severity=2)),
+        severe=Sum('record_count', filter=Q(severity=3)),
+    )
+    total_consultations = record_stats['total'] or 0
+    # Distinct students cannot be summed across days; the created_at index bounds this to the period
+    unique_patients = SymptomRecord.objects.filter(
+        created_at__date__gte=start_date
+    ).values('student').distinct().count()
     emergency_alerts = EmergencyAlert.objects.filter(created_at__date__gte=start_date).count()
     prescriptions = Medication.objects.filter(created_at__date__gte=start_date).count()
     
     # Top 10 diagnosed conditions
-    top_conditions = SymptomRecord.objects.filter(
-        created_at__date__gte=start_date
-    ).values('predicted_disease').annotate(
-        count=Count('id')
+    top_conditions = rollups.values('predicted_disease').annotate(
+        count=Sum('record_count')
     ).order_by('-count')[:10]
     
-    # Consultation trends (daily counts)
-    consultation_trends = []
-    current_date = start_date
-    while current_date <= today:
-        count = SymptomRecord.objects.filter(created_at__date=current_date).count()
-        consultation_trends.append({
-            'date': current_date.isoformat(),
-            'count': count
-        })
-        current_date += timedelta(days=1)
+    # Consultation trends (daily counts, one grouped query)
+    consultation_trends = rollup_daily_counts(start_date, today)
     
     # Consultations by department
-    dept_breakdown = SymptomRecord.objects.filter(
-        created_at__date__gte=start_date
-    ).values('student__department').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    dept_breakdown = [
+        {'student__department': row['department'], 'count': row['count']}
+        for row in rollups.values('department').annotate(count=Sum('record_count')).order_by('-count')
+    ]
     
-    # Symptom severity distribution (using actual severity field: 1=Mild, 2=Moderate, 3=Severe)
     severity_distribution = {
-        'mild': SymptomRecord.objects.filter(created_at__date__gte=start_date, severity=1).count(),
-        'moderate': SymptomRecord.objects.filter(created_at__date__gte=start_date, severity=2).count(),
-        'severe': SymptomRecord.objects.filter(created_at__date__gte=start_date, severity=3).count(),
+        'mild': record_stats['mild'] or 0,
+        'moderate': record_stats['moderate'] or 0,
+        'severe': record_stats['severe'] or 0,
     }
     
-    # Most common symptoms
-    from collections import Counter
-    
-    symptom_records = SymptomRecord.objects.filter(created_at__date__gte=start_date)
-    all_symptoms = []
-    for record in symptom_records:
-        if record.symptoms:  # Changed from symptoms_reported to symptoms
-            all_symptoms.extend(record.symptoms)
-    
-    symptom_counter = Counter(all_symptoms)
-    common_symptoms = [
-        {
-            'symptom': symptom,
-            'count': count,
-            'percentage': round((count / len(all_symptoms) * 100) if all_symptoms else 0, 1)
-        }
-        for symptom, count in symptom_counter.most_common(10)
-    ]
+    # Most common symptoms (per-day symptom counts)
+    common_symptoms = rollup_symptom_frequencies(start_date, today, limit=10)
     
     data = {
         'period': period,
@@ -1791,6 +2100,14 @@ def health_check(request):
         else:
             status_data['components']['ml_model'] = 'not_loaded'
             status_data['status'] = 'degraded'
+        
+        # Prediction cache hit/miss counters
+        if hasattr(predictor, 'cache_stats'):
+            status_data['components']['ml_prediction_cache'] = predictor.cache_stats()
+        
+        # Shared inference sidecar reports queue depth and latency
+        if hasattr(predictor, 'stats'):
+            status_data['components']['ml_inference_server'] = predictor.stats()
     except Exception as e:
         status_data['components']['ml_model'] = f'unhealthy: {str(e)}'
         status_data['status'] = 'degraded'
@@ -1808,14 +2125,32 @@ def health_check(request):
             llm_status.append('cohere')
         
         status_data['components']['llm_providers'] = llm_status if llm_status else ['none']
+        
+        # Circuit breaker state and rolling error rate/latency per provider
+        from .llm_health import get_provider_health
+        status_data['components']['llm_provider_health'] = get_provider_health().snapshot()
+        
+        from .llm_cache import get_response_cache
+        status_data['components']['llm_response_cache'] = get_response_cache().stats()
+        
+        # Keep-alive pools for Rasa / OpenRouter (connections opened vs requests served)
+        from .http_pool import http_pool_stats
+        status_data['components']['http_pools'] = http_pool_stats()
     except Exception as e:
         status_data['components']['llm_providers'] = f'error: {str(e)}'
-    
+
+    # Buffered audit log writer (buffer depth, flush latency, spooled batches)
+    if settings.AUDIT_BUFFERED:
+        from .audit_writer import get_audit_writer
+        status_data['components']['audit_writer'] = get_audit_writer().stats()
+
     # Check Rasa
     if settings.RASA_ENABLED:
         try:
-            import requests
-            response = requests.get(f"{settings.RASA_SERVER_URL}/", timeout=5)
+            from .http_pool import get_http_session
+            response = get_http_session('rasa', read_timeout=settings.RASA_TIMEOUT).get(
+                f"{settings.RASA_SERVER_URL}/", timeout=5
+            )
             if response.status_code == 200:
                 status_data['components']['rasa'] = 'healthy'
             else:
@@ -1827,6 +2162,9 @@ def health_check(request):
     else:
         status_data['components']['rasa'] = 'disabled'
     
+    # Cached availability the chat path uses (refreshed by probes and real traffic)
+    status_data['components']['rasa_availability'] = RasaChatService().availability()
+    
     # Return appropriate HTTP status code
     http_status = status.HTTP_200_OK if status_data['status'] == 'healthy' else status.HTTP_503_SERVICE_UNAVAILABLE
     
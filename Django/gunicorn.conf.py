@@ -35,4 +35,15 @@ group = None
 tmp_upload_dir = None
 
 # Preloading (disabled to avoid loading ML models at startup)
+# To share one model copy across workers, run `python manage.py run_inference_server`
+# alongside gunicorn and set ML_INFERENCE_SOCKET for both processes
 preload_app = False
+
+
+def worker_exit(server, worker):
+    """Write out buffered audit log entries before the worker goes away"""
+    try:
+        from clinic.audit_writer import shutdown_audit_writer
+        shutdown_audit_writer()
+    except Exception as e:
+        server.log.error(f"Audit log flush at worker exit failed: {e}")
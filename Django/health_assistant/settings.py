@@ -181,6 +181,27 @@ TEMPLATES = [
 WSGI_APPLICATION = 'health_assistant.wsgi.application'
 
 
+# Cache
+# Redis (REDIS_URL) shares LLM provider health across gunicorn workers;
+# without it each process keeps its own in-memory cache
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
@@ -381,23 +402,98 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'range',
+    'if-range',
 ]
 
+# Let the frontend read download metadata (resumable export downloads)
+CORS_EXPOSE_HEADERS = ['content-disposition', 'content-range', 'accept-ranges', 'etag']
+
 # ML Model settings
 ML_MODEL_PATH = BASE_DIR.parent / 'ML' / 'models' / 'disease_predictor_v2.pkl'
+# Memory-mapped artifact directory of the same forest (ML/scripts/export_forest.py); used instead of the pickle when present
+ML_COMPILED_MODEL_PATH = ML_MODEL_PATH.with_name('disease_predictor_v2.forest')
 ML_DATASETS_PATH = BASE_DIR.parent / 'ML' / 'Datasets' / 'active'
 
+# In-process LRU cache for repeated symptom combinations (size 0 disables it)
+ML_PREDICTION_CACHE_SIZE = int(os.getenv('ML_PREDICTION_CACHE_SIZE', '2048'))
+ML_PREDICTION_CACHE_TTL = int(os.getenv('ML_PREDICTION_CACHE_TTL', '3600'))  # seconds
+
+# Optional shared inference sidecar (python manage.py run_inference_server)
+# When set, gunicorn workers send predictions over this Unix socket instead of each loading the model
+ML_INFERENCE_SOCKET = os.getenv('ML_INFERENCE_SOCKET')
+ML_INFERENCE_TIMEOUT = float(os.getenv('ML_INFERENCE_TIMEOUT', '30'))
+ML_INFERENCE_RETRY = float(os.getenv('ML_INFERENCE_RETRY', '30'))  # seconds on the in-process fallback before re-probing
+ML_INFERENCE_MAX_BATCH_SIZE = int(os.getenv('ML_INFERENCE_MAX_BATCH_SIZE', '64'))
+ML_INFERENCE_MAX_WAIT_MS = float(os.getenv('ML_INFERENCE_MAX_WAIT_MS', '5'))
+
 # LLM API Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 COHERE_API_KEY = os.getenv('COHERE_API_KEY')
 
+# Hedged LLM requests: start the next provider if the current one hasn't answered within LLM_HEDGE_DELAY
+LLM_HEDGED_REQUESTS = os.getenv('LLM_HEDGED_REQUESTS', 'False') == 'True'
+LLM_HEDGE_DELAY = float(os.getenv('LLM_HEDGE_DELAY', '2.0'))  # seconds
+
+# Per-provider circuit breakers: skip a provider for LLM_BREAKER_COOLDOWN seconds after a 429,
+# or once LLM_BREAKER_ERROR_RATE of its calls in the last LLM_BREAKER_WINDOW seconds failed
+LLM_BREAKER_WINDOW = int(os.getenv('LLM_BREAKER_WINDOW', '300'))  # seconds
+LLM_BREAKER_MIN_REQUESTS = int(os.getenv('LLM_BREAKER_MIN_REQUESTS', '5'))
+LLM_BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', '0.5'))
+LLM_BREAKER_COOLDOWN = int(os.getenv('LLM_BREAKER_COOLDOWN', '60'))  # seconds
+
+# In-process cache of LLM answers per prompt type (chat, insights, validation); size 0 disables it
+LLM_RESPONSE_CACHE_SIZE = int(os.getenv('LLM_RESPONSE_CACHE_SIZE', '512'))  # entries per prompt type
+LLM_RESPONSE_CACHE_TTL = int(os.getenv('LLM_RESPONSE_CACHE_TTL', '3600'))  # seconds
+# Also reuse chat answers whose trigram similarity to the new message is at least this (0 = exact match only)
+LLM_RESPONSE_CACHE_SIMILARITY = float(os.getenv('LLM_RESPONSE_CACHE_SIMILARITY', '0'))
+
+# Background jobs (python manage.py run_job_worker)
+# With LLM_ENRICHMENT_ASYNC the Rasa prediction webhook answers with the ML result right away and
+# queues LLM validation + insights; needs a running job worker
+LLM_ENRICHMENT_ASYNC = os.getenv('LLM_ENRICHMENT_ASYNC', 'False') == 'True'
+JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', '120'))  # seconds a claim lasts
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', '10'))  # seconds, doubled after each failed attempt
+
+# Queued report exports (POST /api/staff/exports/), written by the job worker to MEDIA_ROOT/exports
+EXPORT_REUSE_WINDOW = int(os.getenv('EXPORT_REUSE_WINDOW', '600'))  # seconds an identical request reuses the file (0 = never)
+EXPORT_FILE_RETENTION = int(os.getenv('EXPORT_FILE_RETENTION', '86400'))  # seconds before finished files are deleted
+
+# Department stats on the clinic dashboard (python manage.py refresh_department_stats on a schedule)
+DEPARTMENT_STATS_MAX_AGE = int(os.getenv('DEPARTMENT_STATS_MAX_AGE', '3600'))  # seconds before they are reported stale
+
+# Medication doses created at prescription time: 0 = the whole course, N = only the next N days
+# (then run python manage.py extend_medication_schedules daily to roll them forward)
+MEDICATION_SCHEDULE_DAYS_AHEAD = int(os.getenv('MEDICATION_SCHEDULE_DAYS_AHEAD', '0'))
+
+# Partitioned Parquet snapshots of symptom records (python manage.py export_snapshots)
+EXPORT_SNAPSHOT_DIR = os.getenv('EXPORT_SNAPSHOT_DIR', str(MEDIA_ROOT / 'snapshots'))
+
+# AuditMiddleware entries are buffered and inserted in batches by a background thread (clinic/audit_writer.py):
+# when AUDIT_BATCH_SIZE are waiting or every AUDIT_FLUSH_INTERVAL seconds, and at worker exit.
+# Batches the database refuses are spooled to AUDIT_SPOOL_DIR and replayed later; entries it rejects
+# for their data go to AUDIT_SPOOL_DIR/dead-letter. Off unless enabled (inserted per request instead).
+AUDIT_BUFFERED = os.getenv('AUDIT_BUFFERED', 'False') == 'True'
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '2'))  # seconds
+AUDIT_MAX_BUFFER = int(os.getenv('AUDIT_MAX_BUFFER', '10000'))  # entries before requests flush inline
+AUDIT_SPOOL_DIR = os.getenv('AUDIT_SPOOL_DIR', str(BASE_DIR / 'logs' / 'audit_spool'))
+
 # Rasa Configuration
 RASA_ENABLED = os.getenv('RASA_ENABLED', 'True') == 'True'
 RASA_SERVER_URL = os.getenv('RASA_SERVER_URL', 'http://localhost:5005')
 RASA_TIMEOUT = int(os.getenv('RASA_TIMEOUT', '60'))  # 60 seconds for ML+LLM hybrid validation
 RASA_CONFIDENCE_THRESHOLD = float(os.getenv('RASA_CONFIDENCE_THRESHOLD', '0.6'))
+RASA_STATUS_TTL = int(os.getenv('RASA_STATUS_TTL', '30'))  # seconds before the cached availability is re-probed
+
+# Pooled HTTP sessions for Rasa and OpenRouter (clinic/http_pool.py)
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))  # keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))  # seconds; read timeouts are per service
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))  # connect errors (any method), 502/503/504 (GET only)
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.3'))  # seconds, doubled per retry
 
 # Logging Configuration
 LOGGING = {
@@ -14,6 +14,11 @@ pip install --no-cache-dir -r requirements-production.txt
 echo "Running database migrations..."
 python manage.py migrate --noinput
 
+# Catch up the daily analytics rollups (backfills history on the first run)
+echo "Refreshing analytics rollups and department stats..."
+python manage.py refresh_rollups
+python manage.py refresh_department_stats
+
 # Skip collectstatic in production - Azure can serve static files directly
 # Or run it in background to not block startup
 echo "Skipping static files collection (handled by Azure or run in background)..."
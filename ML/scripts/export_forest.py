@@ -0,0 +1,169 @@
+"""
+Forest Export Script
+Flattens a trained RandomForestClassifier into a versioned artifact directory
+that Django/clinic/compiled_forest.py memory-maps and evaluates without scikit-learn
+
+    disease_predictor_v2.forest/
+        metadata.json        format version, model hash, shapes, provenance
+        feature_names.json   symptom column order
+        classes.json         disease labels (predict_proba column order)
+        *.npy                flat node arrays, opened with mmap_mode='r'
+
+Usage: python export_forest.py [model.pkl] [output.forest]
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Bump together with FORMAT_VERSION in Django/clinic/compiled_forest.py
+FORMAT_VERSION = 2
+
+# Order matters: the model hash is computed over the arrays in this order
+ARRAY_NAMES = ('roots', 'feature', 'threshold', 'left', 'right', 'leaf_index', 'leaf_values')
+
+# Get the ML folder path
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def compiled_path_for(model_path):
+    """disease_predictor_v2.pkl -> disease_predictor_v2.forest/"""
+    return os.path.splitext(model_path)[0] + '.forest'
+
+
+def export_forest(model, feature_names, output_path):
+    """
+    Write every tree of the forest into one set of flat arrays
+
+    Node ids are global across trees. Leaves point to themselves so the
+    evaluator can walk all trees for max_depth steps without branching.
+    Only leaves keep a class distribution, normalized the same way
+    DecisionTreeClassifier.predict_proba does.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if not estimators or not hasattr(estimators[0], 'tree_') or model.n_outputs_ != 1:
+        raise ValueError(f"Only single-output tree forests can be exported, got {type(model).__name__}")
+
+    n_classes = len(model.classes_)
+    roots, features, thresholds, lefts, rights, leaf_index, leaf_values = [], [], [], [], [], [], []
+    offset = 0
+    n_leaves = 0
+    max_depth = 0
+
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+        index = np.full(tree.node_count, -1, dtype=np.int64)
+        index[is_leaf] = np.arange(n_leaves, n_leaves + is_leaf.sum())
+        leaf_index.append(index)
+
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        proba = tree.value[is_leaf, 0, :n_classes].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        leaf_values.append(proba / normalizer)
+
+        offset += tree.node_count
+        n_leaves += int(is_leaf.sum())
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        'roots': np.array(roots, dtype=np.int32),
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'leaf_index': np.concatenate(leaf_index).astype(np.int32),
+        'leaf_values': np.ascontiguousarray(np.concatenate(leaf_values)),
+    }
+    feature_names = [str(name) for name in feature_names]
+    classes = [str(cls) for cls in model.classes_]
+
+    digest = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        digest.update(arrays[name].tobytes())
+    digest.update(json.dumps([feature_names, classes]).encode('utf-8'))
+
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'model_hash': digest.hexdigest()[:16],
+        'n_estimators': len(estimators),
+        'n_features': len(feature_names),
+        'n_classes': n_classes,
+        'n_nodes': offset,
+        'n_leaves': n_leaves,
+        'max_depth': int(max_depth),
+        'exported_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+    _write_artifact(output_path, arrays, feature_names, classes, metadata)
+    print(f"✓ Exported {len(estimators)} trees ({offset} nodes, {n_leaves} leaves) to {output_path}")
+    return output_path
+
+
+def _write_artifact(output_path, arrays, feature_names, classes, metadata):
+    """Write into a temp directory and swap it in, so readers never see a half-written artifact"""
+    output_path = os.path.abspath(output_path)
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    old_path = f"{output_path}.old-{os.getpid()}"
+    os.makedirs(tmp_path)
+
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(tmp_path, f'{name}.npy'), arrays[name], allow_pickle=False)
+    for name, payload in (('feature_names', feature_names), ('classes', classes)):
+        with open(os.path.join(tmp_path, f'{name}.json'), 'w') as f:
+            json.dump(payload, f)
+    # metadata.json last: its presence marks a complete artifact
+    with open(os.path.join(tmp_path, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    # Running workers keep their mmaps of the old files until they reload
+    if os.path.exists(output_path):
+        os.rename(output_path, old_path)
+    os.rename(tmp_path, output_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def export_alongside(model, feature_names, model_path):
+    """
+    Export next to a freshly saved pickle
+    Non-forest models remove any old export so Django doesn't keep serving a stale forest
+    """
+    output_path = compiled_path_for(model_path)
+    try:
+        return export_forest(model, feature_names, output_path)
+    except ValueError as e:
+        print(f"Skipping compiled export: {e}")
+        if os.path.exists(output_path):
+            shutil.rmtree(output_path)
+            print(f"Removed stale {output_path}")
+        return None
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ML_DIR, 'models', 'disease_predictor_v2.pkl')
+    output_path = sys.argv[2] if len(sys.argv) > 2 else compiled_path_for(model_path)
+
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+
+    export_forest(model_data['model'], model_data['feature_names'], output_path)
+
+
+if __name__ == "__main__":
+    main()
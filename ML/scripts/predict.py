@@ -7,15 +7,28 @@ import pandas as pd
 import pickle
 import numpy as np
 import os
+import sys
 
 # Get the ML folder path
 ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Packed symptom vectors and the forest artifact loader are shared with the Django app (NumPy only, no Django setup)
+sys.path.insert(0, os.path.join(ML_DIR, '..', 'Django'))
+from clinic.compiled_forest import CompiledForest
+from clinic.symptom_vectors import indices_from_symptoms, pack_indices, unpack_dense
+
 def load_model(model_path=None):
     """Load the trained model"""
     if model_path is None:
         model_path = os.path.join(ML_DIR, 'models', 'disease_predictor.pkl')
     
+    # Memory-mapped v2 artifact loads without unpickling anything
+    artifact_path = os.path.join(ML_DIR, 'models', 'disease_predictor_v2.forest')
+    if os.path.exists(os.path.join(artifact_path, 'metadata.json')):
+        model = CompiledForest.load(artifact_path)
+        print("(Using enhanced model v2, compiled artifact)")
+        return model, model.feature_names
+    
     # Try v2 model first, then fall back to v1
     try:
         v2_path = os.path.join(ML_DIR, 'models', 'disease_predictor_v2.pkl')
@@ -117,13 +130,10 @@ def get_user_symptoms(feature_names):
     return selected_symptoms
 
 def create_input_vector(selected_symptoms, feature_names):
-    """Create binary input vector from selected symptoms"""
-    input_vector = np.zeros(len(feature_names))
-    for symptom in selected_symptoms:
-        if symptom in feature_names:
-            idx = feature_names.index(symptom)
-            input_vector[idx] = 1
-    return input_vector.reshape(1, -1)
+    """Create binary input vector (1 x n_features, float32) from selected symptoms"""
+    feature_index = {name: idx for idx, name in enumerate(feature_names)}
+    packed = pack_indices([indices_from_symptoms(selected_symptoms, feature_index)], len(feature_names))
+    return unpack_dense(packed, len(feature_names))
 
 def predict_disease(model, input_vector, top_n=3):
     """Predict disease and return top predictions with probabilities"""
@@ -6,10 +6,15 @@ import pandas as pd
 import pickle
 import numpy as np
 import os
+import sys
 
 # Get the ML folder path
 ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Packed symptom vector helpers are shared with the Django app (NumPy only, no Django setup)
+sys.path.insert(0, os.path.join(ML_DIR, '..', 'Django'))
+from clinic.symptom_vectors import indices_from_symptoms, pack_indices, unpack_dense
+
 # Load model
 print("Loading model...")
 with open(os.path.join(ML_DIR, 'models', 'disease_predictor.pkl'), 'rb') as f:
@@ -19,6 +24,7 @@ with open(os.path.join(ML_DIR, 'models', 'disease_predictor.pkl'), 'rb') as f:
 
 print(f"✓ Model loaded: {type(model).__name__}")
 print(f"✓ Features: {len(feature_names)}")
+feature_index = {name: idx for idx, name in enumerate(feature_names)}
 
 # Test with some example symptoms
 print("\n" + "="*60)
@@ -28,18 +34,15 @@ print("Symptoms: continuous_sneezing, shivering, chills")
 
 # Create input vector
 symptoms = ['continuous_sneezing', 'shivering', 'chills']
-input_vector = np.zeros(len(feature_names))
-for symptom in symptoms:
-    if symptom in feature_names:
-        idx = feature_names.index(symptom)
-        input_vector[idx] = 1
+packed = pack_indices([indices_from_symptoms(symptoms, feature_index)], len(feature_names))
+input_vector = unpack_dense(packed, len(feature_names))
 
 # Predict
-prediction = model.predict(input_vector.reshape(1, -1))[0]
+prediction = model.predict(input_vector)[0]
 print(f"\nPredicted Disease: {prediction}")
 
 if hasattr(model, 'predict_proba'):
-    proba = model.predict_proba(input_vector.reshape(1, -1))[0]
+    proba = model.predict_proba(input_vector)[0]
     top_3_idx = np.argsort(proba)[::-1][:3]
     print("\nTop 3 predictions:")
     for i, idx in enumerate(top_3_idx, 1):
@@ -54,17 +57,14 @@ print("="*60)
 print("Symptoms: fatigue, weight_loss, increased_appetite, polyuria")
 
 symptoms = ['fatigue', 'weight_loss', 'increased_appetite', 'polyuria']
-input_vector = np.zeros(len(feature_names))
-for symptom in symptoms:
-    if symptom in feature_names:
-        idx = feature_names.index(symptom)
-        input_vector[idx] = 1
+packed = pack_indices([indices_from_symptoms(symptoms, feature_index)], len(feature_names))
+input_vector = unpack_dense(packed, len(feature_names))
 
-prediction = model.predict(input_vector.reshape(1, -1))[0]
+prediction = model.predict(input_vector)[0]
 print(f"\nPredicted Disease: {prediction}")
 
 if hasattr(model, 'predict_proba'):
-    proba = model.predict_proba(input_vector.reshape(1, -1))[0]
+    proba = model.predict_proba(input_vector)[0]
     top_3_idx = np.argsort(proba)[::-1][:3]
     print("\nTop 3 predictions:")
     for i, idx in enumerate(top_3_idx, 1):
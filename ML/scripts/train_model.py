@@ -32,10 +32,11 @@ def load_and_prepare_data():
     print(f"Number of unique diseases: {train_df['prognosis'].nunique()}")
     
     # Separate features and target
-    X_train = train_df.drop('prognosis', axis=1).values
+    # Binary symptom columns as float32 (the trees' internal dtype) rather than int64
+    X_train = train_df.drop('prognosis', axis=1).values.astype(np.float32)
     y_train = train_df['prognosis'].values
     
-    X_test = test_df.drop('prognosis', axis=1).values
+    X_test = test_df.drop('prognosis', axis=1).values.astype(np.float32)
     y_test = test_df['prognosis'].values
     
     # Get feature names (symptom columns)
@@ -10,6 +10,7 @@ from sklearn.model_selection import train_test_split, cross_val_score, Stratifie
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import pickle
+from export_forest import export_alongside
 import warnings
 import os
 
@@ -74,7 +75,8 @@ def load_and_prepare_data_with_noise(noise_level=0.05):
     print(f"Adding {noise_level*100}% noise to simulate real-world conditions...")
     
     # Separate features and target
-    X = combined_df.drop('prognosis', axis=1).values
+    # Binary symptom columns as float32 (the trees' internal dtype) rather than int64
+    X = combined_df.drop('prognosis', axis=1).values.astype(np.float32)
     y = combined_df['prognosis'].values
     
     # Add noise to features
@@ -152,6 +154,9 @@ def save_model(model, feature_names, model_name=None):
         pickle.dump(model_data, f)
     
     print(f"✓ Model saved successfully!")
+    
+    # Flat NumPy export that the Django app evaluates instead of the pickle
+    export_alongside(model, feature_names, model_name)
 
 def main():
     print("="*60)
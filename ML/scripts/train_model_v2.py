@@ -11,6 +11,7 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import pickle
+from export_forest import export_alongside
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -33,7 +34,8 @@ def load_and_prepare_data():
     print(f"Number of unique diseases: {combined_df['prognosis'].nunique()}")
     
     # Separate features and target
-    X = combined_df.drop('prognosis', axis=1).values
+    # Binary symptom columns as float32 (the trees' internal dtype) rather than int64
+    X = combined_df.drop('prognosis', axis=1).values.astype(np.float32)
     y = combined_df['prognosis'].values
     
     # Split with stratification - 80% train, 20% test
@@ -151,6 +153,9 @@ def save_model(model, feature_names, model_name='../models/disease_predictor_v2.
         pickle.dump(model_data, f)
     
     print(f"Model saved successfully!")
+    
+    # Flat NumPy export that the Django app evaluates instead of the pickle
+    export_alongside(model, feature_names, model_name)
 
 def main():
     print("="*60)
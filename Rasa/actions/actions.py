@@ -8,6 +8,8 @@ from rasa_sdk.events import SlotSet
 import requests
 import logging
 
+from .http_pool import get_session
+
 logger = logging.getLogger(__name__)
 
 # Django backend configuration
@@ -78,15 +80,17 @@ class ActionPredictDisease(Action):
             # Call Django ML API
             logger.info(f"Calling Django ML API with symptoms: {normalized_symptoms}")
             
-            response = requests.post(
+            session = get_session()
+            response = session.post(
                 DJANGO_ML_ENDPOINT,
                 json={
                     "symptoms": normalized_symptoms,
                     "sender_id": sender_id,
                     "generate_insights": True  # Enable ML+LLM hybrid validation for reliable output
-                },
-                timeout=60  # Increased timeout for ML + LLM validation
+                }
+                # Session default timeout: 60 s read for ML + LLM validation
             )
+            logger.debug(f"Django API pool: {session.stats()}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -140,7 +144,9 @@ class ActionPredictDisease(Action):
                             "icd10_code": data.get('icd10_code', ''),
                             "top_predictions": top_predictions,
                             "duration_days": 1,  # Default, can be improved with slot tracking
-                            "severity": "moderate"  # Default, can be improved with slot tracking
+                            "severity": "moderate",  # Default, can be improved with slot tracking
+                            # Set when Django queued LLM validation/insights (poll /api/jobs/<id>/)
+                            "enrichment_job_id": (data.get('enrichment') or {}).get('job_id')
                         }
                     }
                 )
@@ -0,0 +1,87 @@
+# Pooled HTTP session for calls from the action server to the Django backend
+# Mirrors Django/clinic/http_pool.py without the Django settings dependency
+
+import os
+import threading
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Same knobs as the Django side, read from the action server's environment
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # keep-alive connections per host
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))  # connect errors (any method), 502/503/504 (GET only)
+RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class PooledSession(requests.Session):
+    """requests.Session with keep-alive pooling, retries and a default (connect, read) timeout"""
+
+    def __init__(self, read_timeout: float = 60):
+        super().__init__()
+        self.default_timeout = (CONNECT_TIMEOUT, read_timeout)
+        retry = Retry(
+            total=RETRIES,
+            connect=RETRIES,
+            read=0,  # A read error means Django may have acted on the request
+            status=RETRIES,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            backoff_factor=RETRY_BACKOFF,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self.mount("http://", self.adapter)
+        self.mount("https://", self.adapter)
+
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.errors = 0
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        try:
+            return super().request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.requests_sent += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Request/error counts plus connections opened, requests served and idle connections per host"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": pool.pool.qsize() if pool.pool is not None else 0,
+            }
+        with self._lock:
+            return {"requests": self.requests_sent, "errors": self.errors, "hosts": hosts}
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> PooledSession:
+    """Shared session for the Django backend (created on first use)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession(read_timeout=60)  # ML + LLM validation can take a while
+    return _session
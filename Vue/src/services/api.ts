@@ -8,4 +8,9 @@ const api = axios.create({
   },
 });
 
+// Cursor-paginated lists return absolute next/previous links; pass their cursor back as a param
+export function nextCursor(link: string | null | undefined): string | null {
+  return link ? new URL(link).searchParams.get('cursor') : null;
+}
+
 export default api;
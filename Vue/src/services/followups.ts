@@ -1,6 +1,12 @@
-import api from './api'
+import api, { nextCursor } from './api'
 import type { FollowUp, FollowUpResponse } from '@/types'
 
+export interface FollowUpReviewPage {
+  results: FollowUp[]
+  cursor: string | null
+  counts?: Record<string, number>  // Per-status totals, first page only
+}
+
 export const followupService = {
   // Get all follow-ups for current user
   async getFollowUps(status?: string): Promise<FollowUp[]> {
@@ -36,9 +42,17 @@ export const followupService = {
     return response.data.followup
   },
 
-  // Get follow-ups needing review (staff only)
-  async getNeedsReview(): Promise<FollowUp[]> {
-    const response = await api.get('/followups/needs-review/')
-    return response.data
+  // Get a page of follow-ups for staff review (staff only), optionally only some statuses
+  // (comma-separated); pass the returned cursor to load the next page
+  async getNeedsReview(status?: string, cursor?: string | null): Promise<FollowUpReviewPage> {
+    const params: Record<string, string> = {}
+    if (status) params.status = status
+    if (cursor) params.cursor = cursor
+    const response = await api.get('/followups/needs-review/', { params })
+    return {
+      results: response.data.results || [],
+      cursor: nextCursor(response.data.next),
+      counts: response.data.counts
+    }
   }
 }
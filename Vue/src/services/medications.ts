@@ -1,4 +1,4 @@
-import api from './api'
+import api, { nextCursor } from './api'
 import type {
   Medication,
   MedicationLog,
@@ -6,26 +6,33 @@ import type {
   AdherenceStats
 } from '@/types'
 
+export interface MedicationPage {
+  medications: Medication[]
+  cursor: string | null
+  count: number
+}
+
+async function getMedicationPage(filters: Record<string, any>, cursor?: string | null): Promise<MedicationPage> {
+  const params: Record<string, any> = { ...filters }
+  if (cursor) params.cursor = cursor
+  const response = await api.get('/medications/', { params })
+  return {
+    medications: response.data.medications || [],
+    cursor: nextCursor(response.data.next),
+    count: response.data.count || 0
+  }
+}
+
 export const medicationService = {
-  // Get all medications for current user
-  async getMedications(): Promise<Medication[]> {
-    const response = await api.get('/medications/')
-    const payload = response.data
-    if (Array.isArray(payload)) return payload
-    if (Array.isArray(payload?.medications)) return payload.medications
-    return []
+  // Get a page of medications for current user, latest first; pass the returned cursor for more
+  async getMedications(cursor?: string | null): Promise<MedicationPage> {
+    return getMedicationPage({}, cursor)
   },
 
-  // Get medications for specific student (staff only)
-  async getMedicationsByStudent(studentId: number): Promise<Medication[]> {
-    const response = await api.get('/medications/', {
-      // Backend expects student_id = school_id for staff filter
-      params: { student_id: studentId }
-    })
-    const payload = response.data
-    if (Array.isArray(payload)) return payload
-    if (Array.isArray(payload?.medications)) return payload.medications
-    return []
+  // Get a page of medications for specific student (staff only)
+  async getMedicationsByStudent(studentId: number, cursor?: string | null): Promise<MedicationPage> {
+    // Backend expects student_id = school_id for staff filter
+    return getMedicationPage({ student_id: studentId }, cursor)
   },
 
   // Get single medication
@@ -6,6 +6,9 @@ interface FollowUpState {
   followUps: FollowUp[]
   pendingFollowUps: FollowUp[]
   needsReview: FollowUp[]
+  needsReviewCursor: string | null  // Next page of the review list, if any
+  needsReviewStatus: string
+  needsReviewCounts: Record<string, number>
   loading: boolean
   error: string | null
 }
@@ -15,6 +18,9 @@ export const useFollowUpStore = defineStore('followup', {
     followUps: [],
     pendingFollowUps: [],
     needsReview: [],
+    needsReviewCursor: null,
+    needsReviewStatus: '',
+    needsReviewCounts: {},
     loading: false,
     error: null
   }),
@@ -85,12 +91,34 @@ export const useFollowUpStore = defineStore('followup', {
       }
     },
 
-    async fetchNeedsReview() {
+    // First page of the staff review list (status: comma-separated statuses, '' for all)
+    async fetchNeedsReview(status = '') {
       this.loading = true
       this.error = null
       
       try {
-        this.needsReview = await followupService.getNeedsReview()
+        const page = await followupService.getNeedsReview(status)
+        this.needsReview = page.results
+        this.needsReviewCursor = page.cursor
+        this.needsReviewStatus = status
+        this.needsReviewCounts = page.counts || {}
+      } catch (error: any) {
+        this.error = error.response?.data?.error || 'Failed to fetch reviews'
+        console.error('Error fetching needs review:', error)
+      } finally {
+        this.loading = false
+      }
+    },
+
+    async fetchMoreNeedsReview() {
+      if (!this.needsReviewCursor) return
+      this.loading = true
+      this.error = null
+      
+      try {
+        const page = await followupService.getNeedsReview(this.needsReviewStatus, this.needsReviewCursor)
+        this.needsReview.push(...page.results)
+        this.needsReviewCursor = page.cursor
       } catch (error: any) {
         this.error = error.response?.data?.error || 'Failed to fetch reviews'
         console.error('Error fetching needs review:', error)
@@ -4,6 +4,8 @@ import type { Medication, MedicationLog, MedicationCreateData, AdherenceStats }
 
 interface MedicationState {
   medications: Medication[]
+  medicationsCursor: string | null  // Next page of the medication list, if any
+  medicationsStudentId: number | null
   todaysLogs: MedicationLog[]
   adherenceStats: AdherenceStats | null
   loading: boolean
@@ -13,6 +15,8 @@ interface MedicationState {
 export const useMedicationStore = defineStore('medication', {
   state: (): MedicationState => ({
     medications: [],
+    medicationsCursor: null,
+    medicationsStudentId: null,
     todaysLogs: [],
     adherenceStats: null,
     loading: false,
@@ -63,11 +67,32 @@ export const useMedicationStore = defineStore('medication', {
       this.error = null
       
       try {
-        if (studentId) {
-          this.medications = await medicationService.getMedicationsByStudent(studentId)
-        } else {
-          this.medications = await medicationService.getMedications()
-        }
+        const page = studentId
+          ? await medicationService.getMedicationsByStudent(studentId)
+          : await medicationService.getMedications()
+        this.medications = page.medications
+        this.medicationsCursor = page.cursor
+        this.medicationsStudentId = studentId ?? null
+      } catch (error: any) {
+        this.error = error.response?.data?.error || 'Failed to fetch medications'
+        console.error('Error fetching medications:', error)
+      } finally {
+        this.loading = false
+      }
+    },
+
+    // Append the next page of the list loaded by fetchMedications
+    async fetchMoreMedications() {
+      if (!this.medicationsCursor) return
+      this.loading = true
+      this.error = null
+      
+      try {
+        const page = this.medicationsStudentId
+          ? await medicationService.getMedicationsByStudent(this.medicationsStudentId, this.medicationsCursor)
+          : await medicationService.getMedications(this.medicationsCursor)
+        this.medications.push(...page.medications)
+        this.medicationsCursor = page.cursor
       } catch (error: any) {
         this.error = error.response?.data?.error || 'Failed to fetch medications'
         console.error('Error fetching medications:', error)
@@ -13,6 +13,10 @@ cd /home/site/wwwroot/Django 2>/dev/null || cd Django
 echo "Running database migrations..."
 python manage.py migrate --noinput
 
+echo "Refreshing analytics rollups and department stats..."
+python manage.py refresh_rollups
+python manage.py refresh_department_stats
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 